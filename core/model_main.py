@@ -1,9 +1,15 @@
 # FileName: model_main.py
-# version: 1.3 (modified for infinite map)
+# version: 1.10 (dirty_tiles is a DirtyRegion)
 # Summary: Defines the GameModel and GameContext. The world_width/world_height
 #          remain but are no longer used for bounding in movement or camera.
 # Tags: model, data, state
 
+from engine.engine_timers import TimerService
+from engine.engine_world_events import ChunkEventStore
+from engine.engine_npc import NpcStore
+from engine.engine_pathfinding import PathService
+from engine.engine_cellbuffer import TileStackStore, DirtyRegion
+
 class GameModel:
     def __init__(self):
         """
@@ -24,15 +30,33 @@ class GameModel:
 
         self.camera_x = 0
         self.camera_y = 0
-        self.dirty_tiles = set()
+        self.dirty_tiles = DirtyRegion()   # per-row spans, see engine_cellbuffer.py
         self.action_flash_info = None
+        self.action_flash_timer = None
 
         self.loaded_map_filename = None
+        self.map_source = None   # how the map was built (file name or generator seed)
         self.full_redraw_needed = True
         self.should_quit = False
 
-        # For respawning resources
-        self.respawn_list = []
+        # Timed events. World changes (respawns) are kept per chunk and applied
+        # lazily (engine_world_events.py); their clock only runs while respawning
+        # is enabled. Short-lived effects use a plain timer heap (engine_timers.py).
+        self.world_events = ChunkEventStore()
+        self.effect_timers = TimerService()
+
+        # NPCs (entities-layer objects driven by engine_npc.py)
+        self.npcs = NpcStore()
+
+        # Routes for NPCs / click-to-move (A*, cached flow fields)
+        self.paths = PathService(self)
+
+        # Each tile's visible stack, compiled to cells for drawing
+        self.tile_stacks = TileStackStore(self)
+
+        # Tile rectangle (x0, y0, x1, y1) kept up to date with world events:
+        # the viewport plus a margin. Set by the engine every frame.
+        self.active_region = (0, 0, -1, -1)
 
         # For editor mode
         self.editor_scenery_list = []
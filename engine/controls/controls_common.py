@@ -1,116 +1,126 @@
 # FileName: controls_common.py
-# version: 2.19 (modified to handle SHOW_INVENTORY action)
+# version: 2.22 (table dispatch; a repeated move runs as one multi-step move)
 #
 # Summary: Interprets user input actions that apply to BOTH play and editor modes.
 #          No direct curses or curses-based code. We rely on IGameRenderer
 #          to handle UI tasks. Inventory is displayed in a dedicated scene.
+#          Actions are looked up in COMMON_ACTIONS instead of an elif chain.
 #
 # Tags: controls, input, common
 
 import tools.debug as debug
+from engine.engine_respawn import settle_all_respawns
+
+def _move(direction):
+    def handler(model, renderer, mark_dirty_func, repeat):
+        """
+        Walk up to 'repeat' (times walk_speed_multiplier) tiles. Only the start
+        and end tiles are marked dirty: nothing is drawn in between.
+        """
+        player = model.player
+        start = (player.x, player.y)
+        for _ in range(repeat * debug.DEBUG_CONFIG["walk_speed_multiplier"]):
+            old_x, old_y = player.x, player.y
+            player.move(direction, model.world_width, model.world_height, model.placed_scenery)
+            if (player.x, player.y) == (old_x, old_y):
+                break
+        if (player.x, player.y) == start:
+            return (False, False)
+        mark_dirty_func(*start)
+        mark_dirty_func(player.x, player.y)
+        return (True, False)
+    return handler
+
+def _quit(model, renderer, mark_dirty_func, repeat):
+    # The user pressed 'q' (or ESC) to leave the map.
+    # Off-screen chunks may still owe respawns; apply them before saving.
+    settle_all_respawns(model, mark_dirty_func)
+    if model.loaded_map_filename:
+        # If there's a filename, do a quick-save and quit
+        renderer.quick_save(model)
+    else:
+        # For a generated map with no filename, ask user if they want to save
+        if renderer.prompt_yes_no(""""Save this generated map? (y/n)"""):
+            renderer.quick_save(model)
+    return (False, True)
+
+def _debug_toggle(model, renderer, mark_dirty_func, repeat):
+    debug.toggle_debug()
+    model.full_redraw_needed = True
+    return (False, False)
 
-def handle_common_actions(action, model, renderer, mark_dirty_func):
+def _perf_toggle(model, renderer, mark_dirty_func, repeat):
+    debug.toggle_perf_hud()
+    model.full_redraw_needed = True
+    return (False, False)
+
+def _editor_toggle(model, renderer, mark_dirty_func, repeat):
+    # Toggle between play and editor contexts
+    context = model.context
+    if context.mode_name == "play":
+        context.mode_name = "editor"
+        context.enable_editor_commands = True
+        context.enable_sliding = False
+        context.enable_respawn = False
+
+        if not model.editor_scenery_list:
+            from scenery.scenery_manager import get_placeable_scenery_defs
+            dynamic_defs = get_placeable_scenery_defs()
+            model.editor_scenery_list = [(def_id, None, None) for def_id in dynamic_defs]
+    else:
+        context.mode_name = "play"
+        context.enable_editor_commands = False
+        context.enable_sliding = True
+        context.enable_respawn = True
+
+    model.full_redraw_needed = True
+    return (False, False)
+
+def _save_quick(model, renderer, mark_dirty_func, repeat):
+    # The user triggered a quick save
+    settle_all_respawns(model, mark_dirty_func)
+    renderer.quick_save(model)
+    return (False, False)
+
+def _show_inventory(model, renderer, mark_dirty_func, repeat):
+    # Display the dedicated inventory screen
+    curses_window = renderer.get_curses_window()
+    if curses_window:
+        from curses_frontend.curses_scene_inventory import show_inventory_screen
+        show_inventory_screen(curses_window, model)
+
+        # Force a full redraw after closing the inventory
+        model.full_redraw_needed = True
+    return (False, False)
+
+# action => handler(model, renderer, mark_dirty_func, repeat) -> (did_move, should_quit)
+COMMON_ACTIONS = {
+    "QUIT":           _quit,
+    "MOVE_UP":        _move("up"),
+    "MOVE_DOWN":      _move("down"),
+    "MOVE_LEFT":      _move("left"),
+    "MOVE_RIGHT":     _move("right"),
+    "DEBUG_TOGGLE":   _debug_toggle,
+    "PERF_TOGGLE":    _perf_toggle,
+    "EDITOR_TOGGLE":  _editor_toggle,
+    "SAVE_QUICK":     _save_quick,
+    "SHOW_INVENTORY": _show_inventory,
+}
+
+def handle_common_actions(action, model, renderer, mark_dirty_func, repeat=1):
     """
     Handle actions that apply to BOTH play and editor modes:
       - QUIT => user pressed 'q' to leave the map
       - SAVE_QUICK => quick save
       - MOVE_UP / MOVE_DOWN / MOVE_LEFT / MOVE_RIGHT => movement
+        ('repeat' steps at once, for coalesced key repeats)
       - DEBUG_TOGGLE => toggles debug
+      - PERF_TOGGLE => toggles the performance HUD
       - EDITOR_TOGGLE => toggles editor mode
       - SHOW_INVENTORY => display an inventory screen
+    Returns (did_move, should_quit).
     """
-    player = model.player
-    context = model.context
-
-    did_move = False
-    should_quit = False
-
-    if action == "QUIT":
-        # The user pressed 'q' (or ESC) to leave the map.
-        if model.loaded_map_filename:
-            # If there's a filename, do a quick-save and quit
-            renderer.quick_save(model)
-            should_quit = True
-        else:
-            # For a generated map with no filename, ask user if they want to save
-            if renderer.prompt_yes_no(""""Save this generated map? (y/n)"""):
-                renderer.quick_save(model)
-            should_quit = True
-
-        return (did_move, should_quit)
-
-    elif action == "MOVE_UP":
-        for _ in range(debug.DEBUG_CONFIG["walk_speed_multiplier"]):
-            old_x, old_y = player.x, player.y
-            player.move("up", model.world_width, model.world_height, model.placed_scenery)
-            if (player.x, player.y) != (old_x, old_y):
-                mark_dirty_func(old_x, old_y)
-                mark_dirty_func(player.x, player.y)
-                did_move = True
-
-    elif action == "MOVE_DOWN":
-        for _ in range(debug.DEBUG_CONFIG["walk_speed_multiplier"]):
-            old_x, old_y = player.x, player.y
-            player.move("down", model.world_width, model.world_height, model.placed_scenery)
-            if (player.x, player.y) != (old_x, old_y):
-                mark_dirty_func(old_x, old_y)
-                mark_dirty_func(player.x, player.y)
-                did_move = True
-
-    elif action == "MOVE_LEFT":
-        for _ in range(debug.DEBUG_CONFIG["walk_speed_multiplier"]):
-            old_x, old_y = player.x, player.y
-            player.move("left", model.world_width, model.world_height, model.placed_scenery)
-            if (player.x, player.y) != (old_x, old_y):
-                mark_dirty_func(old_x, old_y)
-                mark_dirty_func(player.x, player.y)
-                did_move = True
-
-    elif action == "MOVE_RIGHT":
-        for _ in range(debug.DEBUG_CONFIG["walk_speed_multiplier"]):
-            old_x, old_y = player.x, player.y
-            player.move("right", model.world_width, model.world_height, model.placed_scenery)
-            if (player.x, player.y) != (old_x, old_y):
-                mark_dirty_func(old_x, old_y)
-                mark_dirty_func(player.x, player.y)
-                did_move = True
-
-    elif action == "DEBUG_TOGGLE":
-        debug.toggle_debug()
-        model.full_redraw_needed = True
-
-    elif action == "EDITOR_TOGGLE":
-        # Toggle between play and editor contexts
-        if context.mode_name == "play":
-            context.mode_name = "editor"
-            context.enable_editor_commands = True
-            context.enable_sliding = False
-            context.enable_respawn = False
-
-            if not model.editor_scenery_list:
-                from scenery.scenery_manager import get_placeable_scenery_defs
-                dynamic_defs = get_placeable_scenery_defs()
-                model.editor_scenery_list = [(def_id, None, None) for def_id in dynamic_defs]
-        else:
-            context.mode_name = "play"
-            context.enable_editor_commands = False
-            context.enable_sliding = True
-            context.enable_respawn = True
-
-        model.full_redraw_needed = True
-
-    elif action == "SAVE_QUICK":
-        # The user triggered a quick save
-        renderer.quick_save(model)
-
-    elif action == "SHOW_INVENTORY":
-        # Display the dedicated inventory screen
-        curses_window = renderer.get_curses_window()
-        if curses_window:
-            from curses_frontend.curses_scene_inventory import show_inventory_screen
-            show_inventory_screen(curses_window, model)
-
-            # Force a full redraw after closing the inventory
-            model.full_redraw_needed = True
-
-    return (did_move, should_quit)
\ No newline at end of file
+    handler = COMMON_ACTIONS.get(action)
+    if handler is None:
+        return (False, False)
+    return handler(model, renderer, mark_dirty_func, repeat)
@@ -1,8 +1,10 @@
 # FileName: controls_main.py
-# version: 2.18
+# version: 2.19 (coalesce repeated moves before dispatch)
 #
 # Summary: Main entry point for interpreting user actions, delegating to:
 #          controls_common, controls_editor, and controls_play.
+#          coalesce_actions() folds runs of the same move (key auto-repeat)
+#          into one multi-step move.
 #
 # Tags: controls, input, main
 
@@ -10,18 +12,37 @@ from .controls_common import handle_common_actions
 from .controls_editor import handle_editor_actions
 from .controls_play import handle_play_actions
 
-def dispatch_action(action, model, renderer, full_redraw_needed, mark_dirty_func):
+MOVE_ACTIONS = frozenset(("MOVE_UP", "MOVE_DOWN", "MOVE_LEFT", "MOVE_RIGHT"))
+
+def coalesce_actions(actions):
+    """
+    Return [(action, repeat), ...] with consecutive identical moves merged,
+    e.g. [MOVE_UP, MOVE_UP, INTERACT] => [(MOVE_UP, 2), (INTERACT, 1)].
+    Other actions (INTERACT chops once per press) are never merged.
+    """
+    coalesced = []
+    for action in actions:
+        if coalesced and action in MOVE_ACTIONS and coalesced[-1][0] == action:
+            coalesced[-1][1] += 1
+        else:
+            coalesced.append([action, 1])
+    return coalesced
+
+def dispatch_action(action, model, renderer, full_redraw_needed, mark_dirty_func, repeat=1):
     """
     Dispatches an action to the appropriate handlers in a set sequence:
       1) Common actions
       2) Editor-only actions
       3) Play-only actions
+    'repeat' is the number of coalesced copies (moves only).
 
     Returns:
       (did_move, should_quit, updated_full_redraw)
     """
     # 1) Handle common actions first
-    did_move, should_quit = handle_common_actions(action, model, renderer, mark_dirty_func)
+    did_move, should_quit = handle_common_actions(action, model, renderer, mark_dirty_func, repeat)
+    if should_quit:
+        return (did_move, should_quit, full_redraw_needed)
 
     # 2) Handle editor actions
     updated_full_redraw = handle_editor_actions(
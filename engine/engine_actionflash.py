@@ -1,20 +1,49 @@
 # FileName: engine_actionflash.py
-# version: 1.0
+# version: 2.0 (flash expiry is a timer on model.effect_timers)
 # Summary: Displays and updates short-lived visual indicators (flashes) when player chops, mines, or interacts.
 # Tags: engine, feedback, effects
 
-def update_action_flash(model, mark_dirty_func):
+from .engine_timers import register_timer_kind
+
+# Logic ticks a flash stays visible.
+ACTION_FLASH_TICKS = 1
+
+
+def _end_action_flash(model, mark_dirty_func, flash_pos):
+    """
+    Timer handler: clear the flash at flash_pos and repaint that tile.
+    """
+    model.action_flash_info = None
+    model.action_flash_timer = None
+    mark_dirty_func(*flash_pos)
+
+register_timer_kind("action_flash_end", _end_action_flash)
+
+
+def start_action_flash(model, fx, fy, mark_dirty_func, ticks=ACTION_FLASH_TICKS):
     """
-    Decrements the action_flash_info counter. If it's done, clears it and marks dirty.
+    Show a flash at (fx, fy) for 'ticks' ticks, replacing any flash in progress.
+    model.action_flash_info is (fx, fy, ticks) while it is shown.
     """
-    if model.action_flash_info is None:
-        return
+    old_timer = getattr(model, "action_flash_timer", None)
+    if old_timer is not None and model.effect_timers.cancel(old_timer):
+        old_x, old_y, _ = model.action_flash_info
+        mark_dirty_func(old_x, old_y)
 
-    fx, fy, count = model.action_flash_info
-    count -= 1
-    if count <= 0:
-        model.action_flash_info = None
-        mark_dirty_func(fx, fy)
-    else:
-        model.action_flash_info = (fx, fy, count)
-        mark_dirty_func(fx, fy)
\ No newline at end of file
+    model.action_flash_info = (fx, fy, ticks)
+    model.action_flash_timer = model.effect_timers.schedule(ticks, "action_flash_end", (fx, fy))
+    mark_dirty_func(fx, fy)
+
+
+def update_action_flash(model, mark_dirty_func, ticks=1):
+    """
+    Advance the effects clock by 'ticks', ending any flash that is due.
+    """
+    model.effect_timers.advance(ticks, model, mark_dirty_func)
+
+
+def ticks_until_flash_expires(model):
+    """
+    Return how many logic ticks until the next effect timer fires, or None if there is none.
+    """
+    return model.effect_timers.ticks_until_next()
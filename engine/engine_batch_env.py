@@ -0,0 +1,389 @@
+# FileName: engine_batch_env.py
+# version: 1.0
+# Summary: Gym-style batch environment for bots and AI experiments. Steps N
+#          independent generated worlds together, skipping input polling and
+#          rendering, and returns each player's viewport as NumPy tile-ID
+#          arrays. Every world keeps a padded tile-ID grid that scenery
+#          changes update in place, so a viewport is a slice of it (a view,
+#          no copy). SubprocBatchEnv spreads worlds over worker processes
+#          that write into shared-memory arrays.
+# Tags: engine, env, batch, numpy, ai, performance
+
+import random
+import weakref
+
+import numpy as np
+
+from scenery.scenery_core import (
+    SceneryObject, append_scenery, get_scenery_def_id_at, add_scenery_listener, is_blocked,
+)
+from scenery.scenery_manager import ALL_SCENERY_DEFS
+from .controls.controls_common import handle_common_actions
+from .controls.controls_play import handle_play_actions
+from .engine_headless import HeadlessGameRenderer
+from .engine_sessions import QueuedGameInput
+from .engine_main import GameEngine
+
+ENV_CONFIG = {
+    "width":          64,     # generated map size per world
+    "height":         64,
+    "view_cols":      21,     # viewport around the player (odd => player in the center)
+    "view_rows":      21,
+    "max_steps":      500,    # episode length; a finished world is reset automatically
+    "generator_mode": None,   # None => generator.GENERATOR_MODE
+    "npc_count":      0,
+    "trees":          40,     # TreeTrunk/TreeTop pairs and Rocks scattered per world,
+    "rocks":          40,     # since the generators leave them out by default
+}
+
+# Agent actions by index. 0 does nothing for a tick.
+ENV_ACTIONS = ("NOOP", "MOVE_UP", "MOVE_DOWN", "MOVE_LEFT", "MOVE_RIGHT", "INTERACT")
+
+# Tile IDs in observations: 0 = nothing there (outside the map), then every
+# scenery definition in sorted order.
+TILE_IDS = ("",) + tuple(sorted(ALL_SCENERY_DEFS))
+TILE_INDEX = {def_id: i for i, def_id in enumerate(TILE_IDS)}
+TILE_DTYPE = np.int16
+
+# Default reward: weight per unit gained since the last step.
+DEFAULT_REWARD_WEIGHTS = {"wood": 1.0, "stone": 1.0}
+
+
+# -------------------------------------------------------------------------
+# Tile grids follow scenery changes through one shared scenery listener,
+# looked up by the world's placed_scenery dict.
+# -------------------------------------------------------------------------
+_GRIDS = weakref.WeakValueDictionary()     # id(placed_scenery) -> TileGrid
+_listening = False
+
+def _on_scenery_change(placed_scenery, obj):
+    grid = _GRIDS.get(id(placed_scenery))
+    if grid is not None and grid.placed_scenery is placed_scenery:
+        grid.refresh(obj.x, obj.y)
+
+
+class TileGrid:
+    """
+    Topmost tile ID of every map tile, plus 'pad' tiles of 0 around the map,
+    so a viewport near the edge is still a plain slice.
+    """
+    def __init__(self, model, pad_x, pad_y):
+        global _listening
+        self.placed_scenery = model.placed_scenery
+        self.pad_x, self.pad_y = pad_x, pad_y
+        self.width, self.height = model.world_width, model.world_height
+        self.ids = np.zeros((self.height + 2 * pad_y, self.width + 2 * pad_x), dtype=TILE_DTYPE)
+        inner = self.ids[pad_y:pad_y + self.height, pad_x:pad_x + self.width]
+        for (x, y) in model.placed_scenery:
+            if 0 <= x < self.width and 0 <= y < self.height:
+                inner[y, x] = TILE_INDEX.get(get_scenery_def_id_at(x, y, self.placed_scenery) or "", 0)
+        _GRIDS[id(self.placed_scenery)] = self
+        if not _listening:
+            add_scenery_listener(_on_scenery_change)
+            _listening = True
+
+    def refresh(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            def_id = get_scenery_def_id_at(x, y, self.placed_scenery)
+            self.ids[y + self.pad_y, x + self.pad_x] = TILE_INDEX.get(def_id or "", 0)
+
+    def view(self, x0, y0, cols, rows, out=None):
+        """
+        Tile IDs of the rectangle at (x0, y0). A slice of the grid (no copy)
+        when it fits inside the padding; otherwise a copy with 0 outside.
+        With 'out', the result is copied into it instead.
+        """
+        gx, gy = x0 + self.pad_x, y0 + self.pad_y
+        ids = self.ids
+        if 0 <= gx and 0 <= gy and gx + cols <= ids.shape[1] and gy + rows <= ids.shape[0]:
+            window = ids[gy:gy + rows, gx:gx + cols]
+            if out is None:
+                return window
+            out[...] = window
+            return out
+        # The player wandered past the padding (the world has no hard edge).
+        if out is None:
+            out = np.zeros((rows, cols), dtype=TILE_DTYPE)
+        else:
+            out[...] = 0
+        sx0, sy0 = max(gx, 0), max(gy, 0)
+        sx1, sy1 = min(gx + cols, ids.shape[1]), min(gy + rows, ids.shape[0])
+        if sx0 < sx1 and sy0 < sy1:
+            out[sy0 - gy:sy1 - gy, sx0 - gx:sx1 - gx] = ids[sy0:sy1, sx0:sx1]
+        return out
+
+
+def scatter_resources(model, trees, rocks, seed=0):
+    """
+    Put 'trees' trees (trunk with its top above) and 'rocks' rocks on free
+    floor tiles, away from the player. Same seed => same placement.
+    """
+    rng = random.Random(seed ^ 0x7EE5_0C45)
+    placed = model.placed_scenery
+    start = (model.player.x, model.player.y)
+    free = sorted(
+        (x, y) for (x, y) in placed
+        if (x, y) != start and 0 <= x < model.world_width and 0 <= y < model.world_height
+        and not is_blocked(x, y, placed)
+    )
+    rng.shuffle(free)
+    used = set()
+    for (x, y) in free:
+        if trees <= 0 and rocks <= 0:
+            break
+        if (x, y) in used:
+            continue
+        if trees > 0 and (x, y - 1) in placed and (x, y - 1) not in used \
+                and (x, y - 1) != start and not is_blocked(x, y - 1, placed):
+            append_scenery(placed, SceneryObject(x, y, "TreeTrunk"))
+            append_scenery(placed, SceneryObject(x, y - 1, "TreeTop"))
+            used.update(((x, y), (x, y - 1)))
+            trees -= 1
+        elif rocks > 0:
+            append_scenery(placed, SceneryObject(x, y, "Rock"))
+            used.add((x, y))
+            rocks -= 1
+
+
+class _World:
+    """
+    One environment: a generated model, its engine (for the game logic only)
+    and its tile grid.
+    """
+    def __init__(self, seed, config):
+        from map_system.mapgen.map_generator_pipeline import create_procedural_model
+        from players.player_char import Player
+
+        model, context = create_procedural_model(
+            config["width"], config["height"], generator_mode=config["generator_mode"],
+            seed=seed, npc_count=config["npc_count"])
+        # A fresh player every episode, never the local character file.
+        model.player = Player(x=model.player.x, y=model.player.y, name="agent")
+        scatter_resources(model, config["trees"], config["rocks"], seed)
+        cols, rows = config["view_cols"], config["view_rows"]
+        self.engine = GameEngine(model, context, QueuedGameInput(), HeadlessGameRenderer(cols, rows))
+        self.model = model
+        self.grid = TileGrid(model, cols // 2 + 1, rows // 2 + 1)
+        self.steps = 0
+        self.last_stats = self.stats()
+
+    def stats(self):
+        p = self.model.player
+        return {"wood": p.wood, "stone": p.stone, "gold": p.gold, "hp": p.hp}
+
+    def apply(self, action):
+        """
+        One logic tick with 'action' (an ENV_ACTIONS name), like a GameEngine
+        frame without input polling or rendering.
+        """
+        engine, model = self.engine, self.model
+        mark = engine.mark_dirty
+        actions = [] if action == "NOOP" else [action]
+        engine.frame_actions = actions
+        renderer = engine.game_renderer
+        for act in actions:
+            handle_common_actions(act, model, renderer, mark)
+            handle_play_actions(act, model, renderer, False, mark)
+        # Keep the camera (and so the active region) centred on the player.
+        cols, rows = engine.game_renderer.get_visible_size()
+        cam = (model.player.x - cols // 2, model.player.y - rows // 2)
+        if cam != (model.camera_x, model.camera_y):
+            model.camera_x, model.camera_y = cam
+            engine.update_active_region()
+        engine.update_game_logic()
+        model.dirty_tiles.clear()
+        self.steps += 1
+
+    def view(self, out=None):
+        cols, rows = self.engine.game_renderer.get_visible_size()
+        return self.grid.view(self.model.player.x - cols // 2, self.model.player.y - rows // 2,
+                              cols, rows, out)
+
+
+class BatchEnv:
+    """
+    N independent worlds stepped together.
+
+      obs = env.reset(seed)                    => int16 array [N, rows, cols]
+      obs, rewards, dones, infos = env.step(actions)
+      env.views()                              => per-world arrays that are
+                                                  slices of the live grids (no copy)
+
+    'actions' holds one ENV_ACTIONS index (or name) per world.
+    Rewards are the weighted gain in wood/stone (reward_weights) plus the
+    sum of reward_hooks: fn(index, model, last_stats) -> float.
+    A world that reaches max_steps is reset (with a new seed) right away;
+    its final stats are in infos[i]["final_stats"].
+
+    'obs_out' / 'reward_out' / 'done_out' may be given to write into
+    existing arrays (e.g. shared memory); otherwise they are allocated once.
+    """
+    def __init__(self, num_envs, config=None, reward_weights=None, reward_hooks=(),
+                 obs_out=None, reward_out=None, done_out=None):
+        self.num_envs = num_envs
+        self.config = dict(ENV_CONFIG, **(config or {}))
+        self.reward_weights = dict(DEFAULT_REWARD_WEIGHTS if reward_weights is None else reward_weights)
+        self.reward_hooks = list(reward_hooks)
+        shape = (num_envs, self.config["view_rows"], self.config["view_cols"])
+        self.obs = np.zeros(shape, dtype=TILE_DTYPE) if obs_out is None else obs_out
+        self.rewards = np.zeros(num_envs, dtype=np.float32) if reward_out is None else reward_out
+        self.dones = np.zeros(num_envs, dtype=np.bool_) if done_out is None else done_out
+        self.worlds = []
+        self.next_seed = 0
+
+    def _new_world(self):
+        seed = self.next_seed
+        self.next_seed += 1
+        return _World(seed, self.config)
+
+    def reset(self, seed=0):
+        # NPC wandering uses the global random module; seeding it here makes
+        # a whole batch run reproducible from 'seed'.
+        random.seed(seed)
+        self.next_seed = seed
+        self.worlds = [self._new_world() for _ in range(self.num_envs)]
+        for i, world in enumerate(self.worlds):
+            world.view(self.obs[i])
+        self.rewards[:] = 0
+        self.dones[:] = False
+        return self.obs
+
+    def step(self, actions):
+        infos = [{} for _ in range(self.num_envs)]
+        weights = self.reward_weights
+        max_steps = self.config["max_steps"]
+        for i, world in enumerate(self.worlds):
+            action = actions[i]
+            if not isinstance(action, str):
+                action = ENV_ACTIONS[int(action)]
+            world.apply(action)
+
+            stats = world.stats()
+            reward = sum(w * (stats[k] - world.last_stats[k]) for k, w in weights.items())
+            for hook in self.reward_hooks:
+                reward += hook(i, world.model, world.last_stats)
+            world.last_stats = stats
+            self.rewards[i] = reward
+
+            done = world.steps >= max_steps
+            self.dones[i] = done
+            if done:
+                infos[i]["final_stats"] = stats
+                world = self.worlds[i] = self._new_world()
+            world.view(self.obs[i])
+        return self.obs, self.rewards, self.dones, infos
+
+    def views(self):
+        return [world.view() for world in self.worlds]
+
+    @property
+    def models(self):
+        return [world.model for world in self.worlds]
+
+
+# =========================================================================
+# Worker processes
+# =========================================================================
+def _worker_main(conn, shm_names, start, count, num_envs, config, reward_weights):
+    from multiprocessing import shared_memory
+
+    shms = [shared_memory.SharedMemory(name=n) for n in shm_names]
+    obs, rewards, dones = _shared_arrays(shms, num_envs, config)
+    env = BatchEnv(count, config, reward_weights,
+                   obs_out=obs[start:start + count],
+                   reward_out=rewards[start:start + count],
+                   done_out=dones[start:start + count])
+    try:
+        while True:
+            cmd, arg = conn.recv()
+            if cmd == "reset":
+                env.reset(arg)
+                conn.send(None)
+            elif cmd == "step":
+                _, _, _, infos = env.step(arg)
+                conn.send(infos)
+            else:
+                break
+    finally:
+        del env, obs, rewards, dones
+        for shm in shms:
+            shm.close()
+        conn.close()
+
+def _shared_arrays(shms, num_envs, config):
+    shape = (num_envs, config["view_rows"], config["view_cols"])
+    obs = np.ndarray(shape, dtype=TILE_DTYPE, buffer=shms[0].buf)
+    rewards = np.ndarray((num_envs,), dtype=np.float32, buffer=shms[1].buf)
+    dones = np.ndarray((num_envs,), dtype=np.bool_, buffer=shms[2].buf)
+    return obs, rewards, dones
+
+
+class SubprocBatchEnv:
+    """
+    Same interface as BatchEnv, with the worlds split over 'num_workers'
+    processes. Observations, rewards and dones live in shared memory, so
+    the arrays returned here are written by the workers directly; only
+    actions and infos travel through pipes. Reward hooks must be picklable
+    module-level functions to be used here, so only reward_weights is supported.
+    """
+    def __init__(self, num_envs, num_workers=2, config=None, reward_weights=None):
+        import multiprocessing as mp
+        from multiprocessing import shared_memory
+
+        self.num_envs = num_envs
+        self.config = dict(ENV_CONFIG, **(config or {}))
+        rows, cols = self.config["view_rows"], self.config["view_cols"]
+        itemsize = np.dtype(TILE_DTYPE).itemsize
+        sizes = (num_envs * rows * cols * itemsize, num_envs * 4, num_envs)
+        self._shms = [shared_memory.SharedMemory(create=True, size=max(1, s)) for s in sizes]
+        self.obs, self.rewards, self.dones = _shared_arrays(self._shms, num_envs, self.config)
+
+        ctx = mp.get_context("spawn")
+        self.slices = []
+        self.conns = []
+        self.procs = []
+        num_workers = max(1, min(num_workers, num_envs))
+        start = 0
+        for w in range(num_workers):
+            count = num_envs // num_workers + (1 if w < num_envs % num_workers else 0)
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_worker_main, daemon=True,
+                               args=(child, [s.name for s in self._shms], start, count,
+                                     num_envs, self.config, reward_weights))
+            proc.start()
+            child.close()
+            self.slices.append((start, count))
+            self.conns.append(parent)
+            self.procs.append(proc)
+            start += count
+
+    def reset(self, seed=0):
+        # Worker w starts at seed + its first world index, so each world's
+        # map matches the one a single BatchEnv.reset(seed) would build.
+        for (start, _), conn in zip(self.slices, self.conns):
+            conn.send(("reset", seed + start))
+        for conn in self.conns:
+            conn.recv()
+        return self.obs
+
+    def step(self, actions):
+        actions = list(actions)
+        for (start, count), conn in zip(self.slices, self.conns):
+            conn.send(("step", actions[start:start + count]))
+        infos = []
+        for conn in self.conns:
+            infos.extend(conn.recv())
+        return self.obs, self.rewards, self.dones, infos
+
+    def close(self):
+        for conn in self.conns:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self.procs:
+            proc.join(timeout=5)
+        del self.obs, self.rewards, self.dones
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
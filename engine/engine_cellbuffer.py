@@ -0,0 +1,483 @@
+# FileName: engine_cellbuffer.py
+# version: 1.8 (DirtyRegion.add_rect back: dirty means repaint, not invalidate)
+# Summary: Backend-neutral shadow framebuffer shared by the curses and pygame
+#          renderers. compose_tile_cell() resolves a world tile (and the player
+#          standing on it) to the one (char, color_id) cell it shows; TileCellCache
+#          keeps those until the tile's scenery changes. CellBuffer holds the cells
+#          a frontend last presented for a tile rect, so each frame hands the
+#          backend only the cells that actually changed.
+#          A color id indexes COLOR_KEYS, the (fg, bg) color names; DEF_COLORS
+#          maps (object def, floor def) straight to one. Each frontend turns
+#          COLOR_KEYS into its own table (curses attributes, pygame RGB pairs),
+#          so drawing a cell never parses or formats color strings.
+#          TileStackStore (model.tile_stacks) keeps each tile's visible stack
+#          compiled down to cells, updated by the scenery listener, so
+#          composing a tile is a lookup rather than a walk over the layers.
+#          DirtyRegion (model.dirty_tiles) records dirty tiles as per-row
+#          bitmasks and hands renderers merged row spans in row order.
+# Tags: engine, rendering, framebuffer, performance
+
+import weakref
+
+from scenery.scenery_manager import ALL_SCENERY_DEFS
+from scenery.layer_manager import get_layers_in_draw_order
+from scenery.scenery_core import add_scenery_listener, remove_scenery_listener
+
+# Objects that are drawn over the player (a tree can hide them).
+OVER_PLAYER_IDS = ("TreeTop", "TreeTrunk")
+
+
+def split_color_name(color_name):
+    """
+    "white_on_blue" => ("white", "blue"). Anything else => ("white", "black"),
+    as the frontends' parse_two_color_names does.
+    """
+    parts = color_name.split("_on_")
+    if len(parts) == 2:
+        return parts[0], parts[1]
+    return ("white", "black")
+
+
+# color id => (fg, bg) color names; ids are only ever appended.
+COLOR_KEYS = []
+_COLOR_IDS = {}
+
+def color_id(fg, bg):
+    """
+    The id of the (fg, bg) color pair, registering it on first use.
+    """
+    cid = _COLOR_IDS.get((fg, bg))
+    if cid is None:
+        cid = _COLOR_IDS[(fg, bg)] = len(COLOR_KEYS)
+        COLOR_KEYS.append((fg, bg))
+    return cid
+
+def _def_colors(def_id):
+    return split_color_name(ALL_SCENERY_DEFS.get(def_id, {}).get("color_name", "white_on_black"))
+
+def build_def_colors():
+    """
+    (object def, floor def) => color id of that object drawn on that floor
+    (its fg over the floor's bg) for every pair of definitions; floor def None
+    means no floor (black). A floor drawn alone is (floor def, floor def).
+    """
+    table = {}
+    for obj_id in ALL_SCENERY_DEFS:
+        fg = _def_colors(obj_id)[0]
+        table[(obj_id, None)] = color_id(fg, "black")
+        for floor_id in ALL_SCENERY_DEFS:
+            table[(obj_id, floor_id)] = color_id(fg, _def_colors(floor_id)[1])
+    return table
+
+DEF_COLORS = build_def_colors()
+DEF_GLYPHS = {def_id: info["ascii_char"] for def_id, info in ALL_SCENERY_DEFS.items() if "ascii_char" in info}
+
+def def_color(obj_id, floor_id):
+    cid = DEF_COLORS.get((obj_id, floor_id))
+    if cid is None:
+        # A definition added after import (or unknown): resolve it once.
+        bg = _def_colors(floor_id)[1] if floor_id is not None else "black"
+        cid = DEF_COLORS[(obj_id, floor_id)] = color_id(_def_colors(obj_id)[0], bg)
+    return cid
+
+BLANK_CELL = (" ", color_id("white", "black"))
+
+
+def compile_tile_stack(tile_dict):
+    """
+    Resolve a placed_scenery tile to (cell, over_player, floor_id, top_id):
+    the (char, color_id) its topmost object shows (None if it shows nothing),
+    the last TreeTop/TreeTrunk cell, drawn over a player standing there (or
+    None), the floor's definition id and the topmost object's (the floor's
+    if there is none; both None for an empty tile). Sprite renderers draw
+    from the two ids.
+    """
+    cell = over_player = floor_id = top_id = None
+    floor_obj = tile_dict.get("floor")
+    if floor_obj:
+        floor_id = top_id = floor_obj.definition_id
+        cell = (DEF_GLYPHS.get(floor_id, floor_obj.char), def_color(floor_id, floor_id))
+    for layer_name in get_layers_in_draw_order():
+        if layer_name == "floor":
+            continue
+        layer_contents = tile_dict.get(layer_name)
+        if not isinstance(layer_contents, list):
+            continue
+        for obj in layer_contents:
+            top_id = obj.definition_id
+            cell = (DEF_GLYPHS.get(top_id, obj.char), def_color(top_id, floor_id))
+            if top_id in OVER_PLAYER_IDS:
+                over_player = cell
+    return (cell, over_player, floor_id, top_id)
+
+EMPTY_STACK = (None, None, None, None)
+
+
+class TileStackStore:
+    """
+    compile_tile_stack() results for the tiles of model.placed_scenery,
+    compiled on first lookup. A scenery listener recompiles a tile when
+    append_scenery/remove_scenery changes it; invalidate() covers tiles
+    changed directly (e.g. the network client replacing a tile dict).
+    Either way the watchers (see watch()) hear about the tile, whether or
+    not it was compiled, so caches built on top stay in step with the map.
+    """
+    def __init__(self, model):
+        self.model = model
+        self._scenery = None
+        self.stacks = {}
+        self._listening = False
+        self._watchers = []
+
+    def _listen(self):
+        """
+        Start watching scenery changes on first use. Holds only a weak
+        reference, so the listener doesn't keep old models alive.
+        """
+        ref = weakref.WeakMethod(self._on_scenery_change)
+        def listener(placed_scenery, obj):
+            method = ref()
+            if method is None:
+                remove_scenery_listener(listener)
+            else:
+                method(placed_scenery, obj)
+        add_scenery_listener(listener)
+        self._listening = True
+
+    def watch(self, method):
+        """
+        Call bound method 'method'(x, y) after tile (x, y) of the current map
+        changes. Held weakly, so a renderer's cache can be dropped freely.
+        """
+        if not self._listening:
+            self._listen()
+        self._watchers.append(weakref.WeakMethod(method))
+
+    def _tile_changed(self, x, y):
+        live = []
+        for ref in self._watchers:
+            method = ref()
+            if method is not None:
+                method(x, y)
+                live.append(ref)
+        if len(live) != len(self._watchers):
+            self._watchers = live
+
+    def _on_scenery_change(self, placed_scenery, obj):
+        if placed_scenery is not self.model.placed_scenery:
+            return
+        key = (obj.x, obj.y)
+        if placed_scenery is self._scenery and key in self.stacks:
+            tile_dict = placed_scenery.get(key)
+            self.stacks[key] = compile_tile_stack(tile_dict) if tile_dict else EMPTY_STACK
+        if self._watchers:
+            self._tile_changed(obj.x, obj.y)
+
+    def get(self, x, y):
+        placed_scenery = self.model.placed_scenery
+        if placed_scenery is not self._scenery:
+            # A new map replaces model.placed_scenery wholesale; start over.
+            if not self._listening:
+                self._listen()
+            self._scenery = placed_scenery
+            self.stacks.clear()
+        stack = self.stacks.get((x, y))
+        if stack is None:
+            tile_dict = placed_scenery.get((x, y))
+            stack = self.stacks[(x, y)] = compile_tile_stack(tile_dict) if tile_dict else EMPTY_STACK
+        return stack
+
+    def invalidate(self, tiles):
+        """
+        Forget the stacks of 'tiles', whose dicts were changed without
+        append_scenery/remove_scenery, and tell the watchers.
+        """
+        pop = self.stacks.pop
+        for tile in tiles:
+            pop(tile, None)
+            if self._watchers:
+                self._tile_changed(*tile)
+
+
+# (player color name, floor def id) => color id
+_PLAYER_COLORS = {}
+
+def player_color(color_name, floor_id):
+    """
+    Color id of the player (foreground from 'color_name') on the given floor.
+    """
+    cid = _PLAYER_COLORS.get((color_name, floor_id))
+    if cid is None:
+        bg = _def_colors(floor_id)[1] if floor_id is not None else "black"
+        cid = _PLAYER_COLORS[(color_name, floor_id)] = color_id(split_color_name(color_name)[0], bg)
+    return cid
+
+
+def compose_tile_cell(model, wx, wy):
+    """
+    The (char, color_id) cell that tile (wx, wy) shows: its compiled stack's
+    top cell, or the player (under any TreeTop/TreeTrunk) if the player
+    stands there.
+    """
+    cell, over_player, floor_id, _ = model.tile_stacks.get(wx, wy)
+    player = model.player
+    if player is not None and player.x == wx and player.y == wy:
+        if over_player is not None:
+            return over_player
+        return (getattr(player, "char", "@"), player_color(getattr(player, "color_name", "white"), floor_id))
+    return cell or BLANK_CELL
+
+
+class TileCellCache:
+    """
+    compose_tile_cell() results per tile. Cells are dropped when the stack
+    store reports the tile changed (see TileStackStore.watch), so a tile
+    that changes off screen is never shown stale once it scrolls in. The
+    player's tile is composed fresh rather than cached, so player moves
+    need no invalidation. Dropped wholesale when the map is replaced or it
+    grows past 'max_size' tiles.
+    """
+    def __init__(self, max_size=65536):
+        self.max_size = max_size
+        self.cells = {}
+        self._scenery = None
+        self._stacks = None
+
+    def _on_tile_change(self, x, y):
+        self.cells.pop((x, y), None)
+
+    def get(self, model, wx, wy):
+        if model.placed_scenery is not self._scenery:
+            self._scenery = model.placed_scenery
+            self.cells.clear()
+            if model.tile_stacks is not self._stacks:
+                self._stacks = model.tile_stacks
+                self._stacks.watch(self._on_tile_change)
+        player = model.player
+        if player is not None and player.x == wx and player.y == wy:
+            return compose_tile_cell(model, wx, wy)
+        cell = self.cells.get((wx, wy))
+        if cell is None:
+            if len(self.cells) >= self.max_size:
+                self.cells.clear()
+            cell = self.cells[(wx, wy)] = compose_tile_cell(model, wx, wy)
+        return cell
+
+
+def rect_difference(rect, other):
+    """
+    Rects (x0, y0, x1, y1), inclusive, covering 'rect' minus 'other'
+    (e.g. the rows and columns a scroll exposes). 'other' may be None.
+    """
+    x0, y0, x1, y1 = rect
+    if other is None:
+        return [rect]
+    ox0, oy0, ox1, oy1 = other
+    parts = []
+    # Whole rows above/below 'other'...
+    for (ry0, ry1) in ((y0, min(y1, oy0 - 1)), (max(y0, oy1 + 1), y1)):
+        if ry0 <= ry1:
+            parts.append((x0, ry0, x1, ry1))
+    # ...and the left/right parts of the rows they share.
+    ry0, ry1 = max(y0, oy0), min(y1, oy1)
+    if ry0 <= ry1:
+        for (rx0, rx1) in ((x0, min(x1, ox0 - 1)), (max(x0, ox1 + 1), x1)):
+            if rx0 <= rx1:
+                parts.append((rx0, ry0, rx1, ry1))
+    return parts
+
+
+class CellBuffer:
+    """
+    The cells last presented for the tile rect starting at (x0, y0),
+    'cols' x 'rows', row-major. None marks a cell the backend doesn't have
+    (never drawn, or just scrolled in), so it always counts as changed.
+    """
+    def __init__(self, cols, rows, x0=0, y0=0):
+        self.cols, self.rows = cols, rows
+        self.x0, self.y0 = x0, y0
+        self.cells = [None] * (cols * rows)
+
+    def reset(self):
+        self.cells = [None] * (self.cols * self.rows)
+
+    def contains(self, wx, wy):
+        return 0 <= wx - self.x0 < self.cols and 0 <= wy - self.y0 < self.rows
+
+    def move_origin(self, x0, y0):
+        """
+        Re-anchor the buffer at (x0, y0), keeping the cells of tiles that are
+        still covered (the backend moves its pixels/characters the same way).
+        """
+        dx, dy = x0 - self.x0, y0 - self.y0
+        if not (dx or dy):
+            return
+        cols, rows, old = self.cols, self.rows, self.cells
+        cells = [None] * (cols * rows)
+        c0, c1 = max(0, dx), min(cols, cols + dx)    # old columns still covered
+        if c0 < c1:
+            for r in range(max(0, -dy), min(rows, rows - dy)):
+                src = (r + dy) * cols
+                dst = r * cols - dx
+                cells[dst + c0:dst + c1] = old[src + c0:src + c1]
+        self.cells = cells
+        self.x0, self.y0 = x0, y0
+
+    def diff(self, model, cache, tiles):
+        """
+        Compose each tile in 'tiles' (inside the buffer) and record it.
+        Returns [(wx, wy, cell), ...] for the cells that changed.
+        """
+        changed = []
+        cells, cols, x0, y0 = self.cells, self.cols, self.x0, self.y0
+        rows = self.rows
+        for (wx, wy) in tiles:
+            c, r = wx - x0, wy - y0
+            if 0 <= c < cols and 0 <= r < rows:
+                cell = cache.get(model, wx, wy)
+                i = r * cols + c
+                if cells[i] != cell:
+                    cells[i] = cell
+                    changed.append((wx, wy, cell))
+        return changed
+
+    def diff_rows(self, model, cache, rects):
+        """
+        Compose the rects (inclusive, clipped to the buffer) a row at a time,
+        compare each row with the buffer in one slice compare, and record it.
+        Yields (wy, wx, [cell, ...]) for each run of changed cells, rows in
+        the order given and left to right.
+        """
+        cols, rows, x0, y0 = self.cols, self.rows, self.x0, self.y0
+        get = cache.get
+        for (rx0, ry0, rx1, ry1) in rects:
+            rx0, rx1 = max(rx0, x0), min(rx1, x0 + cols - 1)
+            ry0, ry1 = max(ry0, y0), min(ry1, y0 + rows - 1)
+            if rx0 > rx1:
+                continue
+            for wy in range(ry0, ry1 + 1):
+                row = [get(model, wx, wy) for wx in range(rx0, rx1 + 1)]
+                i0 = (wy - y0) * cols + (rx0 - x0)
+                old = self.cells[i0:i0 + len(row)]
+                if old == row:
+                    continue
+                self.cells[i0:i0 + len(row)] = row
+                n = len(row)
+                j = 0
+                while j < n:
+                    if old[j] == row[j]:
+                        j += 1
+                        continue
+                    k = j + 1
+                    while k < n and old[k] != row[k]:
+                        k += 1
+                    yield (wy, rx0 + j, row[j:k])
+                    j = k
+
+
+class DirtyRegion:
+    """
+    The tiles to redraw, as one bitmask per row: rows[y] = (x_base, bits),
+    bit i set for tile (x_base + i, y). Marking a tile or a rect is a few
+    integer operations. Iterates like the set of (x, y) tiles it replaces
+    (row by row), and rects() gives the merged row spans for diff_rows.
+    Dirty only means "compare with what is shown": cached cells and stacks
+    follow scenery changes on their own (TileStackStore.watch).
+    """
+    def __init__(self):
+        self.rows = {}
+
+    def add_span(self, y, x0, x1):
+        """
+        Mark tiles x0..x1 (inclusive) of row y.
+        """
+        bits = (1 << (x1 - x0 + 1)) - 1
+        row = self.rows.get(y)
+        if row is None:
+            self.rows[y] = (x0, bits)
+            return
+        base, old = row
+        if x0 < base:
+            self.rows[y] = (x0, (old << (base - x0)) | bits)
+        else:
+            self.rows[y] = (base, old | (bits << (x0 - base)))
+
+    def add(self, tile):
+        x, y = tile
+        self.add_span(y, x, x)
+
+    def add_rect(self, x0, y0, x1, y1):
+        """
+        Mark the inclusive rect (x0, y0)-(x1, y1).
+        """
+        for y in range(y0, y1 + 1):
+            self.add_span(y, x0, x1)
+
+    def update(self, tiles):
+        for (x, y) in tiles:
+            self.add_span(y, x, x)
+
+    def clear(self):
+        self.rows.clear()
+
+    def __bool__(self):
+        return bool(self.rows)
+
+    def __len__(self):
+        return sum(bin(bits).count("1") for (_, bits) in self.rows.values())
+
+    def __contains__(self, tile):
+        x, y = tile
+        row = self.rows.get(y)
+        return row is not None and x >= row[0] and (row[1] >> (x - row[0])) & 1 == 1
+
+    def spans(self):
+        """
+        Yield (y, x0, x1) for each run of dirty tiles, rows in ascending
+        order and left to right within a row.
+        """
+        for y in sorted(self.rows):
+            x, bits = self.rows[y]
+            while bits:
+                skip = (bits & -bits).bit_length() - 1
+                bits >>= skip
+                x += skip
+                rest = ~bits
+                run = (rest & -rest).bit_length() - 1
+                yield (y, x, x + run - 1)
+                bits >>= run
+                x += run
+
+    def rects(self):
+        """
+        The dirty runs as one-row rects (x0, y, x1, y), in row order.
+        """
+        return [(x0, y, x1, y) for (y, x0, x1) in self.spans()]
+
+    def __iter__(self):
+        for (y, x0, x1) in self.spans():
+            for x in range(x0, x1 + 1):
+                yield (x, y)
+
+
+def clip_rects(rects, bounds):
+    """
+    The inclusive rects cut down to 'bounds' (x0, y0, x1, y1); empty ones dropped.
+    """
+    bx0, by0, bx1, by1 = bounds
+    clipped = []
+    for (x0, y0, x1, y1) in rects:
+        x0, y0, x1, y1 = max(x0, bx0), max(y0, by0), min(x1, bx1), min(y1, by1)
+        if x0 <= x1 and y0 <= y1:
+            clipped.append((x0, y0, x1, y1))
+    return clipped
+
+
+def rect_tiles(rects):
+    """
+    Every (x, y) in the given inclusive rects, row by row.
+    """
+    for (x0, y0, x1, y1) in rects:
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                yield (x, y)
@@ -1,5 +1,5 @@
 # FileName: engine_framerate.py
-# version: 1.0
+# version: 2.1 (FrameScheduler: measured dt, frame budget, fixed logic steps, idle waits)
 # Summary: Manages timing and frame delays to maintain a target FPS.
 # Tags: engine, performance, timing
 
@@ -8,7 +8,127 @@ import time
 def manage_framerate(desired_fps=20):
     """
     Simple fixed-FPS approach using time.sleep().
-    For more advanced timing, store 'last_time' and measure dt.
+    Kept for simple loops (menus, etc.); the game loop uses FrameScheduler.
     """
     frame_time = 1.0 / desired_fps
-    time.sleep(frame_time)
\ No newline at end of file
+    time.sleep(frame_time)
+
+
+class FrameScheduler:
+    """
+    Deadline-based frame pacing with a fixed logic timestep.
+
+    Each frame:
+      1) begin_frame()  => measures the real elapsed time and banks it
+      2) logic_steps()  => how many fixed-size logic ticks to run now
+                           (capped, so a stall can't snowball into a spiral)
+      3) end_frame()    => sleeps only what is left of the frame budget
+
+    Frame deadlines advance by exactly one budget per frame, so the average
+    frame rate stays on target even when work time varies from frame to frame.
+    """
+    def __init__(self, target_fps=20, logic_hz=None, max_catchup_steps=5,
+                 clock=time.perf_counter, sleep=time.sleep):
+        self.target_fps = target_fps
+        self.frame_budget = 1.0 / target_fps
+        self.logic_step = 1.0 / (logic_hz or target_fps)
+        self.max_catchup_steps = max_catchup_steps
+        self.clock = clock
+        self.sleep = sleep
+
+        self.accumulator = 0.0
+        self.last_time = None
+        self.next_deadline = None
+        self.frame_count = 0
+        self.dt = 0.0
+
+        # Measured frames per second, refreshed about once a second
+        self.measured_fps = 0.0
+        self._fps_window_start = None
+        self._fps_window_frames = 0
+
+    def begin_frame(self):
+        """
+        Start a new frame. Returns the measured time (seconds) since the previous frame.
+        """
+        now = self.clock()
+        if self.last_time is None:
+            # First frame: run exactly one logic tick.
+            self.last_time = now
+            self.next_deadline = now
+            self._fps_window_start = now
+            self.accumulator = self.logic_step
+
+        self.dt = now - self.last_time
+        self.last_time = now
+        self.accumulator += self.dt
+
+        # Drop backlog beyond the catch-up limit (e.g. after a blocking prompt).
+        max_backlog = self.logic_step * self.max_catchup_steps
+        if self.accumulator > max_backlog:
+            self.accumulator = max_backlog
+        return self.dt
+
+    def logic_steps(self):
+        """
+        Return how many fixed logic ticks are due this frame and consume them.
+        A little slack absorbs sleep jitter, so a frame that wakes a hair early
+        still gets its tick instead of alternating between 0 and 2 ticks.
+        """
+        slack = self.logic_step * 0.2
+        steps = int((self.accumulator + slack) / self.logic_step)
+        if steps > self.max_catchup_steps:
+            steps = self.max_catchup_steps
+        self.accumulator -= steps * self.logic_step
+        return steps
+
+    def end_frame(self):
+        """
+        Sleep for whatever is left of this frame's budget.
+        """
+        self.frame_count += 1
+        self._fps_window_frames += 1
+
+        self.next_deadline += self.frame_budget
+        now = self.clock()
+        remaining = self.next_deadline - now
+        if remaining > 0:
+            self.sleep(remaining)
+        elif remaining < -self.frame_budget:
+            # More than a whole frame behind: resync instead of bursting frames.
+            self.next_deadline = now
+
+        self._update_measured_fps(self.clock())
+
+    def wait_idle(self, wait_func, timeout):
+        """
+        End the frame by blocking in wait_func(timeout) instead of sleeping a
+        fixed budget. wait_func returns early when input arrives, and returns
+        False if it cannot block at all.
+
+        Returns the number of whole logic ticks that elapsed (including the time
+        already banked this frame); the caller applies them in one go. Any
+        remainder stays banked, and frame pacing restarts from the wake-up time.
+        Returns None if wait_func could not block; call end_frame() instead.
+        """
+        if not wait_func(timeout):
+            return None
+
+        self.frame_count += 1
+        self._fps_window_frames += 1
+
+        now = self.clock()
+        banked = self.accumulator + (now - self.last_time)
+        ticks = int(banked / self.logic_step) if banked > 0 else 0
+        self.accumulator = banked - ticks * self.logic_step
+        self.last_time = now
+        self.next_deadline = now
+        self._update_measured_fps(now)
+        return ticks
+
+    def _update_measured_fps(self, now):
+        window = now - self._fps_window_start
+        if window >= 1.0:
+            self.measured_fps = self._fps_window_frames / window
+            self._fps_window_start = now
+            self._fps_window_frames = 0
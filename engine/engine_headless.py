@@ -0,0 +1,236 @@
+# FileName: engine_headless.py
+# version: 1.2 (chop runs on a map seeded with trees and rocks; harvest reported)
+# Summary: Headless IGameRenderer / IGameInput implementations and a benchmark
+#          runner that drives GameEngine with scripted actions, unpaced, and
+#          reports ticks per second and memory allocations. No terminal needed.
+# Tags: engine, headless, benchmark, performance
+
+import time
+import tracemalloc
+
+from .engine_interfaces import IGameRenderer, IGameInput
+from .engine_main import GameEngine
+
+HEADLESS_CONFIG = {
+    "visible_cols": 80,
+    "visible_rows": 24,
+    "alloc_top_sites": 5,   # how many allocation sites to list in the report
+    # Generated maps have no trees or rocks, so for the "chop" script this
+    # fraction of the map's tiles gets a tree, and as many again a rock.
+    "chop_resource_fraction": 0.05,
+}
+
+
+class HeadlessGameRenderer(IGameRenderer):
+    """
+    Renderer that draws nothing. It only counts what it was asked to draw,
+    so a run still exercises the engine's dirty-tile bookkeeping.
+    """
+    def __init__(self, visible_cols=None, visible_rows=None):
+        self.visible_cols = visible_cols or HEADLESS_CONFIG["visible_cols"]
+        self.visible_rows = visible_rows or HEADLESS_CONFIG["visible_rows"]
+        self.frames_rendered = 0
+        self.full_redraws = 0
+        self.tiles_drawn = 0
+
+    def get_visible_size(self):
+        return (self.visible_cols, self.visible_rows)
+
+    def render(self, model):
+        self.frames_rendered += 1
+        if model.full_redraw_needed or model.ui_scroll_dx or model.ui_scroll_dy:
+            self.full_redraws += 1
+            self.tiles_drawn += self.visible_cols * self.visible_rows
+        else:
+            self.tiles_drawn += len(model.dirty_tiles)
+
+
+class ScriptedGameInput(IGameInput):
+    """
+    Feeds a prepared script to the engine: one list of actions per frame.
+    When the script runs out it returns ["QUIT"].
+    """
+    def __init__(self, script):
+        self.script = script
+        self.frame = 0
+
+    def get_actions(self):
+        if self.frame >= len(self.script):
+            return ["QUIT"]
+        actions = self.script[self.frame]
+        self.frame += 1
+        return list(actions)
+
+
+# -------------------------------------------------------------------------
+# Scripts: each builder returns a list of per-frame action lists.
+# -------------------------------------------------------------------------
+_DIRECTIONS = ("MOVE_RIGHT", "MOVE_DOWN", "MOVE_LEFT", "MOVE_UP")
+
+def build_walk_script(frames, leg_length=12):
+    """
+    Walk in a widening square spiral, one step per frame.
+    """
+    script = []
+    leg = leg_length
+    direction = 0
+    while len(script) < frames:
+        for _ in range(leg):
+            script.append([_DIRECTIONS[direction]])
+        direction = (direction + 1) % 4
+        if direction % 2 == 0:
+            leg += leg_length
+    return script[:frames]
+
+
+def build_chop_script(frames):
+    """
+    Walk the spiral but interact (chop/mine) with the tile in front after every step.
+    Idle frames in between give respawns and flashes time to tick.
+    """
+    script = []
+    for step in build_walk_script(frames):
+        script.append(step)
+        script.append(["INTERACT"])
+        script.append([])
+    return script[:frames]
+
+
+def build_editor_script(frames):
+    """
+    Toggle the editor on, then place, cycle, remove and undo while walking.
+    """
+    cycle = (["PLACE_ITEM"], ["MOVE_RIGHT"], ["NEXT_ITEM"], ["PLACE_ITEM"],
+             ["MOVE_DOWN"], ["REMOVE_TOP"], ["UNDO"], ["MOVE_LEFT"], ["PLACE_ITEM"])
+    script = [["EDITOR_TOGGLE"]]
+    while len(script) < frames:
+        script.extend(list(step) for step in cycle)
+    return script[:frames]
+
+
+def build_idle_script(frames):
+    """
+    No input at all: measures the cost of an empty frame.
+    """
+    return [[] for _ in range(frames)]
+
+
+SCRIPTS = {
+    "walk":   build_walk_script,
+    "chop":   build_chop_script,
+    "editor": build_editor_script,
+    "idle":   build_idle_script,
+}
+
+
+# -------------------------------------------------------------------------
+# Runner
+# -------------------------------------------------------------------------
+def create_headless_engine(script, model, context):
+    """
+    Wire a GameEngine to a HeadlessGameRenderer and a ScriptedGameInput.
+    """
+    return GameEngine(model, context, ScriptedGameInput(script), HeadlessGameRenderer())
+
+
+def run_frames(engine):
+    """
+    Step the engine, unpaced, until the script quits. Returns frames stepped.
+    """
+    frames = 0
+    while not engine.model.should_quit:
+        engine.step()
+        frames += 1
+    return frames
+
+
+def run_headless_benchmark(script_name="walk", frames=2000, width=200, height=200,
+                           seed=0, generator_mode=None, track_allocations=True, npc_count=0):
+    """
+    Run a scripted session twice on identical maps: once untraced for timing,
+    and (if track_allocations) once under tracemalloc for memory. For the
+    "chop" script the maps get trees and rocks to harvest (scatter_resources).
+    Returns a dict of results; see format_report().
+    """
+    from map_system.mapgen.map_generator_pipeline import create_procedural_model
+
+    from .engine_batch_env import scatter_resources
+
+    script = SCRIPTS[script_name](frames)
+
+    def build_model():
+        model, context = create_procedural_model(width, height, generator_mode=generator_mode,
+                                                 seed=seed, npc_count=npc_count)
+        if script_name == "chop":
+            count = int(width * height * HEADLESS_CONFIG["chop_resource_fraction"])
+            scatter_resources(model, count, count, seed=seed)
+        return model, context
+
+    # 1) Timing pass
+    model, context = build_model()
+    engine = create_headless_engine(script, model, context)
+    start = time.perf_counter()
+    stepped = run_frames(engine)
+    elapsed = time.perf_counter() - start
+    renderer = engine.game_renderer
+
+    results = {
+        "script":          script_name,
+        "frames":          stepped,
+        "elapsed":         elapsed,
+        "ticks_per_sec":   stepped / elapsed if elapsed > 0 else 0.0,
+        "frames_rendered": renderer.frames_rendered,
+        "full_redraws":    renderer.full_redraws,
+        "tiles_drawn":     renderer.tiles_drawn,
+        "player":          (model.player.x, model.player.y),
+        "harvested":       {"wood": model.player.wood, "stone": model.player.stone},
+        "npcs":            len(model.npcs),
+        "npc_budget_hits": model.npcs.deferred,
+        "alloc":           None,
+    }
+
+    # 2) Allocation pass (tracemalloc slows everything down, so it is kept separate)
+    if track_allocations:
+        model, context = build_model()
+        engine = create_headless_engine(script, model, context)
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        run_frames(engine)
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        own_frames = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        diff = after.filter_traces(own_frames).compare_to(before.filter_traces(own_frames), "lineno")
+        grown = [d for d in diff if d.size_diff > 0]
+        results["alloc"] = {
+            "net_bytes":  sum(d.size_diff for d in diff),
+            "net_blocks": sum(d.count_diff for d in diff),
+            "peak_bytes": peak,
+            "top_sites":  [(str(d.traceback[0]), d.size_diff, d.count_diff)
+                           for d in grown[:HEADLESS_CONFIG["alloc_top_sites"]]],
+        }
+    return results
+
+
+def format_report(results):
+    """
+    Turn run_headless_benchmark() results into printable lines.
+    """
+    lines = [
+        f"script: {results['script']}",
+        f"frames: {results['frames']}  elapsed: {results['elapsed']:.3f}s",
+        f"ticks/sec: {results['ticks_per_sec']:.1f}",
+        f"rendered frames: {results['frames_rendered']}  full redraws: {results['full_redraws']}"
+        f"  tiles drawn: {results['tiles_drawn']}",
+        f"player ends at: {results['player']}",
+        f"harvested: wood={results['harvested']['wood']}  stone={results['harvested']['stone']}",
+        f"npcs: {results['npcs']}  AI budget overruns: {results['npc_budget_hits']}",
+    ]
+    alloc = results["alloc"]
+    if alloc:
+        lines.append(f"alloc net: {alloc['net_bytes'] / 1024:.1f} KiB in {alloc['net_blocks']} blocks"
+                     f"  peak: {alloc['peak_bytes'] / 1024:.1f} KiB")
+        for site, size, count in alloc["top_sites"]:
+            lines.append(f"  {size / 1024:8.1f} KiB {count:6d} blocks  {site}")
+    return lines
@@ -1,5 +1,5 @@
 # FileName: engine_interfaces.py
-# version: 1.2 (updated to add prompt_yes_no and quick_save)
+# version: 1.5 (added get_curses_window default for non-curses renderers)
 #
 # Summary: Provides abstract interfaces for game rendering & input systems.
 # Tags: interface, design
@@ -19,6 +19,13 @@ class IGameRenderer:
         """
         return (80, 25)  # fallback or placeholder
 
+    def is_animating(self):
+        """
+        Return True if the renderer has its own animation in progress and must
+        be called even when no tile is dirty. Default is False.
+        """
+        return False
+
     def prompt_yes_no(self, question: str) -> bool:
         """
         Ask the user a yes/no question. Return True if user selects yes, otherwise False.
@@ -26,6 +33,13 @@ class IGameRenderer:
         """
         return False
 
+    def get_curses_window(self):
+        """
+        Return the curses window for screens that still draw with curses
+        directly (e.g. the inventory screen), or None if there is none.
+        """
+        return None
+
     def quick_save(self, model):
         """
         Perform a 'quick save' of the current map or data, if applicable.
@@ -40,4 +54,15 @@ class IGameInput:
         Return a list of high-level action strings, e.g. ["MOVE_UP", "EDITOR_TOGGLE", "QUIT"].
         If no input is available, returns an empty list.
         """
-        return []
\ No newline at end of file
+        return []
+
+    def wait_for_input(self, timeout):
+        """
+        Block until input is available or 'timeout' seconds have passed,
+        without consuming the input (the next get_actions() call reads it).
+        Used by the engine's idle mode.
+
+        Return True if it actually waited. The default returns False, and the
+        engine falls back to normal polling at the target frame rate.
+        """
+        return False
\ No newline at end of file
@@ -1,27 +1,47 @@
 # FileName: engine_main.py
-# version: 4.0 (modernized and modularized game engine loop)
+# version: 5.4 (replays record the renderer's visible size)
 #
 # Summary:
 #   Core game loop restructured in an object‑oriented, modular style.
 #   The GameEngine class encapsulates input processing, camera updates,
 #   game logic updates, and rendering in separate methods.
-#   The run() method loops until the model signals a quit.
+#   The run() method loops until the model signals a quit, paced by a
+#   FrameScheduler instead of a fixed sleep after each frame. When nothing
+#   is happening, the loop blocks on input until the next scheduled event.
+#   With the perf HUD on ('f'), each phase is timed by a PerfStats object.
+#   step() runs one unpaced frame, for headless runs (engine_headless.py).
+#   If DEBUG_CONFIG["replay_record_path"] is set, run() records the session
+#   with a ReplayRecorder (engine_replay.py).
+#   Timed world changes are only applied inside model.active_region (viewport
+#   plus margin); other chunks catch up when they come into view or on save.
+#   With model.network_client set (engine_network.py), play actions are sent
+#   to the server instead of being applied locally.
+#   Input is polled once per frame into self.frame_actions; runs of the same
+#   move are applied as one multi-step move (controls_main.coalesce_actions).
+#   Dirty tiles are kept as per-row spans (model.dirty_tiles, a DirtyRegion):
+#   mark_dirty marks one tile, mark_dirty_rect a whole rectangle. Dirty only
+#   asks for a repaint; a full redraw marks the visible rect before render().
 #
 # Tags: engine, main, loop, modular
 
 from .engine_camera import update_camera_with_deadzone, center_camera_on_player
-from .engine_framerate import manage_framerate
-from .controls.controls_main import (
-    handle_common_actions,
-    handle_editor_actions,
-    handle_play_actions,
-)
-from .engine_respawn import handle_respawns
-from .engine_actionflash import update_action_flash
-from .engine_npc import update_npcs
-from .engine_network import handle_network
-from scenery.tile_effects import apply_tile_effects
+from .engine_framerate import FrameScheduler
+from .engine_perf import PerfStats, PERF_CONFIG
+from .controls.controls_main import handle_common_actions, coalesce_actions, dispatch_action
+from .engine_respawn import handle_respawns, ticks_until_next_respawn, settle_respawns_in_region
+from .engine_actionflash import update_action_flash, ticks_until_flash_expires
+from .engine_npc import update_npcs, adopt_scenery_npcs
+from .engine_network import handle_network, NET_ACTIONS
+from scenery.tile_effects import apply_tile_effects, PATH_ID
 from scenery.scenery_core import get_scenery_def_id_at
+import tools.debug as debug
+
+# Longest single idle block (seconds) when no event is scheduled at all.
+IDLE_MAX_WAIT = 1.0
+
+# Tiles around the viewport kept up to date with world events, so nothing
+# the camera can reach this frame shows a stale tile.
+ACTIVE_REGION_MARGIN = 8
 
 class GameEngine:
     def __init__(self, model, context, game_input, game_renderer):
@@ -33,10 +53,18 @@ class GameEngine:
         self.context = context
         self.game_input = game_input
         self.game_renderer = game_renderer
+        self.scheduler = None
+        self.frame_actions = []
+        self.perf = PerfStats(keep_rows=bool(debug.DEBUG_CONFIG["perf_csv_path"]))
 
         # Pass the context to the model.
         self.model.context = context
 
+        # NPC entities placed in the map become live NPCs (unless a server runs them).
+        self.network_client = getattr(model, "network_client", None)
+        if self.network_client is None:
+            adopt_scenery_npcs(self.model)
+
         # Center the camera on the player at startup.
         visible_cols, visible_rows = self.game_renderer.get_visible_size()
         center_camera_on_player(self.model, visible_cols, visible_rows)
@@ -45,39 +73,74 @@ class GameEngine:
         self.model.should_quit = False
         self.model.ui_scroll_dx = 0
         self.model.ui_scroll_dy = 0
+        self.model.perf_hud_lines = None
+        self.model.perf_hud_changed = False
+        self.update_active_region()
 
     def mark_dirty(self, x, y):
         """Mark a tile as dirty so it will be re-drawn."""
-        self.model.dirty_tiles.add((x, y))
+        self.model.dirty_tiles.add_span(y, x, x)
+
+    def mark_dirty_rect(self, x0, y0, x1, y1):
+        """Mark the tiles of the inclusive rect (x0, y0)-(x1, y1) as dirty."""
+        self.model.dirty_tiles.add_rect(x0, y0, x1, y1)
 
     def process_input(self):
         """
-        Poll for input actions and process them.
-        This method applies common, editor, and play controls.
+        Poll for input actions (the only poll this frame) and process them.
+        This method applies common, editor, and play controls; a run of the
+        same move is applied as one multi-step move.
+        The actions are kept in self.frame_actions for the rest of the frame.
         """
         actions = self.game_input.get_actions()
-        for act in actions:
-            # Process common actions (e.g. movement, quit)
-            did_move, want_quit = handle_common_actions(act, self.model, self.game_renderer, self.mark_dirty)
+        self.frame_actions = actions
+        if self.network_client is not None:
+            return self.process_network_input(actions)
+        model = self.model
+        for act, repeat in coalesce_actions(actions):
+            did_move, want_quit, model.full_redraw_needed = dispatch_action(
+                act, model, self.game_renderer, model.full_redraw_needed, self.mark_dirty, repeat
+            )
             if want_quit:
-                self.model.should_quit = True
+                model.should_quit = True
                 break
+        return actions
 
-            # Process editor-specific actions (if any)
-            self.model.full_redraw_needed = handle_editor_actions(
-                act, self.model, self.game_renderer, self.model.full_redraw_needed, self.mark_dirty
-            )
-
-            # Process play-specific actions (game controls)
-            self.model.full_redraw_needed = handle_play_actions(
-                act, self.model, self.game_renderer, self.model.full_redraw_needed, self.mark_dirty
-            )
+    def process_network_input(self, actions):
+        """
+        Networked play: send NET_ACTIONS to the server, which owns the world.
+        Only local UI actions (quit, debug and perf toggles) are handled here.
+        """
+        self.network_client.send_actions_threadsafe([a for a in actions if a in NET_ACTIONS])
+        for act in actions:
+            if act == "QUIT":
+                self.network_client.close()
+                self.model.should_quit = True
+                break
+            if act in ("DEBUG_TOGGLE", "PERF_TOGGLE"):
+                handle_common_actions(act, self.model, self.game_renderer, self.mark_dirty)
         return actions
 
+    def update_active_region(self):
+        """
+        Recompute model.active_region from the camera and catch up any world
+        events (respawns) that fell due there while it was off-screen.
+        """
+        model = self.model
+        visible_cols, visible_rows = self.game_renderer.get_visible_size()
+        margin = ACTIVE_REGION_MARGIN
+        model.active_region = (
+            model.camera_x - margin,
+            model.camera_y - margin,
+            model.camera_x + visible_cols + margin,
+            model.camera_y + visible_rows + margin,
+        )
+        settle_respawns_in_region(model, self.mark_dirty)
+
     def update_camera(self):
         """
         Update the camera position based on the player's position.
-        Uses a deadzone, and forces a full redraw if the movement is significant.
+        Uses a deadzone; the scroll is left in model.ui_scroll_dx/dy for the renderer.
         """
         old_cam_x, old_cam_y = self.model.camera_x, self.model.camera_y
         visible_cols, visible_rows = self.game_renderer.get_visible_size()
@@ -96,22 +159,22 @@ class GameEngine:
         dy = self.model.camera_y - old_cam_y
         self.model.ui_scroll_dx = dx
         self.model.ui_scroll_dy = dy
+        # The renderer decides between shifting the screen and a full redraw.
 
-        # Force a full redraw if the camera has jumped more than one tile.
-        if abs(dx) > 1 or abs(dy) > 1:
-            self.model.full_redraw_needed = True
+        if dx or dy:
+            self.update_active_region()
 
     def update_game_logic(self):
         """
         Update various game logic components, including network, NPC behavior,
         respawns, sliding effects, and temporary action flashes.
         """
-        handle_network(self.model)
+        handle_network(self.model, self.mark_dirty)
         update_npcs(self.model, self.mark_dirty)
         handle_respawns(self.model, self.mark_dirty)
 
         # Optional: Apply sliding effects when no input is detected.
-        if self.context.enable_sliding and not self.game_input.get_actions():
+        if self.context.enable_sliding and not self.frame_actions:
             tile_def_id = get_scenery_def_id_at(
                 self.model.player.x, self.model.player.y, self.model.placed_scenery
             )
@@ -128,25 +191,196 @@ class GameEngine:
 
         update_action_flash(self.model, self.mark_dirty)
 
+    def advance_idle_ticks(self, ticks):
+        """
+        Apply 'ticks' logic ticks that passed while the engine was idle.
+        Only timed state (respawn countdowns, action flash) can change during
+        idle, so this is applied in bulk rather than tick by tick.
+        """
+        if ticks <= 0:
+            return
+        handle_respawns(self.model, self.mark_dirty, ticks)
+        update_action_flash(self.model, self.mark_dirty, ticks)
+
+    def next_event_delay(self, actions):
+        """
+        Decide whether the engine can go idle after this frame.
+        Returns None if it must keep polling (input arrived, the player may slide,
+        NPCs or networking are active, the renderer animates), otherwise the
+        number of seconds until the next scheduled event (capped at IDLE_MAX_WAIT).
+        """
+        model = self.model
+        if actions or self.needs_render():
+            return None
+        if model.npcs and not self.context.enable_editor_commands:
+            return None
+        if getattr(model, "network_state", {}).get("connected"):
+            return None
+        if self.context.enable_sliding:
+            tile_def_id = get_scenery_def_id_at(model.player.x, model.player.y, model.placed_scenery)
+            if tile_def_id == PATH_ID:
+                return None
+
+        max_wait = IDLE_MAX_WAIT
+        if model.perf_hud_lines is not None:
+            # Wake up often enough to keep the HUD numbers current.
+            max_wait = PERF_CONFIG["hud_refresh"]
+
+        due_ticks = [t for t in (ticks_until_next_respawn(model),
+                                 ticks_until_flash_expires(model)) if t is not None]
+        if not due_ticks:
+            return max_wait
+
+        scheduler = self.scheduler
+        delay = min(due_ticks) * scheduler.logic_step - scheduler.accumulator
+        if delay <= 0:
+            return None
+        return min(delay, max_wait)
+
+    def needs_render(self):
+        """
+        Return True if anything visible changed since the last render:
+        dirty tiles, a requested full redraw, a camera scroll, or a renderer
+        that is still animating on its own.
+        """
+        model = self.model
+        return bool(
+            model.full_redraw_needed
+            or model.dirty_tiles
+            or model.ui_scroll_dx
+            or model.ui_scroll_dy
+            or model.perf_hud_changed
+            or self.game_renderer.is_animating()
+        )
+
     def render(self):
         """
-        Render the current game state. After drawing, clear the set of dirty tiles.
+        Render the current game state. After drawing, clear the set of dirty tiles
+        and the per-frame redraw/scroll flags. A full redraw marks the whole
+        view dirty, so the renderer compares every visible tile.
         """
-        self.game_renderer.render(self.model)
+        model = self.model
+        if model.full_redraw_needed:
+            cols, rows = self.game_renderer.get_visible_size()
+            self.mark_dirty_rect(model.camera_x, model.camera_y,
+                                 model.camera_x + cols - 1, model.camera_y + rows - 1)
+        self.game_renderer.render(model)
         self.model.dirty_tiles.clear()
+        self.model.full_redraw_needed = False
+        self.model.ui_scroll_dx = 0
+        self.model.ui_scroll_dy = 0
+        self.model.perf_hud_changed = False
+
+    def update_perf_hud(self, perf):
+        """
+        Show, hide or refresh the perf HUD text on the model.
+        'perf' is the PerfStats object if the HUD is on this frame, else None.
+        """
+        model = self.model
+        if perf is None:
+            if model.perf_hud_lines is not None:
+                model.perf_hud_lines = None
+                model.full_redraw_needed = True
+            return
+        if perf.end_frame(self.scheduler.measured_fps) or model.perf_hud_lines is None:
+            model.perf_hud_lines = perf.hud_lines or perf.build_hud_lines()
+            model.perf_hud_changed = True
+
+    def step(self, logic_ticks=1):
+        """
+        Run one frame without any pacing: input, camera, 'logic_ticks' logic
+        ticks, and a render if something changed. Returns the frame's actions.
+        Used for headless runs and benchmarks.
+        """
+        actions = self.process_input()
+        if self.model.should_quit:
+            return actions
+        self.update_camera()
+        for _ in range(logic_ticks):
+            self.update_game_logic()
+        if self.needs_render():
+            self.render()
+        return actions
 
     def run(self, target_fps=20):
         """
         Run the main game loop until the model signals to quit.
-        This loop processes input, updates the camera and game logic,
-        renders the scene, and maintains the target framerate.
+        Each frame processes input and the camera once, runs however many
+        fixed-timestep logic ticks are due (with a catch-up limit), renders
+        only if something changed, then sleeps out the rest of the frame budget.
+
+        If nothing is going on, the frame instead ends by blocking on input
+        until the next scheduled event (respawn, flash expiry) is due.
+
+        While the perf HUD is on, every phase is timed; if
+        DEBUG_CONFIG["perf_csv_path"] is set, the timings are written there on exit.
+        If DEBUG_CONFIG["replay_record_path"] is set, the session is recorded
+        (actions and tick counts per frame) and saved there on exit.
         """
+        self.scheduler = FrameScheduler(target_fps=target_fps)
+        scheduler = self.scheduler
+
+        recorder = None
+        record_path = debug.DEBUG_CONFIG["replay_record_path"]
+        if record_path:
+            from .engine_replay import ReplayRecorder
+            recorder = ReplayRecorder(self.model, target_fps=target_fps,
+                                      visible_size=self.game_renderer.get_visible_size())
+            recorder.start()
+            # A wall-clock AI budget would make NPC behaviour timing dependent.
+            self.model.npcs.budget_ms = None
+
         while not self.model.should_quit:
-            self.process_input()
+            # The HUD flag is read once per frame; with it off, the only cost
+            # below is a None check per phase.
+            perf = self.perf if debug.DEBUG_CONFIG["perf_hud"] else None
+
+            scheduler.begin_frame()
+            if perf:
+                perf.start_frame()
+            actions = self.process_input()
+            if self.model.should_quit:
+                if recorder:
+                    recorder.record_frame(actions, 0)
+                break
+            if perf:
+                perf.lap("input")
             self.update_camera()
-            self.update_game_logic()
-            self.render()
-            manage_framerate(target_fps)
+            if perf:
+                perf.lap("camera")
+            steps = scheduler.logic_steps()
+            for _ in range(steps):
+                self.update_game_logic()
+            if perf:
+                perf.lap("logic")
+            if self.needs_render():
+                if perf:
+                    perf.count_render(
+                        len(self.model.dirty_tiles),
+                        self.model.full_redraw_needed or self.model.ui_scroll_dx or self.model.ui_scroll_dy,
+                    )
+                self.render()
+            if perf:
+                perf.lap("render")
+            self.update_perf_hud(perf)
+
+            idle_ticks = None
+            idle_delay = self.next_event_delay(actions)
+            if idle_delay is not None:
+                idle_ticks = scheduler.wait_idle(self.game_input.wait_for_input, idle_delay)
+
+            if idle_ticks is None:
+                scheduler.end_frame()
+            else:
+                self.advance_idle_ticks(idle_ticks)
+            if recorder:
+                recorder.record_frame(actions, steps, idle_ticks or 0)
+
+        if recorder:
+            recorder.save(record_path)
+        csv_path = debug.DEBUG_CONFIG["perf_csv_path"]
+        if csv_path and self.perf.rows:
+            self.perf.write_csv(csv_path)
 
 def run_game_loop(model, context, game_input, game_renderer):
     """
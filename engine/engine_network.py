@@ -1,16 +1,654 @@
 # FileName: engine_network.py
-# version: 1.0
-# Summary: Provides stubs or logic for multiplayer or network-driven interactions, sending/receiving game state.
+# version: 2.3 (server's scenery listener is weak and registered in start())
+# Summary: Multiplayer over TCP with asyncio. GameServer owns the GameModel and
+#          runs the world at a fixed tick rate; clients only send action strings.
+#          Each tick the server sends every client just what changed near it
+#          (scenery mutations, entity moves, its own player state), batched in one
+#          compact message and kept under a per-client bandwidth budget.
+#          NetworkClient mirrors that state into a local GameModel for rendering.
 # Tags: engine, network, multiplayer
 
-def handle_network(model):
+import asyncio
+import json
+import queue
+import struct
+import threading
+import time
+import weakref
+import zlib
+
+from scenery.scenery_core import (
+    SceneryObject, append_scenery, get_objects_at, get_scenery_def_id_at,
+    add_scenery_listener, remove_scenery_listener,
+)
+from scenery.scenery_manager import ALL_SCENERY_DEFS
+from scenery.tile_effects import apply_tile_effects
+from .controls.controls_common import handle_common_actions
+from .controls.controls_play import handle_play_actions
+from .engine_npc import update_npcs, is_npc_def
+from .engine_respawn import handle_respawns
+from .engine_actionflash import update_action_flash
+
+NET_CONFIG = {
+    "host":              "127.0.0.1",
+    "port":              7777,
+    "tick_rate":         20,      # server logic ticks per second
+    "view_radius":       32,      # tiles around a player that its client is kept in sync with
+    "budget_bytes_sec":  16384,   # per-client downstream budget (after compression)
+    "max_inputs_tick":   4,       # actions applied per client per tick; the rest wait
+    "compress_min":      256,     # compress messages at least this long
+    "max_write_buffer":  65536,   # skip a slow client's update while its socket is backed up
+}
+
+# Actions a client may send. Everything else (editor, saving, debug) stays local.
+NET_ACTIONS = ("MOVE_UP", "MOVE_DOWN", "MOVE_LEFT", "MOVE_RIGHT", "INTERACT")
+
+REMOTE_PLAYER_ID = "RemotePlayer"
+
+# Entity kinds in move/remove records.
+ENTITY_NPC = 0
+ENTITY_PLAYER = 1
+
+# -------------------------------------------------------------------------
+# Wire format: 4-byte big-endian length, then a body that is either
+# b"J" + compact JSON or b"Z" + zlib(compact JSON).
+# -------------------------------------------------------------------------
+_HEADER = struct.Struct(">I")
+
+def encode_message(msg):
+    raw = json.dumps(msg, separators=(",", ":")).encode("utf-8")
+    if len(raw) >= NET_CONFIG["compress_min"]:
+        body = b"Z" + zlib.compress(raw, 6)
+    else:
+        body = b"J" + raw
+    return _HEADER.pack(len(body)) + body
+
+def decode_body(body):
+    raw = zlib.decompress(body[1:]) if body[:1] == b"Z" else body[1:]
+    return json.loads(raw.decode("utf-8"))
+
+async def read_message(reader):
+    """
+    Return (message, wire_bytes), or (None, 0) once the connection is closed.
+    """
+    try:
+        header = await reader.readexactly(_HEADER.size)
+        body = await reader.readexactly(_HEADER.unpack(header)[0])
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None, 0
+    return decode_body(body), _HEADER.size + len(body)
+
+
+def _def_table():
+    """
+    Definition ids by index; tiles are sent as index lists.
+    Both ends build it from the same ALL_SCENERY_DEFS, and the server also
+    sends it in the welcome, so the client never has to guess.
+    """
+    return sorted(ALL_SCENERY_DEFS)
+
+def _static_stack(placed_scenery, x, y):
+    """
+    Definition ids on a tile, bottom to top, without NPCs (those travel as entity moves).
+    """
+    return [o.definition_id for o in get_objects_at(placed_scenery, x, y)
+            if not is_npc_def(o.definition_id)]
+
+def _newly_visible(old_view, view):
+    """
+    Yield the tiles of 'view' that are not in 'old_view' (both inclusive rectangles).
+    Swapping the arguments gives the tiles that just left the view.
+    """
+    x0, y0, x1, y1 = view
+    for y in range(y0, y1 + 1):
+        if old_view is None or not (old_view[1] <= y <= old_view[3]):
+            for x in range(x0, x1 + 1):
+                yield (x, y)
+            continue
+        for x in range(x0, min(x1, old_view[0] - 1) + 1):
+            yield (x, y)
+        for x in range(max(x0, old_view[2] + 1), x1 + 1):
+            yield (x, y)
+
+def _nearest_first(tiles, cx, cy, limit, radius):
     """
-    If you later want to add online or local co-op, 
-    you'd handle sending/receiving data here each frame.
+    Up to 'limit' members of the set 'tiles', walking square rings outward
+    from (cx, cy). Costs about as much as the area walked, not len(tiles).
+    """
+    found = [(cx, cy)] if (cx, cy) in tiles else []
+    for r in range(1, radius + 1):
+        if len(found) >= limit:
+            break
+        for x in range(cx - r, cx + r + 1):
+            if (x, cy - r) in tiles:
+                found.append((x, cy - r))
+            if (x, cy + r) in tiles:
+                found.append((x, cy + r))
+        for y in range(cy - r + 1, cy + r):
+            if (cx - r, y) in tiles:
+                found.append((cx - r, y))
+            if (cx + r, y) in tiles:
+                found.append((cx + r, y))
+    return found[:limit]
+
+
+# =========================================================================
+# Server
+# =========================================================================
+class ClientSession:
+    """
+    Server-side state of one connected client.
+    """
+    def __init__(self, session_id, name, player, writer):
+        self.id = session_id
+        self.name = name
+        self.player = player
+        self.writer = writer
+        self.inbox = []                   # action strings not applied yet
+        self.view = None                  # (x0, y0, x1, y1) the client is in sync with
+        self.owed_tiles = set()           # tiles the client still needs (deferred by the budget)
+        self.known_entities = {}          # (kind, key) -> (x, y)
+        self.last_self = None
+        self.allowance = 0.0              # token bucket, bytes
+        self.bytes_per_tile = 4.0         # recent compressed cost of one tile
+        self.bytes_sent = 0
+        self.messages_sent = 0
+        self.tiles_deferred = 0           # tile-ticks the budget held back
+
+    def in_view(self, x, y):
+        v = self.view
+        return v is not None and v[0] <= x <= v[2] and v[1] <= y <= v[3]
+
+
+class GameServer:
+    """
+    Authoritative asyncio game server.
+
+      await start()        => listen on (host, port)
+      await run(seconds)   => tick at tick_rate until stop() (or for 'seconds')
+      stop()
+
+    Per tick: apply queued client actions (each against its own Player),
+    run NPCs, respawns and flashes, then send each client one batched delta.
+    """
+    def __init__(self, model, context, host=None, port=None, tick_rate=None):
+        self.model = model
+        self.context = context
+        self.host = host or NET_CONFIG["host"]
+        self.port = NET_CONFIG["port"] if port is None else port
+        self.tick_rate = tick_rate or NET_CONFIG["tick_rate"]
+        self.model.context = context
+
+        self.spawn = (model.player.x, model.player.y)
+        self.defs = _def_table()
+        self.def_index = {d: i for i, d in enumerate(self.defs)}
+        self.sessions = {}
+        self.tick = 0
+        self.changed_tiles = set()
+        self.tick_times = []
+        self.stats = {"bytes_sent": 0, "messages_sent": 0, "tiles_deferred": 0}
+        self._next_id = 1
+        self._server = None
+        self._running = False
+        self._listener = None
+
+    def _on_scenery_change(self, placed_scenery, obj):
+        if placed_scenery is self.model.placed_scenery and not is_npc_def(obj.definition_id):
+            self.changed_tiles.add((obj.x, obj.y))
+
+    def _mark_dirty(self, x, y):
+        # No screen on the server; scenery changes are picked up by the listener.
+        pass
+
+    def _listen(self):
+        """
+        Watch scenery changes while the server runs. Holds only a weak
+        reference, so a server that is dropped without close() doesn't stay
+        alive (and keep its model) through the listener.
+        """
+        ref = weakref.WeakMethod(self._on_scenery_change)
+        def listener(placed_scenery, obj):
+            method = ref()
+            if method is None:
+                remove_scenery_listener(listener)
+            else:
+                method(placed_scenery, obj)
+        add_scenery_listener(listener)
+        self._listener = listener
+
+    async def start(self):
+        from .engine_npc import adopt_scenery_npcs
+        adopt_scenery_npcs(self.model)
+        if self._listener is None:
+            self._listen()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    def stop(self):
+        self._running = False
+
+    async def close(self):
+        self._running = False
+        if self._listener is not None:
+            remove_scenery_listener(self._listener)
+            self._listener = None
+        for session in list(self.sessions.values()):
+            session.writer.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle_client(self, reader, writer):
+        from players.player_char import Player
+
+        hello, _ = await read_message(reader)
+        if not isinstance(hello, dict) or hello.get("t") != "hello":
+            writer.close()
+            return
+        session_id = self._next_id
+        self._next_id += 1
+        player = Player(x=self.spawn[0], y=self.spawn[1], name=str(hello.get("name", "player"))[:16])
+        session = ClientSession(session_id, player.name, player, writer)
+        self.sessions[session_id] = session
+
+        writer.write(encode_message({
+            "t": "welcome", "id": session_id, "defs": self.defs,
+            "w": getattr(self.model, "world_width", None),
+            "h": getattr(self.model, "world_height", None),
+            "rate": self.tick_rate, "tick": self.tick,
+            "p": [player.x, player.y],
+        }))
+        try:
+            while True:
+                msg, _ = await read_message(reader)
+                if msg is None:
+                    break
+                actions = msg.get("a") if isinstance(msg, dict) else None
+                if isinstance(actions, list):
+                    session.inbox.extend(a for a in actions if a in NET_ACTIONS)
+        finally:
+            self.sessions.pop(session_id, None)
+            writer.close()
+
+    # ------------------------------------------------------------------
+    # One server tick
+    # ------------------------------------------------------------------
+    def run_tick(self):
+        model = self.model
+        mark = self._mark_dirty
+        host_player = model.player
+        radius = NET_CONFIG["view_radius"]
+        sessions = list(self.sessions.values())
+
+        # The active region covers every client's view, so world events and
+        # nearby NPCs stay live wherever somebody is looking.
+        if sessions:
+            xs = [s.player.x for s in sessions]
+            ys = [s.player.y for s in sessions]
+            model.active_region = (min(xs) - radius, min(ys) - radius,
+                                   max(xs) + radius, max(ys) + radius)
+        else:
+            model.active_region = (0, 0, -1, -1)
+
+        # 1) Client inputs, each applied as that client's player.
+        idle_players = []
+        try:
+            for session in sessions:
+                model.player = session.player
+                todo = session.inbox[:NET_CONFIG["max_inputs_tick"]]
+                del session.inbox[:len(todo)]
+                for act in todo:
+                    handle_common_actions(act, model, None, mark)
+                    handle_play_actions(act, model, None, False, mark)
+                if not todo:
+                    idle_players.append(session.player)
+
+            # 2) World simulation
+            update_npcs(model, mark)
+            handle_respawns(model, mark)
+            if self.context.enable_sliding:
+                for player in idle_players:
+                    model.player = player
+                    tile_def_id = get_scenery_def_id_at(player.x, player.y, model.placed_scenery)
+                    apply_tile_effects(player, tile_def_id, model.placed_scenery, is_editor=False)
+            update_action_flash(model, mark)
+        finally:
+            model.player = host_player
+
+        # 3) One delta per client. Settle every view first, so a respawn fired
+        # for one client's view still reaches the others in this tick's deltas.
+        for session in sessions:
+            px, py = session.player.x, session.player.y
+            model.world_events.settle_region(px - radius, py - radius, px + radius, py + radius,
+                                             model, mark)
+        for session in sessions:
+            self._send_delta(session, radius)
+        self.changed_tiles.clear()
+        self.tick += 1
+
+    def _send_delta(self, session, radius):
+        model = self.model
+        player = session.player
+        px, py = player.x, player.y
+        old_view = session.view
+        session.view = (px - radius, py - radius, px + radius, py + radius)
+
+        # Tiles owed: changed ones in view, newly visible ones, and earlier deferrals.
+        owed = session.owed_tiles
+        if old_view != session.view:
+            if old_view is not None:
+                owed.difference_update(_newly_visible(session.view, old_view))
+            owed.update(_newly_visible(old_view, session.view))
+        owed.update(t for t in self.changed_tiles if session.in_view(*t))
+
+        # Entity moves: NPCs from the spatial hash, plus the other players.
+        current = {}
+        npcs = model.npcs
+        for slot in npcs.npcs_near(px, py, radius):
+            current[(ENTITY_NPC, slot)] = (npcs.xs[slot], npcs.ys[slot])
+        for other in self.sessions.values():
+            if other is not session and session.in_view(other.player.x, other.player.y):
+                current[(ENTITY_PLAYER, other.id)] = (other.player.x, other.player.y)
+        known = session.known_entities
+        moves = [[k[0], k[1], pos[0], pos[1]] for k, pos in current.items() if known.get(k) != pos]
+        removes = [[k[0], k[1]] for k in known if k not in current]
+
+        self_state = [px, py, player.hp, player.gold, player.wood, player.stone,
+                      player.last_move_direction]
+        msg = {"k": self.tick}
+        if moves:
+            msg["m"] = moves
+        if removes:
+            msg["r"] = removes
+        if self_state != session.last_self:
+            msg["s"] = self_state
+
+        # Bandwidth: a token bucket refilled every tick. Tiles go nearest
+        # first; whatever doesn't fit stays owed for the next ticks.
+        per_tick = NET_CONFIG["budget_bytes_sec"] / float(self.tick_rate)
+        session.allowance = min(session.allowance + per_tick, per_tick * 4)
+        tiles = []
+        if owed:
+            # Only encode about as many tiles as the allowance can take,
+            # judging by how well recent tiles compressed.
+            room = max(1, int(session.allowance / session.bytes_per_tile * 1.25))
+            if room < len(owed):
+                ordered = _nearest_first(owed, px, py, room, radius)
+            else:
+                ordered = sorted(owed, key=lambda t: (max(abs(t[0] - px), abs(t[1] - py)), t))
+            index = self.def_index
+            placed = model.placed_scenery
+            tiles = [[x, y] + [index[d] for d in _static_stack(placed, x, y)] for (x, y) in ordered]
+            data = encode_message(dict(msg, t=tiles))
+            while tiles and len(data) > session.allowance:
+                keep = int(len(tiles) * session.allowance / len(data) * 0.9)
+                tiles = tiles[:keep] if keep < len(tiles) else tiles[:-1]
+                data = encode_message(dict(msg, t=tiles))
+            if tiles:
+                session.bytes_per_tile = max(0.5, len(data) / float(len(tiles)))
+            session.tiles_deferred += len(owed) - len(tiles)
+            self.stats["tiles_deferred"] += len(owed) - len(tiles)
+        if tiles:
+            msg["t"] = tiles
+        elif len(msg) == 1:
+            return  # nothing for this client this tick
+        data = encode_message(msg)
+
+        transport = session.writer.transport
+        if transport.is_closing() or transport.get_write_buffer_size() > NET_CONFIG["max_write_buffer"]:
+            return  # try again next tick; nothing above was marked as delivered
+
+        session.writer.write(data)
+        session.allowance -= len(data)
+        session.bytes_sent += len(data)
+        session.messages_sent += 1
+        self.stats["bytes_sent"] += len(data)
+        self.stats["messages_sent"] += 1
+        for tile in msg.get("t", ()):
+            owed.discard((tile[0], tile[1]))
+        for k in [k for k in known if k not in current]:
+            del known[k]
+        known.update(current)
+        session.last_self = self_state
+
+    async def run(self, seconds=None):
+        """
+        Tick at tick_rate until stop() is called (or 'seconds' have passed).
+        """
+        self._running = True
+        interval = 1.0 / self.tick_rate
+        start = time.perf_counter()
+        deadline = start
+        while self._running:
+            if seconds is not None and time.perf_counter() - start >= seconds:
+                break
+            t0 = time.perf_counter()
+            self.run_tick()
+            self.tick_times.append(time.perf_counter() - t0)
+            deadline += interval
+            await asyncio.sleep(max(0.0, deadline - time.perf_counter()))
+
+
+# =========================================================================
+# Client
+# =========================================================================
+class NetworkClient:
+    """
+    Connects to a GameServer and mirrors what it sends into a local model.
+
+    Async use (bots, tests):  await connect(host, port); run read_loop() as a
+    task; await send_actions([...]); apply_updates(model, mark_dirty_func).
+    Game use: start_in_background(host, port) runs the same code on its own
+    thread; the GameEngine forwards NET_ACTIONS through send_actions_threadsafe
+    and handle_network() applies updates each logic tick.
+    """
+    def __init__(self, name="player"):
+        self.name = name
+        self.reader = None
+        self.writer = None
+        self.welcome = None
+        self.defs = None
+        self.incoming = queue.SimpleQueue()
+        self.connected = False
+        self.bytes_received = 0
+        self.messages_received = 0
+        self.last_tick = None
+        self.entity_objs = {}     # (kind, key) -> SceneryObject in the mirror scenery
+        self._loop = None
+        self._thread = None
+
+    async def connect(self, host=None, port=None):
+        self.reader, self.writer = await asyncio.open_connection(
+            host or NET_CONFIG["host"], NET_CONFIG["port"] if port is None else port)
+        self.writer.write(encode_message({"t": "hello", "name": self.name}))
+        self.welcome, _ = await read_message(self.reader)
+        if not self.welcome or self.welcome.get("t") != "welcome":
+            raise ConnectionError("server did not send a welcome")
+        self.defs = self.welcome["defs"]
+        self.connected = True
+        return self.welcome
+
+    async def read_loop(self):
+        while True:
+            msg, size = await read_message(self.reader)
+            if msg is None:
+                break
+            self.bytes_received += size
+            self.messages_received += 1
+            self.incoming.put(msg)
+        self.connected = False
+
+    async def send_actions(self, actions):
+        actions = [a for a in actions if a in NET_ACTIONS]
+        if actions and self.writer is not None:
+            self.writer.write(encode_message({"a": actions}))
+            await self.writer.drain()
+
+    def close(self):
+        self.connected = False
+        loop, self._loop = self._loop, None
+        if loop is not None:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(loop.stop)
+        elif self.writer is not None:
+            self.writer.close()
+
+    # ------------------------------------------------------------------
+    # Background-thread mode for the regular game loop
+    # ------------------------------------------------------------------
+    def start_in_background(self, host=None, port=None, timeout=5.0):
+        """
+        Connect on a private event loop thread; returns once welcomed.
+        """
+        ready = threading.Event()
+        errors = []
+
+        def runner():
+            loop = asyncio.new_event_loop()
+            self._loop = loop
+            try:
+                loop.run_until_complete(self.connect(host, port))
+            except Exception as e:
+                errors.append(e)
+                ready.set()
+                loop.close()
+                return
+            ready.set()
+            loop.create_task(self.read_loop())
+            loop.run_forever()
+            if self.writer is not None:
+                self.writer.close()
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+
+        self._thread = threading.Thread(target=runner, name="net-client", daemon=True)
+        self._thread.start()
+        if not ready.wait(timeout):
+            raise ConnectionError("timed out connecting to server")
+        if errors:
+            raise errors[0]
+        return self.welcome
+
+    def send_actions_threadsafe(self, actions):
+        if self._loop is not None and self.connected:
+            asyncio.run_coroutine_threadsafe(self.send_actions(list(actions)), self._loop)
+
+    # ------------------------------------------------------------------
+    # Mirror model
+    # ------------------------------------------------------------------
+    def build_model(self, host=None, port=None):
+        """
+        Return (model, context) mirroring the server. The world, respawns and
+        NPCs are all server-driven, so those features are off locally.
+        """
+        from core.model_main import GameModel, GameContext
+        from players.player_char import Player
+
+        welcome = self.welcome
+        model = GameModel()
+        context = GameContext("play")
+        context.enable_sliding = False
+        context.enable_respawn = False
+        model.context = context
+        model.player = Player(x=welcome["p"][0], y=welcome["p"][1], name=self.name)
+        model.world_width = welcome["w"]
+        model.world_height = welcome["h"]
+        model.network_client = self
+        model.network_state = {"connected": True, "host": host, "port": port}
+        model.map_source = {"type": "network", "host": host, "port": port}
+        return model, context
+
+    def apply_updates(self, model, mark_dirty_func):
+        """
+        Apply every message received so far to the mirror model.
+        Returns how many deltas were applied.
+        """
+        applied = 0
+        while True:
+            try:
+                msg = self.incoming.get_nowait()
+            except queue.Empty:
+                break
+            self._apply_delta(model, msg, mark_dirty_func)
+            applied += 1
+        if not self.connected:
+            model.network_state["connected"] = False
+        return applied
+
+    def _apply_delta(self, model, msg, mark_dirty_func):
+        defs = self.defs
+        placed = model.placed_scenery
+        self.last_tick = msg.get("k", self.last_tick)
+
+        for tile in msg.get("t", ()):
+            x, y = tile[0], tile[1]
+            old = placed.get((x, y))
+            keep = [o for o in (get_objects_at(placed, x, y) if old else ())
+                    if o.definition_id == REMOTE_PLAYER_ID or is_npc_def(o.definition_id)]
+            placed[(x, y)] = {"floor": None, "_prev_floor": None}
+            for idx in tile[2:]:
+                append_scenery(placed, SceneryObject(x, y, defs[idx]))
+            for obj in keep:
+                append_scenery(placed, obj)
+            # The tile dict was replaced, not edited through append_scenery.
+            model.tile_stacks.invalidate(((x, y),))
+            mark_dirty_func(x, y)
+
+        for kind, key in msg.get("r", ()):
+            obj = self.entity_objs.pop((kind, key), None)
+            if obj is not None:
+                self._remove_entity(model, obj, mark_dirty_func)
+
+        for kind, key, x, y in msg.get("m", ()):
+            obj = self.entity_objs.get((kind, key))
+            if obj is not None:
+                self._remove_entity(model, obj, mark_dirty_func)
+            else:
+                def_id = "Villager" if kind == ENTITY_NPC else REMOTE_PLAYER_ID
+                obj = self.entity_objs[(kind, key)] = SceneryObject(x, y, def_id)
+            obj.x, obj.y = x, y
+            append_scenery(placed, obj)
+            mark_dirty_func(x, y)
+
+        state = msg.get("s")
+        if state:
+            player = model.player
+            if (player.x, player.y) != (state[0], state[1]):
+                mark_dirty_func(player.x, player.y)
+                mark_dirty_func(state[0], state[1])
+            (player.x, player.y, player.hp, player.gold,
+             player.wood, player.stone, player.last_move_direction) = state
+
+    @staticmethod
+    def _remove_entity(model, obj, mark_dirty_func):
+        tile = model.placed_scenery.get((obj.x, obj.y))
+        if tile and obj in tile.get("entities", ()):
+            tile["entities"].remove(obj)
+            model.tile_stacks.invalidate(((obj.x, obj.y),))
+        mark_dirty_func(obj.x, obj.y)
+
+
+def connect_to_server(host=None, port=None, name="player"):
+    """
+    Connect in the background and return (model, context) for run_game_loop.
+    """
+    client = NetworkClient(name=name)
+    client.start_in_background(host, port)
+    return client.build_model(host, port)
+
+
+def handle_network(model, mark_dirty_func=None):
+    """
+    Once per logic tick: apply whatever the server sent since the last tick.
+    Does nothing for a local (offline) game.
     """
     if not hasattr(model, 'network_state'):
         model.network_state = {'connected': False, 'host': None, 'port': None}
-    
-    # e.g. if model.network_state['connected']:
-    #     # read incoming packets, update positions
-    #     pass
+
+    client = getattr(model, "network_client", None)
+    if client is not None:
+        client.apply_updates(model, mark_dirty_func or (lambda x, y: None))
@@ -1,16 +1,251 @@
 # FileName: engine_npc.py
-# version: 1.0
+# version: 2.0 (NpcStore: compact arrays, spatial hash, time-sliced round-robin AI)
 # Summary: Updates non-player characters, handling their AI states, movement, and any interactions with the world.
 # Tags: engine, npc, ai
 
-def update_npcs(model, mark_dirty_func):
+import heapq
+import random
+import time
+from array import array
+
+from scenery.scenery_core import append_scenery, remove_scenery, is_blocked
+from scenery.scenery_manager import ALL_SCENERY_DEFS
+
+NPC_CONFIG = {
+    "think_ticks":      4,     # NPCs in the active region act every N logic ticks
+    "far_think_ticks":  32,    # NPCs outside it act this rarely
+    "ai_budget_ms":     4.0,   # AI time per update; None => no limit (deterministic)
+    "hash_cell":        16,    # spatial hash cell size in tiles
+    "idle_chance":      0.5,   # chance a wandering NPC stays put when it acts
+}
+
+_WANDER_STEPS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+def is_npc_def(def_id):
+    return bool(ALL_SCENERY_DEFS.get(def_id, {}).get("npc", False))
+
+
+class NpcStore:
+    """
+    Compact NPC storage. Each NPC is a slot index into parallel arrays; the
+    SceneryObject that draws it lives in the tile's "entities" layer.
+
+      - xs / ys / gens   : int arrays, one entry per slot
+      - objs             : SceneryObject per slot (None for a free slot)
+      - cells            : spatial hash, (cell_x, cell_y) -> set of slots
+      - occupied         : (x, y) -> slot, for O(1) collision checks
+      - think_queue      : min-heap of [due_tick, slot, gen]; an NPC is only
+                           touched on the ticks it is due to act
+
+    'gens' is bumped when a slot is freed, so stale heap entries are ignored.
+    """
+    def __init__(self):
+        self.xs = array("i")
+        self.ys = array("i")
+        self.gens = array("i")
+        self.objs = []
+        self.free = []
+        self.slot_of = {}        # id(SceneryObject) -> slot
+        self.cells = {}
+        self.occupied = {}
+        self.think_queue = []
+        self.tick = 0
+        self.count = 0
+
+        self.budget_ms = NPC_CONFIG["ai_budget_ms"]
+        self.clock = time.perf_counter
+        self.deferred = 0        # updates that ran out of budget with NPCs still due
+
+    def __len__(self):
+        return self.count
+
+    def _cell(self, x, y):
+        size = NPC_CONFIG["hash_cell"]
+        return (x // size, y // size)
+
+    def add(self, obj):
+        """
+        Track SceneryObject 'obj' (already placed in the scenery) as an NPC.
+        Returns its slot.
+        """
+        if id(obj) in self.slot_of:
+            return self.slot_of[id(obj)]
+        if self.free:
+            slot = self.free.pop()
+            self.xs[slot] = obj.x
+            self.ys[slot] = obj.y
+            self.objs[slot] = obj
+        else:
+            slot = len(self.objs)
+            self.xs.append(obj.x)
+            self.ys.append(obj.y)
+            self.gens.append(0)
+            self.objs.append(obj)
+        self.slot_of[id(obj)] = slot
+        self.cells.setdefault(self._cell(obj.x, obj.y), set()).add(slot)
+        self.occupied[(obj.x, obj.y)] = slot
+        self.count += 1
+        # Spread first thinks over the interval so NPCs don't all act on one tick.
+        first = self.tick + 1 + slot % NPC_CONFIG["think_ticks"]
+        heapq.heappush(self.think_queue, [first, slot, self.gens[slot]])
+        return slot
+
+    def remove(self, obj):
+        slot = self.slot_of.pop(id(obj), None)
+        if slot is None:
+            return
+        x, y = self.xs[slot], self.ys[slot]
+        cell = self.cells.get(self._cell(x, y))
+        if cell is not None:
+            cell.discard(slot)
+            if not cell:
+                del self.cells[self._cell(x, y)]
+        if self.occupied.get((x, y)) == slot:
+            del self.occupied[(x, y)]
+        self.objs[slot] = None
+        self.gens[slot] += 1
+        self.free.append(slot)
+        self.count -= 1
+
+    def slot_at(self, x, y):
+        return self.occupied.get((x, y))
+
+    def move(self, slot, nx, ny):
+        x, y = self.xs[slot], self.ys[slot]
+        old_cell = self._cell(x, y)
+        new_cell = self._cell(nx, ny)
+        if old_cell != new_cell:
+            cell = self.cells[old_cell]
+            cell.discard(slot)
+            if not cell:
+                del self.cells[old_cell]
+            self.cells.setdefault(new_cell, set()).add(slot)
+        del self.occupied[(x, y)]
+        self.occupied[(nx, ny)] = slot
+        self.xs[slot] = nx
+        self.ys[slot] = ny
+
+    def npcs_near(self, x, y, radius):
+        """
+        Yield the slots of NPCs within 'radius' tiles (Chebyshev distance) of (x, y).
+        Only the spatial hash cells overlapping that square are visited.
+        """
+        cx0, cy0 = self._cell(x - radius, y - radius)
+        cx1, cy1 = self._cell(x + radius, y + radius)
+        xs, ys = self.xs, self.ys
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                for slot in self.cells.get((cx, cy), ()):
+                    if abs(xs[slot] - x) <= radius and abs(ys[slot] - y) <= radius:
+                        yield slot
+
+
+def adopt_scenery_npcs(model):
     """
-    If you have AI or NPC creatures, you'd loop through them and do pathfinding, 
-    movement, or dialogue logic here.
+    Register every NPC entity already in the scenery (e.g. loaded from a map
+    or placed by the generator) with model.npcs.
+    """
+    store = model.npcs
+    for tile_dict in model.placed_scenery.values():
+        for obj in tile_dict.get("entities", ()):
+            if is_npc_def(obj.definition_id):
+                store.add(obj)
+
+
+def track_npc_object(model, obj):
     """
-    if not hasattr(model, 'npcs'):
-        model.npcs = []
-    # for npc in model.npcs:
-    #     npc.update_ai(...)
-    #     mark_dirty_func(npc.old_x, npc.old_y)
-    #     mark_dirty_func(npc.x, npc.y)
+    Call after placing a SceneryObject; registers it if it is an NPC.
+    """
+    if is_npc_def(obj.definition_id):
+        model.npcs.add(obj)
+
+
+def untrack_npc_object(model, obj):
+    """
+    Call after removing a SceneryObject; forgets it if it was an NPC.
+    """
+    if is_npc_def(obj.definition_id):
+        model.npcs.remove(obj)
+
+
+def _in_region(region, x, y):
+    return region[0] <= x <= region[2] and region[1] <= y <= region[3]
+
+
+def _wander(model, store, slot, mark_dirty_func):
+    """
+    Default AI: sometimes stay, otherwise try one random step onto a free tile.
+    """
+    if random.random() < NPC_CONFIG["idle_chance"]:
+        return
+    dx, dy = random.choice(_WANDER_STEPS)
+    x, y = store.xs[slot], store.ys[slot]
+    nx, ny = x + dx, y + dy
+
+    if not (0 <= nx < model.world_width and 0 <= ny < model.world_height):
+        return
+    if (nx, ny) in store.occupied or (nx, ny) == (model.player.x, model.player.y):
+        return
+    # Apply any lazy world events there first, so the NPC sees the same tile
+    # it would have seen with eager simulation.
+    model.world_events.settle_at(nx, ny, model, mark_dirty_func)
+    if is_blocked(nx, ny, model.placed_scenery):
+        return
+
+    obj = store.objs[slot]
+    remove_scenery(model.placed_scenery, obj)
+    obj.x, obj.y = nx, ny
+    append_scenery(model.placed_scenery, obj)
+    store.move(slot, nx, ny)
+
+    region = model.active_region
+    if _in_region(region, x, y):
+        mark_dirty_func(x, y)
+    if _in_region(region, nx, ny):
+        mark_dirty_func(nx, ny)
+
+
+def update_npcs(model, mark_dirty_func, ticks=1):
+    """
+    Advance the NPC clock and let every NPC that is due act, in due order,
+    until the AI time budget runs out. NPCs left over stay at the front of
+    the queue for the next update, so work is spread round-robin across frames.
+    NPCs outside model.active_region act every far_think_ticks instead of
+    every think_ticks.
+    """
+    store = model.npcs
+    if not store or model.context.enable_editor_commands:
+        return
+
+    store.tick += ticks
+    now = store.tick
+    queue = store.think_queue
+    gens = store.gens
+    region = model.active_region
+    near_ticks = NPC_CONFIG["think_ticks"]
+    far_ticks = NPC_CONFIG["far_think_ticks"]
+
+    deadline = None
+    if store.budget_ms is not None:
+        deadline = store.clock() + store.budget_ms / 1000.0
+
+    done = 0
+    while queue and queue[0][0] <= now:
+        # Check the clock every few NPCs rather than every one.
+        if deadline is not None and done & 15 == 15 and store.clock() > deadline:
+            store.deferred += 1
+            break
+        entry = heapq.heappop(queue)
+        slot = entry[1]
+        if entry[2] != gens[slot]:
+            continue  # slot was freed (and maybe reused) since this was queued
+
+        _wander(model, store, slot, mark_dirty_func)
+        done += 1
+
+        if _in_region(region, store.xs[slot], store.ys[slot]):
+            entry[0] = now + near_ticks
+        else:
+            entry[0] = now + far_ticks
+        heapq.heappush(queue, entry)
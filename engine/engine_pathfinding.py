@@ -0,0 +1,287 @@
+# FileName: engine_pathfinding.py
+# version: 1.1 (no world-bounds blocking, as in player movement)
+# Summary: Pathfinding service for NPCs and click-to-move: A* over a cached
+#          passability view of the scenery grid, plus cached flow fields
+#          (distance maps) toward shared targets such as the player, so many
+#          chasers share one search. Caches are invalidated tile-locally when
+#          append_scenery/remove_scenery change whether a tile blocks.
+# Tags: engine, pathfinding, ai, cache, performance
+
+import heapq
+import weakref
+from array import array
+from collections import OrderedDict, deque
+
+from scenery.scenery_core import get_objects_at, add_scenery_listener, remove_scenery_listener
+from scenery.scenery_manager import ALL_SCENERY_DEFS
+from .engine_world_events import chunk_of
+from .engine_npc import is_npc_def
+
+PATH_CONFIG = {
+    "max_search_nodes": 20000,   # A* gives up after expanding this many tiles
+    "flow_radius":      48,      # a flow field covers target +/- radius tiles
+    "flow_cache_size":  8,       # flow fields kept; least recently used is dropped
+}
+
+# 4-way movement, same as the player. Fixed order keeps results deterministic.
+_STEPS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+
+class FlowField:
+    """
+    Step distances to one target over the square target +/- radius.
+    dist[(y - y0) * w + (x - x0)] is -1 where the target can't be reached.
+    """
+    __slots__ = ("target", "x0", "y0", "x1", "y1", "w", "dist")
+
+    def __init__(self, target, x0, y0, x1, y1):
+        self.target = target
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        self.w = x1 - x0 + 1
+        self.dist = array("i", [-1]) * (self.w * (y1 - y0 + 1))
+
+    def contains(self, x, y):
+        return self.x0 <= x <= self.x1 and self.y0 <= y <= self.y1
+
+    def distance_at(self, x, y):
+        """
+        Steps from (x, y) to the target, or None if unreachable / outside the field.
+        """
+        if not self.contains(x, y):
+            return None
+        d = self.dist[(y - self.y0) * self.w + (x - self.x0)]
+        return d if d >= 0 else None
+
+    def next_step(self, x, y):
+        """
+        The neighbour of (x, y) closest to the target, or None if no neighbour
+        gets closer (already there, or unreachable).
+        """
+        here = self.distance_at(x, y)
+        best = None
+        best_d = here
+        for (dx, dy) in _STEPS:
+            d = self.distance_at(x + dx, y + dy)
+            if d is not None and (best_d is None or d < best_d):
+                best, best_d = (x + dx, y + dy), d
+        return best
+
+
+class PathService:
+    """
+    Per-model pathfinding (model.paths).
+
+      is_passable(x, y)                       => cached static passability
+      find_path(start, goal, mark_dirty_func) => [(x, y), ...] up to goal, or None
+      flow_field(target, mark_dirty_func)     => shared FlowField toward target
+      step_toward(x, y, target, ...)          => next tile toward target, or None
+
+    Passability follows is_blocked (the topmost object's "blocking"), except
+    that NPC entities are ignored: they move every few ticks, so callers check
+    model.npcs.occupied for them instead of invalidating paths.
+
+    With a mark_dirty_func, searches first settle lazy world events in the
+    chunks they touch, so they see the same tiles as eager simulation.
+    """
+    def __init__(self, model):
+        self.model = model
+        self._scenery = None
+        self._blocked = {}               # (x, y) -> bool
+        self._fields = OrderedDict()     # target -> FlowField, LRU order
+        self.stats = {"searches": 0, "flow_built": 0, "flow_hits": 0, "invalidated": 0}
+        self._listening = False
+
+    def _listen(self):
+        """
+        Start watching scenery changes; done on first use, so models that
+        never path (map loading, network mirrors) add no per-change cost.
+        Holds only a weak reference, so the listener doesn't keep old models alive.
+        """
+        ref = weakref.WeakMethod(self._on_scenery_change)
+        def listener(placed_scenery, obj):
+            method = ref()
+            if method is None:
+                remove_scenery_listener(listener)
+            else:
+                method(placed_scenery, obj)
+        add_scenery_listener(listener)
+        self._listening = True
+
+    # ------------------------------------------------------------------
+    # Passability cache
+    # ------------------------------------------------------------------
+    def _sync(self):
+        if not self._listening:
+            self._listen()
+        # A new map replaces model.placed_scenery wholesale; start over.
+        if self.model.placed_scenery is not self._scenery:
+            self._scenery = self.model.placed_scenery
+            self._blocked.clear()
+            self._fields.clear()
+
+    def _compute_blocked(self, x, y):
+        """
+        The player's movement rule (scenery_core.is_blocked): the top object
+        decides, and the map has no edge. NPCs are skipped, since they move.
+        """
+        for obj in reversed(get_objects_at(self._scenery, x, y)):
+            if is_npc_def(obj.definition_id):
+                continue
+            return bool(ALL_SCENERY_DEFS.get(obj.definition_id, {}).get("blocking", False))
+        return False
+
+    def is_passable(self, x, y):
+        self._sync()
+        blocked = self._blocked.get((x, y))
+        if blocked is None:
+            blocked = self._blocked[(x, y)] = self._compute_blocked(x, y)
+        return not blocked
+
+    def _on_scenery_change(self, placed_scenery, obj):
+        if placed_scenery is not self._scenery or is_npc_def(obj.definition_id):
+            return
+        key = (obj.x, obj.y)
+        old = self._blocked.pop(key, None)
+        if old is None:
+            return  # never looked at, so nothing cached depends on it
+        if self._compute_blocked(obj.x, obj.y) != old:
+            self.invalidate_tile(obj.x, obj.y)
+
+    def invalidate_tile(self, x, y):
+        """
+        Drop cached data that depends on tile (x, y): its passability and
+        every flow field covering it. Fields elsewhere are kept.
+        """
+        self._blocked.pop((x, y), None)
+        for target in [t for (t, f) in self._fields.items() if f.contains(x, y)]:
+            del self._fields[target]
+            self.stats["invalidated"] += 1
+
+    def _settler(self, mark_dirty_func):
+        """
+        Return settle(x, y) that applies due world events for each chunk once.
+        """
+        if mark_dirty_func is None:
+            return None
+        model = self.model
+        seen = set()
+        def settle(x, y):
+            chunk = chunk_of(x, y)
+            if chunk not in seen:
+                seen.add(chunk)
+                model.world_events.settle_at(x, y, model, mark_dirty_func)
+        return settle
+
+    # ------------------------------------------------------------------
+    # A*
+    # ------------------------------------------------------------------
+    def find_path(self, start, goal, mark_dirty_func=None, max_nodes=None):
+        """
+        A* from start to goal (4-way, unit cost, Manhattan heuristic).
+        Returns the tiles to walk, excluding start and ending at goal ([] if
+        start == goal), or None if there is no path within max_nodes expansions.
+        The goal itself may be blocked (e.g. a tree to walk up to and chop).
+        """
+        self._sync()
+        if start == goal:
+            return []
+        if max_nodes is None:
+            max_nodes = PATH_CONFIG["max_search_nodes"]
+        self.stats["searches"] += 1
+        settle = self._settler(mark_dirty_func)
+        passable = self.is_passable
+        gx, gy = goal
+
+        came_from = {start: None}
+        cost = {start: 0}
+        order = 0
+        open_heap = [(abs(start[0] - gx) + abs(start[1] - gy), order, start)]
+        expanded = 0
+
+        while open_heap:
+            _, _, current = heapq.heappop(open_heap)
+            if current == goal:
+                path = []
+                while current != start:
+                    path.append(current)
+                    current = came_from[current]
+                path.reverse()
+                return path
+            expanded += 1
+            if expanded > max_nodes:
+                break
+            cx, cy = current
+            next_cost = cost[current] + 1
+            for (dx, dy) in _STEPS:
+                nxt = (cx + dx, cy + dy)
+                if next_cost >= cost.get(nxt, next_cost + 1):
+                    continue
+                if nxt != goal:
+                    if settle is not None:
+                        settle(*nxt)
+                    if not passable(*nxt):
+                        continue
+                cost[nxt] = next_cost
+                came_from[nxt] = current
+                order += 1
+                h = abs(nxt[0] - gx) + abs(nxt[1] - gy)
+                heapq.heappush(open_heap, (next_cost + h, order, nxt))
+        return None
+
+    # ------------------------------------------------------------------
+    # Flow fields
+    # ------------------------------------------------------------------
+    def flow_field(self, target, mark_dirty_func=None):
+        """
+        Return the FlowField toward 'target', building it (a BFS over
+        target +/- flow_radius) only if it isn't cached.
+        """
+        self._sync()
+        field = self._fields.get(target)
+        if field is not None:
+            self._fields.move_to_end(target)
+            self.stats["flow_hits"] += 1
+            return field
+
+        radius = PATH_CONFIG["flow_radius"]
+        tx, ty = target
+        x0, y0, x1, y1 = tx - radius, ty - radius, tx + radius, ty + radius
+        if mark_dirty_func is not None:
+            self.model.world_events.settle_region(x0, y0, x1, y1, self.model, mark_dirty_func)
+        self._sync()
+
+        field = FlowField(target, x0, y0, x1, y1)
+        dist, w = field.dist, field.w
+        passable = self.is_passable
+        dist[(ty - y0) * w + (tx - x0)] = 0
+        queue = deque([target])
+        while queue:
+            cx, cy = queue.popleft()
+            next_d = dist[(cy - y0) * w + (cx - x0)] + 1
+            for (dx, dy) in _STEPS:
+                nx, ny = cx + dx, cy + dy
+                if not (x0 <= nx <= x1 and y0 <= ny <= y1):
+                    continue
+                i = (ny - y0) * w + (nx - x0)
+                if dist[i] >= 0 or not passable(nx, ny):
+                    continue
+                dist[i] = next_d
+                queue.append((nx, ny))
+
+        self.stats["flow_built"] += 1
+        self._fields[target] = field
+        if len(self._fields) > PATH_CONFIG["flow_cache_size"]:
+            self._fields.popitem(last=False)
+        return field
+
+    def step_toward(self, x, y, target, mark_dirty_func=None):
+        """
+        Next tile from (x, y) toward 'target' using the shared flow field,
+        falling back to A* when (x, y) lies outside the field.
+        Returns None if already there or no route exists.
+        """
+        field = self.flow_field(target, mark_dirty_func)
+        if field.contains(x, y):
+            return field.next_step(x, y)
+        path = self.find_path((x, y), target, mark_dirty_func)
+        return path[0] if path else None
@@ -0,0 +1,150 @@
+# FileName: engine_perf.py
+# version: 1.0
+# Summary: Per-phase frame timing for the game loop (input, camera, logic, render).
+#          Keeps rolling min / mean / p99 per phase, counts dirty tiles and full
+#          redraws per second, builds the HUD text and can dump a CSV on exit.
+# Tags: engine, performance, debug
+
+import time
+from collections import deque
+
+PERF_PHASES = ("input", "camera", "logic", "render")
+
+PERF_CONFIG = {
+    "window_frames":  240,   # rolling window for min / mean / p99
+    "hud_refresh":    0.5,   # seconds between HUD text rebuilds
+}
+
+
+class PerfStats:
+    """
+    Collects frame timings. The engine only touches this object while the
+    perf HUD is enabled, so a disabled HUD costs one flag check per phase.
+
+    Per frame:
+      1) start_frame()                 => remember the frame start time
+      2) lap(phase) after each phase   => record time since the previous lap
+      3) count_render(dirty, full)     => dirty tiles / full redraw of this frame
+      4) end_frame(fps)                => roll the counters, refresh HUD text
+    """
+    def __init__(self, window_frames=None, clock=time.perf_counter, keep_rows=False):
+        if window_frames is None:
+            window_frames = PERF_CONFIG["window_frames"]
+        self.clock = clock
+        self.samples = {phase: deque(maxlen=window_frames) for phase in PERF_PHASES}
+        self.frame_times = {}
+        self._lap_start = 0.0
+
+        # Per-second counters
+        self._dirty_this_frame = 0
+        self._full_this_frame = 0
+        self._window_start = None
+        self._window_dirty = 0
+        self._window_full = 0
+        self.dirty_per_sec = 0.0
+        self.full_per_sec = 0.0
+
+        # HUD text, rebuilt every PERF_CONFIG["hud_refresh"] seconds
+        self.hud_lines = []
+        self._last_hud = None
+
+        # Optional per-frame rows for the CSV dump
+        self.keep_rows = keep_rows
+        self.rows = []
+        self.frame_index = 0
+
+    def start_frame(self):
+        self.frame_times = {}
+        self._dirty_this_frame = 0
+        self._full_this_frame = 0
+        self._lap_start = self.clock()
+
+    def lap(self, phase):
+        """
+        Record the time since the previous lap (or frame start) under 'phase'.
+        """
+        now = self.clock()
+        elapsed = now - self._lap_start
+        self._lap_start = now
+        self.frame_times[phase] = elapsed
+        self.samples[phase].append(elapsed)
+
+    def count_render(self, dirty_count, full_redraw):
+        self._dirty_this_frame = dirty_count
+        self._full_this_frame = 1 if full_redraw else 0
+
+    def end_frame(self, measured_fps=0.0):
+        """
+        Finish the frame. Returns True if the HUD text was rebuilt this frame.
+        """
+        now = self.clock()
+        if self._window_start is None:
+            self._window_start = now
+            self._last_hud = now - PERF_CONFIG["hud_refresh"]
+
+        self._window_dirty += self._dirty_this_frame
+        self._window_full += self._full_this_frame
+        window = now - self._window_start
+        if window >= 1.0:
+            self.dirty_per_sec = self._window_dirty / window
+            self.full_per_sec = self._window_full / window
+            self._window_start = now
+            self._window_dirty = 0
+            self._window_full = 0
+
+        if self.keep_rows:
+            self.rows.append((
+                self.frame_index,
+                *[self.frame_times.get(phase, 0.0) for phase in PERF_PHASES],
+                self._dirty_this_frame,
+                self._full_this_frame,
+            ))
+        self.frame_index += 1
+
+        if now - self._last_hud >= PERF_CONFIG["hud_refresh"]:
+            self._last_hud = now
+            self.hud_lines = self.build_hud_lines(measured_fps)
+            return True
+        return False
+
+    def phase_summary(self, phase):
+        """
+        Return (min, mean, p99) in seconds for the rolling window of 'phase',
+        or None if no samples were taken yet.
+        """
+        values = self.samples[phase]
+        if not values:
+            return None
+        ordered = sorted(values)
+        p99 = ordered[int(0.99 * (len(ordered) - 1))]
+        return (ordered[0], sum(ordered) / len(ordered), p99)
+
+    def build_hud_lines(self, measured_fps=0.0):
+        """
+        Return the HUD as a list of equal-width strings (times in ms).
+        """
+        lines = ["phase    min   mean    p99 ms"]
+        for phase in PERF_PHASES:
+            summary = self.phase_summary(phase)
+            if summary is None:
+                lines.append(f"{phase:<6}     -      -      -")
+            else:
+                lo, mean, p99 = (v * 1000.0 for v in summary)
+                lines.append(f"{phase:<6} {lo:6.2f} {mean:6.2f} {p99:6.2f}")
+        lines.append(f"fps {measured_fps:5.1f}  dirty/s {self.dirty_per_sec:6.0f}")
+        lines.append(f"full redraws/s {self.full_per_sec:5.1f}")
+        width = max(len(line) for line in lines)
+        return [line.ljust(width) for line in lines]
+
+    def write_csv(self, path):
+        """
+        Write the per-frame rows collected while keep_rows was on.
+        Times are in milliseconds.
+        """
+        import csv
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", *[f"{p}_ms" for p in PERF_PHASES], "dirty_tiles", "full_redraw"])
+            for row in self.rows:
+                frame, *times, dirty, full = row
+                writer.writerow([frame, *[f"{t * 1000.0:.3f}" for t in times], dirty, full])
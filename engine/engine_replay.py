@@ -0,0 +1,333 @@
+# FileName: engine_replay.py
+# version: 1.2 (viewport size recorded and used for playback)
+# Summary: Records a play session (per-frame actions, logic ticks, timestamps,
+#          map source and RNG seed) into a compact replay file, and plays it back
+#          deterministically, at recorded speed or as fast as possible, producing
+#          a timing report that can be compared across builds.
+# Tags: engine, replay, benchmark, performance
+
+import gzip
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+
+from .engine_interfaces import IGameInput
+import tools.debug as debug
+
+REPLAY_VERSION = 1
+
+# -------------------------------------------------------------------------
+# File format (JSON, optionally gzipped when the name ends in ".gz"):
+#
+#   {"version": 1,
+#    "header": {map_source, mode_name, player, debug_enabled, rng_seed,
+#               target_fps, visible_size, frames, duration_ms},
+#    "action_names": ["MOVE_UP", ...],
+#    "events": [[frame, t_ms, ticks, idle_ticks, [action_index, ...]], ...]}
+#
+# visible_size is the renderer's [cols, rows] when recording started: the
+# camera (and with it the active region NPCs and world events run in)
+# follows it, so playback has to use the same size. Older files lack it.
+#
+# Only frames that differ from the default (no actions, 1 logic tick, no idle
+# ticks) are stored, so a long session is mostly a frame count.
+# -------------------------------------------------------------------------
+
+
+def _open_replay(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def load_replay(path):
+    """
+    Read a replay file and return its dict. Raises ValueError for unknown versions.
+    """
+    with _open_replay(path, "r") as f:
+        replay = json.load(f)
+    if replay.get("version") != REPLAY_VERSION:
+        raise ValueError(f"Unsupported replay version: {replay.get('version')}")
+    return replay
+
+
+def save_replay(path, replay):
+    dir_name = os.path.dirname(path)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
+    with _open_replay(path, "w") as f:
+        json.dump(replay, f, separators=(",", ":"))
+
+
+class ReplayRecorder:
+    """
+    Collects one session. The engine calls start() before its first frame and
+    record_frame() at the end of every frame; to_dict() / save() produce the file.
+    """
+    def __init__(self, model, target_fps=20, rng_seed=None, visible_size=None,
+                 clock=time.perf_counter):
+        if rng_seed is None:
+            rng_seed = random.getrandbits(32)
+        self.clock = clock
+        self.start_time = None
+        self.frame = 0
+        self.action_names = []
+        self._action_index = {}
+        self.events = []
+
+        player = model.player
+        self.header = {
+            "map_source": model.map_source,
+            "mode_name": model.context.mode_name,
+            "player": {
+                "x": player.x, "y": player.y,
+                "hp": player.hp, "gold": player.gold,
+                "wood": player.wood, "stone": player.stone,
+                "last_move_direction": player.last_move_direction,
+            },
+            "debug_enabled": debug.DEBUG_CONFIG["enabled"],
+            "rng_seed": rng_seed,
+            "target_fps": target_fps,
+            "visible_size": list(visible_size) if visible_size else None,
+            "frames": 0,
+            "duration_ms": 0,
+        }
+
+    def start(self):
+        """
+        Seed the global RNG and start the clock. Call right before the first frame.
+        """
+        random.seed(self.header["rng_seed"])
+        self.start_time = self.clock()
+
+    def record_frame(self, actions, ticks, idle_ticks=0):
+        t_ms = int((self.clock() - self.start_time) * 1000)
+        if actions or ticks != 1 or idle_ticks:
+            indexes = []
+            for act in actions:
+                idx = self._action_index.get(act)
+                if idx is None:
+                    idx = len(self.action_names)
+                    self._action_index[act] = idx
+                    self.action_names.append(act)
+                indexes.append(idx)
+            self.events.append([self.frame, t_ms, ticks, idle_ticks, indexes])
+        self.frame += 1
+        self.header["frames"] = self.frame
+        self.header["duration_ms"] = t_ms
+
+    def to_dict(self):
+        return {
+            "version": REPLAY_VERSION,
+            "header": self.header,
+            "action_names": self.action_names,
+            "events": self.events,
+        }
+
+    def save(self, path):
+        save_replay(path, self.to_dict())
+
+
+class ReplayGameInput(IGameInput):
+    """
+    Feeds a recorded session back, one frame per get_actions() call.
+    upcoming_ticks() tells the runner how many logic / idle ticks the next
+    frame had when it was recorded. Returns ["QUIT"] once the replay is over.
+    """
+    def __init__(self, replay):
+        self.names = replay["action_names"]
+        self.events = replay["events"]
+        self.total_frames = replay["header"]["frames"]
+        self.frame_budget_ms = 1000.0 / replay["header"]["target_fps"]
+        self.frame = 0
+        self._next_event = 0
+        self._last_t_ms = 0
+
+    def finished(self):
+        return self.frame >= self.total_frames
+
+    def _event_for_frame(self):
+        if self._next_event < len(self.events) and self.events[self._next_event][0] == self.frame:
+            return self.events[self._next_event]
+        return None
+
+    def upcoming_ticks(self):
+        """
+        Return (logic_ticks, idle_ticks) of the next frame.
+        """
+        event = self._event_for_frame()
+        if event is None:
+            return (1, 0)
+        return (event[2], event[3])
+
+    def upcoming_time_ms(self):
+        """
+        Recorded time of the next frame. Frames without an event are assumed to
+        follow the previous one at the target frame rate, up to the next event.
+        """
+        event = self._event_for_frame()
+        if event is not None:
+            return event[1]
+        t_ms = self._last_t_ms + self.frame_budget_ms
+        if self._next_event < len(self.events):
+            t_ms = min(t_ms, self.events[self._next_event][1])
+        return t_ms
+
+    def get_actions(self):
+        if self.finished():
+            return ["QUIT"]
+        self._last_t_ms = self.upcoming_time_ms()
+        event = self._event_for_frame()
+        self.frame += 1
+        if event is None:
+            return []
+        self._next_event += 1
+        return [self.names[i] for i in event[4]]
+
+
+# -------------------------------------------------------------------------
+# Playback
+# -------------------------------------------------------------------------
+def build_replay_model(replay):
+    """
+    Rebuild the model and context a replay was recorded on, with the player's
+    recorded starting state. Returns (model, context), or (None, None) if the
+    map cannot be rebuilt (e.g. the map file is gone).
+    """
+    from map_system.map_model_builder import build_model_common
+    from map_system.mapgen.map_generator_pipeline import create_procedural_model
+
+    header = replay["header"]
+    source = header["map_source"]
+    mode_name = header["mode_name"]
+    if not source:
+        return None, None
+
+    if source["type"] == "generated":
+        model, context = create_procedural_model(
+            source["width"], source["height"], mode_name=mode_name,
+            generator_mode=source["generator_mode"], seed=source["seed"],
+            npc_count=source.get("npc_count", 0),
+        )
+    else:
+        model, context = build_model_common(source["filename"], source["is_generated"], mode_name)
+    if model is None:
+        return None, None
+
+    for key, value in header["player"].items():
+        setattr(model.player, key, value)
+    return model, context
+
+
+def _build_label():
+    """
+    Short description of the build being measured: git revision (if any) and Python version.
+    """
+    revision = "unknown"
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, timeout=2, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if out.returncode == 0:
+            revision = out.stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return {"revision": revision, "python": platform.python_version()}
+
+
+def run_replay(replay, realtime=False, game_renderer=None):
+    """
+    Play 'replay' back through a GameEngine and return a timing report dict.
+
+    realtime=False => frames run back to back (throughput benchmark)
+    realtime=True  => each frame waits for its recorded timestamp
+    game_renderer  => defaults to a headless renderer of the recorded
+                      visible size; a given renderer must have that size
+
+    Debug mode is set as it was when recording, and restored afterwards.
+    Raises ValueError if the map can't be rebuilt or the renderer's visible
+    size differs from the recorded one (the replay would diverge).
+    """
+    from .engine_main import GameEngine
+    from .engine_headless import HeadlessGameRenderer
+
+    model, context = build_replay_model(replay)
+    if model is None:
+        raise ValueError("Cannot rebuild the replay's map")
+    visible_size = replay["header"].get("visible_size")
+    if game_renderer is None:
+        game_renderer = HeadlessGameRenderer(*(visible_size or ()))
+    elif visible_size and list(game_renderer.get_visible_size()) != list(visible_size):
+        raise ValueError("Replay was recorded with a %dx%d view, the renderer shows %dx%d"
+                         % (tuple(visible_size) + tuple(game_renderer.get_visible_size())))
+
+    replay_input = ReplayGameInput(replay)
+    engine = GameEngine(model, context, replay_input, game_renderer)
+    model.npcs.budget_ms = None  # recordings are made without an AI time budget
+    caller_debug = debug.DEBUG_CONFIG["enabled"]
+    if caller_debug != replay["header"]["debug_enabled"]:
+        debug.toggle_debug()
+    random.seed(replay["header"]["rng_seed"])
+
+    clock = time.perf_counter
+    frame_times = []
+    start = clock()
+    try:
+        while not model.should_quit:
+            if realtime:
+                wait = start + replay_input.upcoming_time_ms() / 1000.0 - clock()
+                if wait > 0:
+                    time.sleep(wait)
+            ticks, idle_ticks = replay_input.upcoming_ticks()
+            frame_start = clock()
+            engine.step(ticks)
+            engine.advance_idle_ticks(idle_ticks)
+            frame_times.append(clock() - frame_start)
+    finally:
+        # The replay may also have toggled it (DEBUG_TOGGLE); put back the caller's.
+        if debug.DEBUG_CONFIG["enabled"] != caller_debug:
+            debug.toggle_debug()
+    elapsed = clock() - start
+
+    ordered = sorted(frame_times) or [0.0]
+    return {
+        "build": _build_label(),
+        "realtime": realtime,
+        "frames": len(frame_times),
+        "elapsed": elapsed,
+        "frames_per_sec": len(frame_times) / elapsed if elapsed > 0 else 0.0,
+        "frame_ms": {
+            "min": ordered[0] * 1000.0,
+            "mean": sum(ordered) / len(ordered) * 1000.0,
+            "p99": ordered[int(0.99 * (len(ordered) - 1))] * 1000.0,
+            "max": ordered[-1] * 1000.0,
+        },
+        # Same session => same end state on every build; a mismatch means the
+        # replay diverged and the timings are not comparable.
+        "end_state": {
+            "player": [model.player.x, model.player.y],
+            "wood": model.player.wood,
+            "stone": model.player.stone,
+            "tiles": len(model.placed_scenery),
+            "pending_respawns": len(model.world_events),
+        },
+    }
+
+
+def format_replay_report(report):
+    """
+    Turn run_replay() results into printable lines.
+    """
+    ms = report["frame_ms"]
+    build = report["build"]
+    return [
+        f"build: {build['revision']} (python {build['python']})"
+        f"  mode: {'realtime' if report['realtime'] else 'fast'}",
+        f"frames: {report['frames']}  elapsed: {report['elapsed']:.3f}s"
+        f"  frames/sec: {report['frames_per_sec']:.1f}",
+        f"frame ms: min {ms['min']:.3f}  mean {ms['mean']:.3f}"
+        f"  p99 {ms['p99']:.3f}  max {ms['max']:.3f}",
+        f"end state: {report['end_state']}",
+    ]
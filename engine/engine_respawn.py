@@ -1,30 +1,69 @@
 # FileName: engine_respawn.py
-# version: 1.2
+# version: 2.1 (respawns live in the per-chunk world event store, applied lazily)
 # Summary: Tracks and respawns resources (trees, rocks) after a set countdown.
 # Tags: engine, respawn, resources, scenery
 
 from scenery.scenery_core import SceneryObject, append_scenery
+from .engine_timers import register_timer_kind
 
-def handle_respawns(model, mark_dirty_func):
+# Logic ticks between chopping/mining something and it growing back.
+RESPAWN_TICKS = 50
+
+
+def _respawn_objects(model, mark_dirty_func, objects):
+    """
+    Event handler: re-create the objects [(x, y, definition_id), ...].
     """
-    If context.enable_respawn is true, decrement countdowns and respawn.
-    We expect each entry in model.respawn_list to look like:
-      { "countdown": N, "objects": [ (x, y, definition_id), ... ] }
+    for (sx, sy, def_id) in objects:
+        new_obj = SceneryObject(sx, sy, def_id)
+        append_scenery(model.placed_scenery, new_obj)
+        mark_dirty_func(sx, sy)
 
-    Once countdown <= 0, we re-create those objects.
+register_timer_kind("respawn", _respawn_objects)
+
+
+def schedule_respawn(model, objects, delay=RESPAWN_TICKS):
+    """
+    Respawn 'objects' [(x, y, definition_id), ...] after 'delay' ticks of
+    respawn time. Returns the event id (for cancel()).
+    """
+    tiles = [(sx, sy) for (sx, sy, _) in objects]
+    return model.world_events.schedule(delay, "respawn", objects, tiles)
+
+
+def handle_respawns(model, mark_dirty_func, ticks=1):
+    """
+    If context.enable_respawn is true, advance the world clock by 'ticks' and
+    apply whatever is due inside model.active_region. Chunks outside it catch
+    up when they are next settled. The clock is paused while respawning is
+    disabled (editor mode).
     """
     if not model.context.enable_respawn:
         return
+    model.world_events.advance(ticks)
+    model.world_events.settle_region(*model.active_region, model, mark_dirty_func)
+
 
-    # Make a copy of the list so we can remove entries safely
-    for r in model.respawn_list[:]:
-        r["countdown"] -= 1
-        if r["countdown"] <= 0:
-            # Time to respawn these objects
-            for (sx, sy, def_id) in r["objects"]:
-                new_obj = SceneryObject(sx, sy, def_id)
-                append_scenery(model.placed_scenery, new_obj)
-                mark_dirty_func(sx, sy)
-
-            # remove from the list
-            model.respawn_list.remove(r)
\ No newline at end of file
+def settle_respawns_in_region(model, mark_dirty_func):
+    """
+    Catch up the chunks in model.active_region (e.g. after the camera moved).
+    """
+    model.world_events.settle_region(*model.active_region, model, mark_dirty_func)
+
+
+def settle_all_respawns(model, mark_dirty_func):
+    """
+    Catch up the whole world, e.g. before the map is saved.
+    """
+    model.world_events.settle_all(model, mark_dirty_func)
+
+
+def ticks_until_next_respawn(model):
+    """
+    Return how many logic ticks until the next respawn inside the active
+    region, or None if nothing is pending there (or respawning is disabled).
+    Off-screen respawns never need to wake the engine.
+    """
+    if not model.context.enable_respawn:
+        return None
+    return model.world_events.ticks_until_next(*model.active_region)
@@ -0,0 +1,549 @@
+# FileName: engine_sessions.py
+# version: 1.3 (close() hangs up on clients and waits for their handlers)
+# Summary: Multi-session host: many independent game sessions (one map and one
+#          player each) in one process, ticked cooperatively under asyncio.
+#          Sessions load their map from saved_maps on first input, sleep between
+#          scheduled events, and are evicted to a snapshot on disk when idle or
+#          when too many are resident. Loads and evictions run on a worker
+#          thread so they don't stall the tick. Includes a benchmark that
+#          reports memory per session and tick latency, optionally sharded
+#          across a process pool.
+# Tags: engine, server, sessions, asyncio, performance
+
+import asyncio
+import gzip
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .engine_interfaces import IGameInput
+from .engine_framerate import FrameScheduler
+from .engine_headless import HeadlessGameRenderer
+from .engine_main import GameEngine
+from .engine_network import NET_ACTIONS, encode_message, read_message
+
+SESSION_CONFIG = {
+    "tick_rate":          20,
+    "max_resident":       128,     # sessions kept in memory; least recently active go first
+    "idle_evict_seconds": 30.0,    # evict a session after this long without input
+    "yield_every":        16,      # sessions stepped between event-loop yields
+    "map_cache_size":     8,       # parsed map files kept in memory
+    # Evicted session snapshots; not under the working directory, so runs
+    # from the repo leave nothing behind.
+    "evict_dir":          os.path.join(tempfile.gettempdir(), "retrorpg_sessions"),
+}
+
+SNAPSHOT_VERSION = 1
+
+# Session ids name the snapshot files, and network clients choose them.
+SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+# Session states
+COLD = "cold"            # never loaded; map comes from saved_maps
+LOADING = "loading"
+RESIDENT = "resident"
+EVICTING = "evicting"
+EVICTED = "evicted"      # state lives in a snapshot file
+
+# -------------------------------------------------------------------------
+# Parsed map files, shared by every session on the same map (read-only).
+# -------------------------------------------------------------------------
+_MAP_CACHE = OrderedDict()
+
+def load_map_data(map_name):
+    from map_system.map_list_logic import MAPS_DIR
+
+    raw = _MAP_CACHE.get(map_name)
+    if raw is None:
+        with open(os.path.join(MAPS_DIR, map_name), "r") as f:
+            raw = json.load(f)
+        _MAP_CACHE[map_name] = raw
+        if len(_MAP_CACHE) > SESSION_CONFIG["map_cache_size"]:
+            _MAP_CACHE.popitem(last=False)
+    else:
+        _MAP_CACHE.move_to_end(map_name)
+    return raw
+
+
+class QueuedGameInput(IGameInput):
+    """
+    Input fed by the host: actions submitted for a session since its last step.
+    """
+    def __init__(self):
+        self.pending = []
+
+    def get_actions(self):
+        actions, self.pending = self.pending, []
+        return actions
+
+
+class GameSession:
+    """
+    One independent game: a map, a player and a headless GameEngine.
+    Only RESIDENT sessions hold a model; the others are a map name or a snapshot.
+    """
+    def __init__(self, session_id, map_name):
+        self.id = session_id
+        self.map_name = map_name
+        self.state = COLD
+        self.engine = None
+        self.inbox = []              # [(submit_time, action), ...]
+        self.last_active = 0.0
+        self.last_tick = None        # host tick of the last step
+        self.wake_tick = 0           # next host tick that needs a step without input
+        self.snapshot_path = None
+        self.steps = 0
+        self.writer = None           # TCP client, if the session was opened over the network
+        self.last_sent = None
+
+    # ------------------------------------------------------------------
+    # Loading and eviction (run on the host's worker thread)
+    # ------------------------------------------------------------------
+    def load(self):
+        from map_system.map_model_builder import build_model_common
+        from players.player_char import Player
+
+        snapshot = None
+        if self.snapshot_path:
+            with open(self.snapshot_path, "rb") as f:
+                snapshot = json.loads(gzip.decompress(f.read()))
+            map_data = snapshot["map"]
+        else:
+            map_data = load_map_data(self.map_name)
+
+        model, context = build_model_common(map_data, False, "play")
+        if model is None:
+            raise IOError(f"could not load map {self.map_name!r}")
+        # Each session has its own player, never the local character file.
+        player = Player(x=model.player.x, y=model.player.y, name=str(self.id))
+        model.player = player
+        model.loaded_map_filename = None
+        model.map_source = {"type": "file", "filename": self.map_name, "is_generated": False}
+        if snapshot:
+            # The map builder clamps the player into the map; the world itself is unbounded.
+            (player.x, player.y, player.hp, player.gold, player.wood, player.stone,
+             player.last_move_direction) = snapshot["player"]
+            model.world_events.restore(snapshot["clock"], snapshot["events"])
+
+        engine = GameEngine(model, context, QueuedGameInput(), HeadlessGameRenderer())
+        engine.scheduler = FrameScheduler(target_fps=SESSION_CONFIG["tick_rate"])
+        return engine
+
+    def save_snapshot(self, engine, path):
+        from map_system.map_data_builder import build_map_data
+
+        model = engine.model
+        player = model.player
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "session_id": self.id,
+            "map_name": self.map_name,
+            "map": build_map_data(model.placed_scenery, player=player,
+                                  world_width=model.world_width, world_height=model.world_height),
+            "player": [player.x, player.y, player.hp, player.gold, player.wood, player.stone,
+                       player.last_move_direction],
+            "clock": model.world_events.now,
+            "events": model.world_events.pending(),
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        data = json.dumps(snapshot, separators=(",", ":")).encode("utf-8")
+        with open(tmp_path, "wb") as f:
+            f.write(gzip.compress(data, compresslevel=1))
+        os.replace(tmp_path, path)
+
+    # ------------------------------------------------------------------
+    # Ticking (on the event loop)
+    # ------------------------------------------------------------------
+    def step(self, tick, now, latencies):
+        """
+        Run one engine frame for host tick 'tick', first catching up on the
+        ticks this session slept through.
+        """
+        engine = self.engine
+        if self.last_tick is not None and tick - self.last_tick > 1:
+            engine.advance_idle_ticks(tick - self.last_tick - 1)
+        self.last_tick = tick
+
+        actions = []
+        for (submitted, act) in self.inbox:
+            actions.append(act)
+            latencies.append(now - submitted)
+        self.inbox = []
+        engine.game_input.pending = actions
+        engine.step(1)
+        self.steps += 1
+        if self.writer is not None:
+            self.send_state(tick)
+
+        # Sleep until the next scheduled event unless something keeps it busy.
+        delay = engine.next_event_delay(engine.frame_actions)
+        if delay is None:
+            self.wake_tick = tick + 1
+        else:
+            self.wake_tick = tick + max(1, int(delay / engine.scheduler.logic_step))
+
+    def send_state(self, tick):
+        """
+        Send the player's state to the connected client if it changed.
+        """
+        p = self.engine.model.player
+        state = [p.x, p.y, p.hp, p.gold, p.wood, p.stone, p.last_move_direction]
+        if state != self.last_sent and not self.writer.transport.is_closing():
+            self.writer.write(encode_message({"k": tick, "s": state}))
+            self.last_sent = state
+
+
+class SessionHost:
+    """
+    Hosts many GameSessions in one asyncio loop.
+
+      open_session(id, map_name)   => register (nothing is loaded yet)
+      submit(id, actions)          => queue actions; loads the session if needed
+      await start(host, port)      => optional TCP front door (engine_network framing):
+                                      {"t": "hello", "session": id, "map": name}, then {"a": [...]}
+      await run(seconds)           => tick at tick_rate until stop()
+      await close()                => hang up on clients, evict everything and
+                                      stop the worker thread
+
+    A tick steps every resident session that has input or a due event,
+    yielding to the event loop every 'yield_every' sessions.
+    """
+    def __init__(self, tick_rate=None, evict_dir=None, clock=time.perf_counter):
+        self.tick_rate = tick_rate or SESSION_CONFIG["tick_rate"]
+        self.evict_dir = evict_dir or SESSION_CONFIG["evict_dir"]
+        self.clock = clock
+        self.sessions = {}
+        self.resident = OrderedDict()     # id -> session, least recently active first
+        self.tick = 0
+        self._running = False
+        self._server = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-io")
+        self._io_tasks = set()
+        self._clients = {}                # client handler task -> its writer
+
+        self.tick_times = []
+        self.input_latencies = []
+        self.steps = 0
+        self.stats = {"loads": 0, "evictions": 0, "load_s": 0.0, "evict_s": 0.0, "errors": 0}
+
+    def open_session(self, session_id, map_name):
+        """
+        Register a session. Raises ValueError for an id that doesn't match
+        SESSION_ID_PATTERN (it becomes part of the snapshot file name).
+        """
+        if not isinstance(session_id, str) or not SESSION_ID_PATTERN.fullmatch(session_id):
+            raise ValueError(f"bad session id: {session_id!r}")
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = GameSession(session_id, map_name)
+        return session
+
+    def submit(self, session_id, actions):
+        session = self.sessions[session_id]
+        now = self.clock()
+        session.inbox.extend((now, a) for a in actions if a in NET_ACTIONS)
+        session.last_active = now
+        if session.state == RESIDENT:
+            self.resident.move_to_end(session_id)
+        elif session.state in (COLD, EVICTED):
+            self._start_io(session, LOADING, self._load)
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def _handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self._clients[task] = writer
+        try:
+            await self._serve_client(reader, writer)
+        finally:
+            del self._clients[task]
+            writer.close()
+
+    async def _serve_client(self, reader, writer):
+        from map_system.map_list_logic import get_map_list
+
+        hello, _ = await read_message(reader)
+        if not isinstance(hello, dict) or hello.get("t") != "hello":
+            return
+        session_id, map_name = hello.get("session"), hello.get("map")
+        if (not isinstance(session_id, str) or not SESSION_ID_PATTERN.fullmatch(session_id)
+                or map_name not in get_map_list()):
+            return
+        session = self.open_session(session_id, map_name)
+        session.writer = writer
+        session.last_sent = None
+        writer.write(encode_message({"t": "welcome", "id": session.id, "map": session.map_name}))
+        try:
+            while True:
+                msg, _ = await read_message(reader)
+                if msg is None:
+                    break
+                actions = msg.get("a") if isinstance(msg, dict) else None
+                if isinstance(actions, list):
+                    self.submit(session.id, actions)
+        finally:
+            if session.writer is writer:
+                session.writer = None
+
+    # ------------------------------------------------------------------
+    # Background loads / evictions
+    # ------------------------------------------------------------------
+    def _start_io(self, session, state, job):
+        session.state = state
+        task = asyncio.ensure_future(job(session))
+        self._io_tasks.add(task)
+        task.add_done_callback(self._io_tasks.discard)
+
+    async def _load(self, session):
+        loop = asyncio.get_event_loop()
+        t0 = time.perf_counter()
+        try:
+            engine = await loop.run_in_executor(self._executor, session.load)
+        except Exception:
+            self.stats["errors"] += 1
+            session.state = COLD if session.snapshot_path is None else EVICTED
+            session.inbox = []
+            return
+        self.stats["loads"] += 1
+        self.stats["load_s"] += time.perf_counter() - t0
+        session.engine = engine
+        session.last_tick = None
+        session.wake_tick = self.tick
+        session.state = RESIDENT
+        self.resident[session.id] = session
+
+    async def _evict(self, session):
+        loop = asyncio.get_event_loop()
+        engine, session.engine = session.engine, None
+        self.resident.pop(session.id, None)
+        path = os.path.join(self.evict_dir, f"{session.id}.json.gz")
+        t0 = time.perf_counter()
+        await loop.run_in_executor(self._executor, session.save_snapshot, engine, path)
+        self.stats["evictions"] += 1
+        self.stats["evict_s"] += time.perf_counter() - t0
+        session.snapshot_path = path
+        session.state = EVICTED
+        if session.inbox:
+            # Input arrived while it was being written out; bring it back.
+            self._start_io(session, LOADING, self._load)
+
+    def _evict_idle(self, now):
+        limit = SESSION_CONFIG["idle_evict_seconds"]
+        excess = len(self.resident) - SESSION_CONFIG["max_resident"]
+        for session in list(self.resident.values()):
+            if session.state != RESIDENT or session.inbox:
+                continue
+            if excess > 0 or now - session.last_active > limit:
+                excess -= 1
+                self._start_io(session, EVICTING, self._evict)
+            else:
+                break   # ordered by activity; the rest are more recent
+
+    # ------------------------------------------------------------------
+    # Ticking
+    # ------------------------------------------------------------------
+    async def run_tick(self):
+        t0 = self.clock()
+        tick = self.tick
+        latencies = self.input_latencies
+        yield_every = SESSION_CONFIG["yield_every"]
+        stepped = 0
+        for session in list(self.resident.values()):
+            if session.state != RESIDENT:
+                continue
+            if session.inbox or session.wake_tick <= tick:
+                session.step(tick, self.clock(), latencies)
+                stepped += 1
+                if stepped % yield_every == 0:
+                    await asyncio.sleep(0)
+        self.steps += stepped
+        self._evict_idle(self.clock())
+        self.tick += 1
+        self.tick_times.append(self.clock() - t0)
+
+    async def run(self, seconds=None):
+        self._running = True
+        interval = 1.0 / self.tick_rate
+        start = self.clock()
+        deadline = start
+        while self._running:
+            if seconds is not None and self.clock() - start >= seconds:
+                break
+            await self.run_tick()
+            deadline += interval
+            await asyncio.sleep(max(0.0, deadline - self.clock()))
+
+    def stop(self):
+        self._running = False
+
+    async def close(self):
+        """
+        Stop accepting clients, hang up on the connected ones and wait for
+        their handlers, then evict every resident session to disk and wait
+        for pending I/O.
+        """
+        self._running = False
+        if self._server is not None:
+            self._server.close()
+        for writer in self._clients.values():
+            writer.close()
+        if self._clients:
+            await asyncio.gather(*list(self._clients), return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        while self._io_tasks:
+            await asyncio.gather(*list(self._io_tasks))
+        for session in list(self.resident.values()):
+            self._start_io(session, EVICTING, self._evict)
+        while self._io_tasks:
+            await asyncio.gather(*list(self._io_tasks))
+        self._executor.shutdown()
+
+
+# =========================================================================
+# Benchmark
+# =========================================================================
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+def measure_session_memory(map_names, count=8):
+    """
+    Average traced bytes of one resident session (model + engine), loaded
+    from a parsed (cached) map.
+    """
+    import tracemalloc
+
+    if not map_names:
+        raise ValueError("No maps to load sessions from")
+    for name in map_names:
+        load_map_data(name)
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    engines = [GameSession(f"mem{i}", map_names[i % len(map_names)]).load() for i in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del engines
+    return used / float(count)
+
+async def _drive(host, session_ids, seconds, online_share, seed):
+    """
+    Scripted players: each session is online or away, switching now and
+    then; online players press a key on about a third of the ticks.
+    """
+    rng = random.Random(seed)
+    moves = ("MOVE_UP", "MOVE_DOWN", "MOVE_LEFT", "MOVE_RIGHT", "INTERACT")
+    online = {sid: rng.random() < online_share for sid in session_ids}
+    end = host.clock() + seconds
+    interval = 1.0 / host.tick_rate
+    while host.clock() < end:
+        for sid in session_ids:
+            if rng.random() < 0.002:
+                online[sid] = not online[sid]
+            if online[sid] and rng.random() < 0.33:
+                host.submit(sid, [rng.choice(moves)])
+        await asyncio.sleep(interval)
+
+async def _bench_async(sessions, seconds, online_share, seed, evict_dir, offset):
+    from map_system.map_list_logic import get_map_list
+
+    map_names = get_map_list()
+    host = SessionHost(evict_dir=evict_dir)
+    session_ids = [f"s{offset + i}" for i in range(sessions)]
+    for i, sid in enumerate(session_ids):
+        host.open_session(sid, map_names[(offset + i) % len(map_names)])
+
+    run_task = asyncio.ensure_future(host.run())
+    await _drive(host, session_ids, seconds, online_share, seed)
+    host.stop()
+    await run_task
+    resident_at_end = len(host.resident)
+    await host.close()
+    return {
+        "sessions":        sessions,
+        "ticks":           host.tick,
+        "steps":           host.steps,
+        "tick_times":      host.tick_times,
+        "input_latencies": host.input_latencies,
+        "resident_end":    resident_at_end,
+        "stats":           host.stats,
+    }
+
+def _bench_worker(job):
+    return asyncio.run(_bench_async(**job))
+
+def run_sessions_benchmark(sessions=200, seconds=10.0, workers=1, online_share=0.3,
+                           seed=0, evict_dir=None):
+    """
+    Host 'sessions' sessions (spread over 'workers' processes) with scripted
+    players for 'seconds'. Returns a report dict. Raises ValueError if
+    there are no maps for the sessions to play.
+    """
+    import resource
+    from map_system.map_list_logic import get_map_list, MAPS_DIR
+
+    evict_dir = evict_dir or SESSION_CONFIG["evict_dir"]
+    map_names = get_map_list()
+    if not map_names:
+        raise ValueError(f"No maps in {os.path.abspath(MAPS_DIR)!r}; run from the project root")
+    per_session = measure_session_memory(map_names)
+
+    shares = [sessions // workers + (1 if i < sessions % workers else 0) for i in range(workers)]
+    jobs, offset = [], 0
+    for i, share in enumerate(shares):
+        jobs.append({"sessions": share, "seconds": seconds, "online_share": online_share,
+                     "seed": seed + i, "evict_dir": evict_dir, "offset": offset})
+        offset += share
+    if workers > 1:
+        from multiprocessing import Pool
+        with Pool(workers) as pool:
+            results = pool.map(_bench_worker, jobs)
+    else:
+        results = [_bench_worker(jobs[0])]
+
+    tick_times = [t for r in results for t in r["tick_times"]]
+    latencies = [t for r in results for t in r["input_latencies"]]
+    stats = {}
+    for r in results:
+        for k, v in r["stats"].items():
+            stats[k] = stats.get(k, 0) + v
+    return {
+        "sessions":           sessions,
+        "workers":            workers,
+        "seconds":            seconds,
+        "ticks":              sum(r["ticks"] for r in results),
+        "session_steps":      sum(r["steps"] for r in results),
+        "tick_ms":            {q: _percentile(tick_times, p) * 1000.0
+                               for q, p in (("p50", 0.5), ("p99", 0.99), ("max", 1.0))},
+        "input_latency_ms":   {q: _percentile(latencies, p) * 1000.0
+                               for q, p in (("p50", 0.5), ("p99", 0.99), ("max", 1.0))},
+        "resident_end":       sum(r["resident_end"] for r in results),
+        "session_kib":        per_session / 1024.0,
+        "max_rss_mib":        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        "stats":              stats,
+    }
+
+def format_sessions_report(report):
+    stats = report["stats"]
+    loads, evictions = stats.get("loads", 0), stats.get("evictions", 0)
+    return [
+        f"sessions: {report['sessions']}  workers: {report['workers']}  seconds: {report['seconds']}",
+        f"host ticks: {report['ticks']}  session steps: {report['session_steps']}",
+        "tick ms:           p50 {p50:.2f}  p99 {p99:.2f}  max {max:.2f}".format(**report["tick_ms"]),
+        "input latency ms:  p50 {p50:.2f}  p99 {p99:.2f}  max {max:.2f}".format(**report["input_latency_ms"]),
+        f"memory per resident session: {report['session_kib']:.0f} KiB  "
+        f"(max RSS of host process: {report['max_rss_mib']:.0f} MiB)",
+        f"resident at end: {report['resident_end']}  loads: {loads} "
+        f"(avg {stats.get('load_s', 0) / max(1, loads) * 1000:.1f} ms incl. queueing)  evictions: {evictions} "
+        f"(avg {stats.get('evict_s', 0) / max(1, evictions) * 1000:.1f} ms)  errors: {stats.get('errors', 0)}",
+    ]
@@ -0,0 +1,107 @@
+# FileName: engine_timers.py
+# version: 1.0
+# Summary: Tick-based timer service (min-heap keyed by due tick) with schedule
+#          and cancel. Respawns, action flashes and other timed effects are
+#          scheduled here, so a tick only costs work for the timers due in it.
+# Tags: engine, timers, scheduling, performance
+
+import heapq
+
+# -------------------------------------------------------------------------
+# Timer kinds => handler(*args, payload). Modules that own a kind register
+# it at import time (see engine_respawn.py, engine_actionflash.py).
+# Timers carry a kind name plus plain data, never a callable, so pending
+# timers stay easy to inspect or store.
+# -------------------------------------------------------------------------
+TIMER_HANDLERS = {}
+
+def register_timer_kind(kind, handler):
+    TIMER_HANDLERS[kind] = handler
+
+
+class TimerService:
+    """
+    A clock counted in logic ticks plus a min-heap of pending timers.
+
+      schedule(delay, kind, payload) => timer id, fires 'delay' ticks from now
+      cancel(timer_id)               => lazy: the heap entry is skipped later
+      advance(ticks, *args)          => move the clock, fire everything now due,
+                                        calling TIMER_HANDLERS[kind](*args, payload)
+
+    Timers due on the same tick fire in the order they were scheduled.
+    """
+    def __init__(self):
+        self.now = 0
+        self._heap = []      # [due_tick, timer_id, kind, payload, alive]
+        self._live = {}      # timer_id -> heap entry
+        self._next_id = 0
+        self._cancelled = 0
+
+    def __len__(self):
+        return len(self._live)
+
+    def schedule(self, delay, kind, payload=None):
+        return self.schedule_at(self.now + max(0, delay), kind, payload)
+
+    def schedule_at(self, due_tick, kind, payload=None):
+        timer_id = self._next_id
+        self._next_id += 1
+        entry = [due_tick, timer_id, kind, payload, True]
+        self._live[timer_id] = entry
+        heapq.heappush(self._heap, entry)
+        return timer_id
+
+    def cancel(self, timer_id):
+        """
+        Cancel a pending timer. Returns False if it already fired or was cancelled.
+        """
+        entry = self._live.pop(timer_id, None)
+        if entry is None:
+            return False
+        entry[4] = False
+        self._cancelled += 1
+        # Rebuild once dead entries dominate, so the heap can't grow without bound.
+        if self._cancelled > 64 and self._cancelled > len(self._heap) // 2:
+            self._heap = [e for e in self._heap if e[4]]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+        return True
+
+    def is_pending(self, timer_id):
+        return timer_id in self._live
+
+    def advance(self, ticks, *args):
+        """
+        Move the clock forward by 'ticks' and fire every timer now due.
+        Returns how many timers fired.
+        """
+        self.now += ticks
+        heap = self._heap
+        fired = 0
+        while heap and heap[0][0] <= self.now:
+            due_tick, timer_id, kind, payload, alive = heapq.heappop(heap)
+            if not alive:
+                self._cancelled -= 1
+                continue
+            del self._live[timer_id]
+            TIMER_HANDLERS[kind](*args, payload)
+            fired += 1
+        return fired
+
+    def ticks_until_next(self):
+        """
+        Ticks until the earliest pending timer is due (0 if overdue), or None.
+        """
+        heap = self._heap
+        while heap and not heap[0][4]:
+            heapq.heappop(heap)
+            self._cancelled -= 1
+        if not heap:
+            return None
+        return max(0, heap[0][0] - self.now)
+
+    def pending(self):
+        """
+        Return (due_tick, kind, payload) for every pending timer, earliest first.
+        """
+        return [(e[0], e[2], e[3]) for e in sorted(self._live.values())]
@@ -0,0 +1,169 @@
+# FileName: engine_world_events.py
+# version: 1.1 (pending()/restore() so pending events can be saved)
+# Summary: Per-chunk store for timed world changes (respawns, ...) with absolute
+#          due ticks. Nothing is simulated per tick: a chunk's due events are
+#          applied lazily when the chunk is in the active region (viewport plus
+#          margin), queried, or when the whole world is settled before a save.
+#          The results are identical to firing every event eagerly on time.
+# Tags: engine, timers, chunks, lazy, performance
+
+import heapq
+
+from .engine_timers import TIMER_HANDLERS
+
+# Tiles per chunk side (same as the noise generator's chunks).
+CHUNK_SIZE = 32
+
+def chunk_of(x, y):
+    return (x // CHUNK_SIZE, y // CHUNK_SIZE)
+
+
+class ChunkEventStore:
+    """
+    A world clock (in logic ticks) plus one min-heap of events per chunk.
+
+      schedule(delay, kind, payload, tiles) => event id, due 'delay' ticks from now
+      cancel(event_id)
+      advance(ticks)                        => O(1), only moves the clock
+      settle_region(x0, y0, x1, y1, *args)  => apply due events of the chunks
+                                               overlapping the rectangle
+      settle_all(*args)                     => apply every due event (before saving)
+
+    Events run TIMER_HANDLERS[kind](*args, payload), like TimerService timers.
+
+    Ordering: an event touching several chunks is stored in each of them.
+    Before it fires, the other chunks are settled up to (but not including)
+    that event, so every tile sees its events in the same (due, id) order as
+    eager simulation would apply them.
+    """
+    def __init__(self):
+        self.now = 0
+        self._chunks = {}    # (cx, cy) -> heap of [due, event_id, kind, payload, chunks, alive]
+        self._live = {}      # event_id -> entry
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._live)
+
+    def schedule(self, delay, kind, payload, tiles):
+        """
+        Schedule an event affecting 'tiles' [(x, y), ...]. Returns its id.
+        """
+        event_id = self._next_id
+        self._next_id += 1
+        chunks = tuple({chunk_of(x, y) for (x, y) in tiles})
+        entry = [self.now + max(0, delay), event_id, kind, payload, chunks, True]
+        self._live[event_id] = entry
+        for chunk in chunks:
+            heapq.heappush(self._chunks.setdefault(chunk, []), entry)
+        return event_id
+
+    def cancel(self, event_id):
+        entry = self._live.pop(event_id, None)
+        if entry is None:
+            return False
+        entry[5] = False
+        return True
+
+    def advance(self, ticks):
+        self.now += ticks
+
+    def settle_chunk(self, chunk, args, limit=None):
+        """
+        Apply the due events of one chunk in (due, id) order.
+        'limit' (due, id) stops before that event; used for cross-chunk ordering.
+        """
+        heap = self._chunks.get(chunk)
+        now = self.now
+        while heap and heap[0][0] <= now:
+            entry = heap[0]
+            if limit is not None and (entry[0], entry[1]) >= limit:
+                break
+            heapq.heappop(heap)
+            if entry[5]:
+                self._fire(entry, chunk, args)
+        if heap is not None and not heap and self._chunks.get(chunk) is heap:
+            del self._chunks[chunk]
+
+    def _fire(self, entry, chunk, args):
+        entry[5] = False
+        del self._live[entry[1]]
+        if len(entry[4]) > 1:
+            limit = (entry[0], entry[1])
+            for other in entry[4]:
+                if other != chunk:
+                    self.settle_chunk(other, args, limit)
+        TIMER_HANDLERS[entry[2]](*args, entry[3])
+
+    def _chunks_in(self, x0, y0, x1, y1):
+        """
+        Chunks with pending events overlapping the rectangle. Walks whichever
+        is smaller: the rectangle's chunk range or the set of stored chunks.
+        """
+        cx0, cy0 = chunk_of(x0, y0)
+        cx1, cy1 = chunk_of(x1, y1)
+        chunks = self._chunks
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(chunks):
+            return [(cx, cy) for (cx, cy) in chunks
+                    if cx0 <= cx <= cx1 and cy0 <= cy <= cy1]
+        return [(cx, cy) for cy in range(cy0, cy1 + 1) for cx in range(cx0, cx1 + 1)
+                if (cx, cy) in chunks]
+
+    def settle_region(self, x0, y0, x1, y1, *args):
+        """
+        Apply due events in every chunk overlapping the tile rectangle
+        (x0, y0)-(x1, y1), inclusive. Cost depends on the rectangle, not on
+        how many events are pending elsewhere.
+        """
+        for chunk in self._chunks_in(x0, y0, x1, y1):
+            self.settle_chunk(chunk, args)
+
+    def settle_at(self, x, y, *args):
+        """
+        Apply due events for the chunk holding tile (x, y) before querying it.
+        """
+        self.settle_chunk(chunk_of(x, y), args)
+
+    def settle_all(self, *args):
+        for chunk in list(self._chunks):
+            self.settle_chunk(chunk, args)
+
+    def pending(self):
+        """
+        Return [due, kind, payload, chunks] for every pending event in firing
+        order, as plain data (e.g. to keep them in a session snapshot).
+        """
+        entries = sorted(self._live.values(), key=lambda e: (e[0], e[1]))
+        return [[e[0], e[2], e[3], [list(c) for c in e[4]]] for e in entries]
+
+    def restore(self, now, events):
+        """
+        Replace the clock and every pending event with 'now' and 'events'
+        as returned by pending().
+        """
+        self.now = now
+        self._chunks = {}
+        self._live = {}
+        for (due, kind, payload, chunks) in events:
+            event_id = self._next_id
+            self._next_id += 1
+            chunks = tuple(tuple(c) for c in chunks)
+            entry = [due, event_id, kind, payload, chunks, True]
+            self._live[event_id] = entry
+            for chunk in chunks:
+                heapq.heappush(self._chunks.setdefault(chunk, []), entry)
+
+    def ticks_until_next(self, x0, y0, x1, y1):
+        """
+        Ticks until the next event due in the given rectangle (0 if overdue), or None.
+        """
+        best = None
+        for chunk in self._chunks_in(x0, y0, x1, y1):
+            heap = self._chunks[chunk]
+            while heap and not heap[0][5]:
+                heapq.heappop(heap)
+            if heap and (best is None or heap[0][0] < best):
+                best = heap[0][0]
+        if best is None:
+            return None
+        return max(0, best - self.now)
@@ -1,12 +1,15 @@
 # FileName: curses_color_init.py
 #
-# version: 3.3
+# version: 3.4 (ATTR_TABLE: cell color id => curses attribute)
 #
 # Summary: Initializes curses color pairs. Skips invalid indexes if terminal supports fewer colors.
+#          cell_attr_table() maps the shadow framebuffer's color ids
+#          (engine_cellbuffer.COLOR_KEYS) to ready-made curses attributes.
 #
 # Tags: colors, curses, setup
 
 import curses
+from engine.engine_cellbuffer import COLOR_KEYS
 
 # The standard 8 curses colors mapped to friendly names:
 BASE_COLORS = {
@@ -38,6 +41,9 @@ def define_extended_colors():
 
 color_pairs = {}
 
+# ATTR_TABLE[color id] => curses attribute for COLOR_KEYS[color id].
+ATTR_TABLE = []
+
 def init_colors():
     curses.start_color()
     curses.use_default_colors()
@@ -58,4 +64,16 @@ def init_colors():
                 color_pairs[pair_name] = pair_index
                 pair_index += 1
 
-    # Removed alias mapping in favor of a standardized naming system.
\ No newline at end of file
+    # Pairs were (re)defined: attributes are rebuilt on next use.
+    del ATTR_TABLE[:]
+
+    # Removed alias mapping in favor of a standardized naming system.
+
+def cell_attr_table():
+    """
+    Return ATTR_TABLE, first adding attributes for any color ids registered
+    since it was last extended. Unknown pairs fall back to pair 0.
+    """
+    for fg, bg in COLOR_KEYS[len(ATTR_TABLE):]:
+        ATTR_TABLE.append(curses.color_pair(color_pairs.get(f"{fg}_on_{bg}", 0)))
+    return ATTR_TABLE
@@ -1,7 +1,18 @@
 # FileName: curses_game_renderer.py
-# version: 4.2 (modified to delegate inventory display to curses_scene_inventory and to call draw_editor_overlay from curses_scene_editor)
+# version: 5.7 (full redraws arrive as a dirty view rect)
 #
 # Summary: A curses-based in-game renderer implementing IGameRenderer. Renders only the camera region.
+#          World tiles are drawn into a curses pad covering the viewport plus
+#          PAD_MARGIN tiles on each side; noutrefresh maps the camera's part of
+#          it onto the screen. A camera scroll only moves the pad origin and paints
+#          the newly exposed strip, and curses sends just the changed cells
+#          (using terminal line scrolling where it can).
+#          What to write is decided by a shadow CellBuffer (engine_cellbuffer.py)
+#          mirroring the pad: tiles are composed to (char, color_id) cells, and
+#          only the cells that differ from what the pad holds are written, so a
+#          full redraw costs a compare, not a repaint. Changed cells are
+#          written row by row, one addstr per run of same-attribute cells,
+#          the attribute indexed straight out of cell_attr_table().
 #
 # Tags: curses, ui, rendering
 
@@ -13,8 +24,10 @@ from .curses_utils import safe_addstr
 from .curses_common import draw_screen_frame
 from .where_curses_themes_lives import CURRENT_THEME
 
-# The tile-drawing logic is in curses_tile_drawing.py
-from .curses_tile_drawing import draw_single_tile, draw_player_on_top
+# Tiles are composed to cells by the backend-neutral shadow framebuffer
+from engine.engine_cellbuffer import CellBuffer, TileCellCache, rect_difference
+from .curses_tile_drawing import pad_addstr
+from .curses_color_init import cell_attr_table
 
 # Import the inventory summary drawer
 from .curses_scene_inventory import draw_inventory_summary
@@ -22,6 +35,9 @@ from .curses_scene_inventory import draw_inventory_summary
 # Import the editor overlay drawer
 from .curses_scene_editor import draw_editor_overlay
 
+# Tiles kept in the pad beyond each side of the viewport. The pad is only
+# rebuilt (copying what it can) once the camera leaves it.
+PAD_MARGIN = 16
 
 class CursesGameRenderer(IGameRenderer):
     def __init__(self, stdscr):
@@ -29,8 +45,22 @@ class CursesGameRenderer(IGameRenderer):
         self.map_top_offset = 3
         self.map_side_offset = 0
 
+        # World pad: cell (0, 0) is tile (pad_x0, pad_y0). 'shadow' holds the
+        # cell each pad position shows; 'last_view' is the tile rect
+        # (x0, y0, x1, y1) brought up to date by the last render.
+        self.pad = None
+        self.pad_x0 = self.pad_y0 = 0
+        self.shadow = None
+        self.cell_cache = TileCellCache()
+        self.last_view = None
+        self.hud_win = None
+        self.map_in_scene = False
+
         self.stdscr.nodelay(True)
         self.stdscr.keypad(True)
+        # Let curses use the terminal's line insert/delete and scrolling region.
+        self.stdscr.idlok(True)
+        self.stdscr.idcok(True)
         curses.curs_set(0)
 
     def get_curses_window(self):
@@ -59,6 +89,7 @@ class CursesGameRenderer(IGameRenderer):
         :param context: the game model or other relevant data.
         """
         self.stdscr.erase()
+        self.map_in_scene = False
 
         # 1) Retrieve layers from the scene.
         layers = scene.get_layers()  # This returns a list of SceneLayer objects.
@@ -72,6 +103,8 @@ class CursesGameRenderer(IGameRenderer):
 
         # 4) Refresh the screen.
         self.stdscr.noutrefresh()
+        if self.map_in_scene:
+            self._pad_noutrefresh(context)
         curses.doupdate()
 
     def _render_layer(self, layer_name, model):
@@ -84,16 +117,15 @@ class CursesGameRenderer(IGameRenderer):
         elif layer_name == "game_world":
             if model:
                 self._full_redraw(model)
+                self.map_in_scene = True
 
     def render(self, model):
         """
         Called each frame to render the current game state, possibly partially.
+        Scrolling needs no special case: the pad is painted wherever the new
+        viewport isn't up to date yet, then shown from the new origin.
         """
-        dx = getattr(model, "ui_scroll_dx", 0)
-        dy = getattr(model, "ui_scroll_dy", 0)
-
-        # If camera moved or a full redraw is requested, do a full update
-        if model.full_redraw_needed or dx != 0 or dy != 0:
+        if model.full_redraw_needed:
             self._full_redraw(model)
             model.full_redraw_needed = False
         else:
@@ -104,10 +136,77 @@ class CursesGameRenderer(IGameRenderer):
         model.ui_scroll_dy = 0
 
         self.stdscr.noutrefresh()
+        self._pad_noutrefresh(model)
+
+        # Perf HUD goes on top of the map (see engine_perf.py)
+        self._draw_perf_hud(getattr(model, "perf_hud_lines", None))
         curses.doupdate()
 
+    # ------------------------------------------------------------------
+    # World pad
+    # ------------------------------------------------------------------
+    def _map_area(self):
+        """
+        Screen rect (top, left, bottom, right) of the map inside the frame.
+        Screen column sx shows tile camera_x + sx, row sy tile camera_y + sy - top.
+        """
+        max_h, max_w = self.stdscr.getmaxyx()
+        return (self.map_top_offset, 1, max_h - 2, max_w - 2)
+
+    def _viewport(self, model):
+        """
+        Tile rect (x0, y0, x1, y1) shown in the map area, or None if it is empty.
+        """
+        top, left, bottom, right = self._map_area()
+        if bottom < top or right < left:
+            return None
+        return (model.camera_x + left, model.camera_y,
+                model.camera_x + right, model.camera_y + bottom - top)
+
+    def _ensure_pad(self, view):
+        """
+        Make sure the pad covers 'view'. A new pad is centred on it, with the
+        overlapping part of the old pad (and its shadow cells) carried over.
+        """
+        x0, y0, x1, y1 = view
+        w = x1 - x0 + 1 + 2 * PAD_MARGIN
+        h = y1 - y0 + 1 + 2 * PAD_MARGIN
+        old = self.pad
+        same_size = old is not None and old.getmaxyx() == (h, w)
+        if (same_size and self.pad_x0 <= x0 and x1 < self.pad_x0 + w
+                and self.pad_y0 <= y0 and y1 < self.pad_y0 + h):
+            return
+
+        pad = curses.newpad(h, w)
+        new_x0, new_y0 = x0 - PAD_MARGIN, y0 - PAD_MARGIN
+        if same_size:
+            cx0, cy0 = max(self.pad_x0, new_x0), max(self.pad_y0, new_y0)
+            cx1, cy1 = min(self.pad_x0, new_x0) + w - 1, min(self.pad_y0, new_y0) + h - 1
+            if cx0 <= cx1 and cy0 <= cy1:
+                old.overwrite(pad, cy0 - self.pad_y0, cx0 - self.pad_x0,
+                              cy0 - new_y0, cx0 - new_x0, cy1 - new_y0, cx1 - new_x0)
+            self.shadow.move_origin(new_x0, new_y0)
+        else:
+            self.shadow = CellBuffer(w, h, new_x0, new_y0)
+            self.last_view = None
+        self.pad = pad
+        self.pad_x0, self.pad_y0 = new_x0, new_y0
+
+    def _pad_noutrefresh(self, model):
+        """
+        Copy the camera's part of the pad onto the map area of the screen.
+        """
+        view = self._viewport(model)
+        if self.pad is None or view is None:
+            return
+        top, left, bottom, right = self._map_area()
+        self.pad.noutrefresh(view[1] - self.pad_y0, view[0] - self.pad_x0,
+                              top, left, bottom, right)
+
     def _full_redraw(self, model):
-        self.stdscr.clear()
+        # erase, not clear: clear() would make curses repaint the whole
+        # terminal, while unchanged cells need not be sent at all.
+        self.stdscr.erase()
         self._draw_screen_frame()
 
         # New approach: delegate the editor overlay to curses_scene_editor,
@@ -116,33 +215,76 @@ class CursesGameRenderer(IGameRenderer):
         if not (model.context.enable_editor_commands and model.editor_scenery_list):
             draw_inventory_summary(self.stdscr, model, row=1, col=2)
 
-        max_h, max_w = self.stdscr.getmaxyx()
-        visible_cols = max_w
-        visible_rows = max_h - self.map_top_offset
-
-        # Mark every tile in the visible region as dirty
-        for wx in range(model.camera_x, model.camera_x + visible_cols):
-            for wy in range(model.camera_y, model.camera_y + visible_rows):
-                model.dirty_tiles.add((wx, wy))
-
+        # The engine marked every visible tile dirty for a full redraw
         self._update_dirty_tiles(model)
 
     def _update_dirty_tiles(self, model):
         """
-        Re-draw only the tiles in model.dirty_tiles, then draw the player on top.
+        Bring the viewport up to date in the pad. The tiles checked are
+        whatever a scroll exposed plus the dirty row spans (the whole view
+        for a full redraw, see GameEngine.render); of those, only cells that
+        differ from the shadow are written.
+        Dirty spans are clipped to the pad; tiles outside it are compared
+        when they scroll into view (the cell cache follows scenery changes).
         """
-        max_h, max_w = self.stdscr.getmaxyx()
-        blank_attr = get_color_attr("white_on_black")
+        view = self._viewport(model)
+        if view is None:
+            return
+        self._ensure_pad(view)
+        rects = rect_difference(view, self.last_view) + model.dirty_tiles.rects()
+        self._write_runs(self.shadow.diff_rows(model, self.cell_cache, rects))
+        self.last_view = view
 
-        for (wx, wy) in model.dirty_tiles:
-            sx = wx - model.camera_x
-            sy = wy - model.camera_y + self.map_top_offset
-            if 0 <= sx < max_w and 0 <= sy < max_h:
-                # Paint this tile
-                draw_single_tile(self.stdscr, wx, wy, sx, sy, model, blank_attr)
+    def _write_runs(self, spans):
+        """
+        Write changed spans (wy, wx, cells) into the pad, one addstr per run
+        of cells sharing an attribute. Spans are already clipped to the
+        viewport, so nothing is checked per character.
+        """
+        pad, ox, oy = self.pad, self.pad_x0, self.pad_y0
+        attrs = cell_attr_table()
+        for (wy, wx, cells) in spans:
+            row, col = wy - oy, wx - ox
+            run_color = None
+            run = []
+            for (ch, cid) in cells:
+                if cid != run_color:
+                    if run:
+                        pad_addstr(pad, row, col, "".join(run), attrs[run_color])
+                        col += len(run)
+                    run_color = cid
+                    run = [ch]
+                else:
+                    run.append(ch)
+            pad_addstr(pad, row, col, "".join(run), attrs[run_color])
 
-        # After drawing all tiles, draw the player on top
-        draw_player_on_top(self.stdscr, model, self.map_top_offset)
+    def _draw_perf_hud(self, lines):
+        """
+        Draw the perf HUD in the top-right corner of the map area, in its own
+        window refreshed after the pad so the map doesn't cover it.
+        The lines are equal width, so a refresh fully covers the previous text.
+        When the HUD goes away, the engine requests a full redraw, and the pad
+        refresh paints the map back over it.
+        """
+        if not lines:
+            self.hud_win = None
+            return
+        max_h, max_w = self.stdscr.getmaxyx()
+        col = max(1, max_w - len(lines[0]) - 2)
+        rows = min(len(lines), max_h - 1 - self.map_top_offset)
+        width = min(len(lines[0]), max_w - 1 - col)
+        if rows <= 0 or width <= 0:
+            return
+        win = self.hud_win
+        if win is None or win.getmaxyx() != (rows, width + 1) or win.getbegyx() != (self.map_top_offset, col):
+            win = self.hud_win = curses.newwin(rows, width + 1, self.map_top_offset, col)
+        attr = get_color_attr(CURRENT_THEME["text_color"], bold=True)
+        for i in range(rows):
+            try:
+                win.addstr(i, 0, lines[i][:width], attr)
+            except curses.error:
+                pass
+        win.noutrefresh()
 
     def _draw_screen_frame(self):
         draw_screen_frame(self.stdscr)
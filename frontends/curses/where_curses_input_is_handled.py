@@ -1,5 +1,5 @@
 # FileName: where_curses_input_lives.py
-# version: 2.4
+# version: 2.7 (drain the key buffer once per frame; repeats are coalesced later)
 #
 # Summary: A curses-based front-end implementing IGameInput for user interaction.
 #          Updated to remove the 'y' => YES_QUIT logic, so only 'q'/ESC quits.
@@ -10,6 +10,10 @@
 import curses
 from engine.engine_interfaces import IGameInput
 
+# Keys read per get_actions() call. Held-key auto-repeat is coalesced into
+# one multi-step move by the engine, so a full buffer is cheap to drain.
+MAX_KEYS_PER_FRAME = 32
+
 class CursesGameInput(IGameInput):
     """
     Implements IGameInput for curses: get_actions() reads the keyboard buffer,
@@ -24,8 +28,8 @@ class CursesGameInput(IGameInput):
 
     def get_actions(self):
         actions = []
-        # read up to ~5 keystrokes at once
-        for _ in range(5):
+        # read the whole keyboard buffer (up to MAX_KEYS_PER_FRAME) at once
+        for _ in range(MAX_KEYS_PER_FRAME):
             key = self.stdscr.getch()
             if key == -1:
                 break
@@ -34,6 +38,20 @@ class CursesGameInput(IGameInput):
                 actions.append(act)
         return actions
 
+    def wait_for_input(self, timeout):
+        """
+        Block in getch() for up to 'timeout' seconds. A key that arrives is
+        pushed back with ungetch(), so the next get_actions() sees it.
+        """
+        self.stdscr.timeout(max(0, int(timeout * 1000)))
+        try:
+            key = self.stdscr.getch()
+        finally:
+            self.stdscr.nodelay(True)
+        if key != -1:
+            curses.ungetch(key)
+        return True
+
     def _interpret_key(self, key):
         # Quit => q, Q, ESC
         if key in (ord('q'), ord('Q'), 27):
@@ -61,6 +79,10 @@ class CursesGameInput(IGameInput):
         if key in (ord('v'), ord('V')):
             return "DEBUG_TOGGLE"
 
+        # Performance HUD
+        if key in (ord('f'), ord('F')):
+            return "PERF_TOGGLE"
+
         # Interact
         if key == ord(' '):
             return "INTERACT"
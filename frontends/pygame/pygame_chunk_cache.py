@@ -0,0 +1,173 @@
+# FileName: pygame_chunk_cache.py
+# version: 1.3 (sprite choice shared with the cell path via tile_sprite_keys)
+# Summary: Pre-rendered world chunks for the pygame frontend. Each block of
+#          CHUNK_CONFIG["chunk_tiles"] x chunk_tiles tiles gets one Surface with
+#          its static scenery (floor, objects, NPCs; never the player). A tile
+#          is drawn from the sprite atlas (pygame_sprite_atlas.py) when its floor
+#          and topmost object both have a sprite, else from the glyph atlas.
+#          A viewport at any pixel offset is then a few chunk blits, which is
+#          what smooth camera scrolling needs. Tiles the tile stack store reports
+#          changed (model.tile_stacks.watch) are redrawn into their chunk, if
+#          their compiled draw stack actually differs, before the next blit.
+# Tags: pygame, rendering, performance, chunks
+
+from collections import OrderedDict
+
+import pygame
+
+from engine.engine_cellbuffer import BLANK_CELL, compose_tile_cell
+from .pygame_sprite_atlas import PLAYER_SPRITE, tile_sprite_keys
+
+CHUNK_CONFIG = {
+    "chunk_tiles": 16,     # tiles per chunk side
+    "max_chunks": 48,      # chunk surfaces kept; least recently used dropped
+}
+
+
+class ChunkSurfaceCache:
+    """
+    Chunk surfaces for model.placed_scenery at the glyph atlas's cell size.
+    'chunks' maps (cx, cy) => (surface, stacks), 'stacks' the row-major list
+    of compiled tile stacks drawn into the surface. 'stale' holds the
+    tiles changed since they were drawn, wherever they are on the map.
+    Everything is dropped when the map, the glyph atlas (font size) or the
+    set of loaded sprites changes.
+    """
+    def __init__(self, model):
+        self.model = model
+        self.chunks = OrderedDict()
+        self.stale = set()
+        model.tile_stacks.watch(self._on_tile_change)
+        self._scenery = None
+        self._atlas = None
+        self._sprites = None    # SpriteAtlas.packed() result, or None
+        self._sprite_generation = None
+
+    def sync(self, atlas, sprite_atlas=None):
+        """
+        Start over if the map, font or sprites changed. Returns True if it did.
+        """
+        generation = sprite_atlas.generation if sprite_atlas else None
+        if (self.model.placed_scenery is self._scenery and atlas is self._atlas
+                and generation == self._sprite_generation):
+            return False
+        packed = sprite_atlas.packed(atlas.cell_w, atlas.cell_h) if generation else None
+        self._scenery = self.model.placed_scenery
+        self._atlas = atlas
+        self._sprite_generation = generation
+        self._sprites = packed if packed and packed[2] else None
+        self.chunks.clear()
+        self.stale.clear()
+        return True
+
+    def _on_tile_change(self, x, y):
+        self.stale.add((x, y))
+
+    def _sprite_areas(self, stack):
+        """
+        Atlas rects to draw for the tile, bottom first, or None if it has no
+        complete sprite (no floor sprite under an object sprite, say).
+        """
+        if self._sprites is None:
+            return None
+        areas = self._sprites[2]
+        keys = tile_sprite_keys(areas, stack)
+        return tuple(areas[key] for key in keys) if keys else None
+
+    def _draw_tiles(self, surface, placed):
+        """
+        Draw [(pos, stack), ...] onto 'surface': glyph cells in one blits
+        call, then the sprite tiles over a blank cell.
+        """
+        glyphs = []
+        sprite_blits = []
+        for (pos, stack) in placed:
+            areas = self._sprite_areas(stack)
+            if areas is None:
+                glyphs.append((pos, stack[0] or BLANK_CELL))
+            else:
+                glyphs.append((pos, BLANK_CELL))
+                sprite_sheet = self._sprites[1]
+                sprite_blits.extend((sprite_sheet, pos, area) for area in areas)
+        self._atlas.draw_cells(surface, glyphs)
+        if sprite_blits:
+            surface.blits(sprite_blits, doreturn=False)
+
+    def _chunk(self, cx, cy):
+        chunk = self.chunks.get((cx, cy))
+        if chunk is not None:
+            self.chunks.move_to_end((cx, cy))
+            return chunk
+        n = CHUNK_CONFIG["chunk_tiles"]
+        cell_w, cell_h = self._atlas.cell_w, self._atlas.cell_h
+        surface = pygame.Surface((n * cell_w, n * cell_h))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        x0, y0 = cx * n, cy * n
+        get = self.model.tile_stacks.get
+        stacks = [get(x0 + c, y0 + r) for r in range(n) for c in range(n)]
+        self._draw_tiles(surface, [(((i % n) * cell_w, (i // n) * cell_h), stack)
+                                   for i, stack in enumerate(stacks)])
+        chunk = self.chunks[(cx, cy)] = (surface, stacks)
+        if len(self.chunks) > CHUNK_CONFIG["max_chunks"]:
+            self.chunks.popitem(last=False)
+        return chunk
+
+    def refresh_stale(self):
+        """
+        Redraw the stale tiles in the chunks already built, where their
+        stack changed (tiles of chunks not built are drawn when they are).
+        Returns the tiles that changed.
+        """
+        if not self.stale:
+            return []
+        n = CHUNK_CONFIG["chunk_tiles"]
+        cell_w, cell_h = self._atlas.cell_w, self._atlas.cell_h
+        get = self.model.tile_stacks.get
+        changed = []
+        for (x, y) in self.stale:
+            chunk = self.chunks.get((x // n, y // n))
+            if chunk is None:
+                continue
+            surface, stacks = chunk
+            i = (y % n) * n + (x % n)
+            stack = get(x, y)
+            if stacks[i] != stack:
+                stacks[i] = stack
+                self._draw_tiles(surface, [(((x % n) * cell_w, (y % n) * cell_h), stack)])
+                changed.append((x, y))
+        self.stale.clear()
+        return changed
+
+    def draw_player(self, target, pos, model):
+        """
+        Draw the player at 'pos' over its (already blitted) tile: its sprite
+        if there is one, else its glyph cell. Under a TreeTop/TreeTrunk the
+        tile itself already shows what covers the player.
+        """
+        player = model.player
+        stack = model.tile_stacks.get(player.x, player.y)
+        if stack[1] is not None and self._sprite_areas(stack) is not None:
+            return
+        area = self._sprites[2].get(PLAYER_SPRITE) if self._sprites else None
+        if area is not None and stack[1] is None:
+            target.blit(self._sprites[1], pos, area)
+        else:
+            self._atlas.draw_cells(target, [(pos, compose_tile_cell(model, player.x, player.y))])
+
+    def blit_region(self, target, dest_rect, px, py):
+        """
+        Fill 'dest_rect' of 'target' with the world as seen from world pixel
+        (px, py) at its top-left corner.
+        """
+        n = CHUNK_CONFIG["chunk_tiles"]
+        chunk_w, chunk_h = n * self._atlas.cell_w, n * self._atlas.cell_h
+        blits = []
+        for cy in range(py // chunk_h, (py + dest_rect.height - 1) // chunk_h + 1):
+            for cx in range(px // chunk_w, (px + dest_rect.width - 1) // chunk_w + 1):
+                surface = self._chunk(cx, cy)[0]
+                blits.append((surface, (dest_rect.x + cx * chunk_w - px, dest_rect.y + cy * chunk_h - py)))
+        clip = target.get_clip()
+        target.set_clip(dest_rect)
+        target.blits(blits, doreturn=False)
+        target.set_clip(clip)
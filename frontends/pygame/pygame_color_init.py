@@ -1,11 +1,15 @@
 # File: pygame_color_init.py
-# version: 1.0
+# version: 1.1 (RGB_TABLE: cell color id => (fg, bg) RGB)
 #
 # Summary: Provides a centralized color management system for pygame.
 #          Defines base colors and helper functions to parse color pair strings.
+#          cell_color_table() maps the shadow framebuffer's color ids
+#          (engine_cellbuffer.COLOR_KEYS) to (fg, bg) RGB tuples.
 #
 # Tags: colors, pygame, setup
 
+from engine.engine_cellbuffer import COLOR_KEYS
+
 # Base colors as RGB tuples.
 COLORS = {
     "black":      (0, 0, 0),
@@ -27,6 +31,18 @@ def get_color(color_name):
     """
     return COLORS.get(color_name.lower(), COLORS["white"])
 
+# RGB_TABLE[color id] => (fg, bg) RGB tuples for COLOR_KEYS[color id].
+RGB_TABLE = []
+
+def cell_color_table():
+    """
+    Return RGB_TABLE, first adding entries for any color ids registered
+    since it was last extended.
+    """
+    for fg, bg in COLOR_KEYS[len(RGB_TABLE):]:
+        RGB_TABLE.append((get_color(fg), get_color(bg)))
+    return RGB_TABLE
+
 #seems archaic. plan to remove eventually.
 def parse_color_pair(pair_str):
     """
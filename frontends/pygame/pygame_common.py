@@ -1,9 +1,10 @@
 # File: pygame_common.py
-# version: 2.12 (updated to include _draw_art)
+# version: 2.13 (helpers return the screen rects they drew)
 #
 # Summary: Provides higher-level drawing helpers for frames, titles, instructions,
 #          styled text, and art. Uses unified pygame_utils and pygame_color_init for
-#          rendering text, colors, and themes.
+#          rendering text, colors, and themes. Each helper returns the screen
+#          rect(s) it drew, which scene layers report to the renderer.
 #
 # Tags: ui, rendering, pygame
 
@@ -16,32 +17,36 @@ from .where_pygame_themes_lives import CURRENT_THEME
 def _draw_art(screen, art_lines, start_row=1, start_col=2):
     """
     Renders a list of ASCII art lines starting at grid position (start_row, start_col)
-    using the 'ascii_art_color' from the current theme.
+    using the 'ascii_art_color' from the current theme. Returns the rects drawn.
     """
     ascii_art_color = CURRENT_THEME.get("ascii_art_color", "white_on_black")
     fg_color = get_foreground(ascii_art_color)
     grid_rows = screen.get_height() // CELL_HEIGHT
+    rects = []
     row = start_row
     for line in art_lines:
         if row >= grid_rows - 1:
             break
-        draw_text(screen, row, start_col, line, fg_color, clip=True)
+        rects.append(draw_text(screen, row, start_col, line, fg_color, clip=True))
         row += 1
+    return rects
 
 def draw_title(screen, text, row=1, color_name=None):
     """
     Draws a title string at the given grid row.
     If color_name is not provided, uses CURRENT_THEME's 'title_color'.
+    Returns the rect drawn.
     """
     if color_name is None:
         color_name = CURRENT_THEME["title_color"]
     fg_color = get_foreground(color_name)
-    draw_text(screen, row, 2, text, fg_color, clip=True)
+    return draw_text(screen, row, 2, text, fg_color, clip=True)
 
 def draw_instructions(screen, lines, from_bottom=2, color_name=None):
     """
     Draws a list of instruction lines near the bottom of the screen.
     If color_name is not provided, uses CURRENT_THEME's 'instructions_color'.
+    Returns the rects drawn.
     """
     if color_name is None:
         color_name = CURRENT_THEME["instructions_color"]
@@ -51,21 +56,34 @@ def draw_instructions(screen, lines, from_bottom=2, color_name=None):
     start_row = grid_rows - from_bottom - len(lines)
     if start_row < 1:
         start_row = 1
+    rects = []
     row = start_row
     for line in lines:
-        draw_text(screen, row, 2, line, fg_color, clip=True)
+        rects.append(draw_text(screen, row, 2, line, fg_color, clip=True))
         row += 1
+    return rects
+
+def frame_edge_rects(rect, thickness):
+    """
+    The four edge rects of a border of the given thickness drawn around 'rect'
+    (what pygame.draw.rect touches, rather than its whole bounding rect).
+    """
+    x, y, w, h = rect
+    return [pygame.Rect(x, y, w, thickness), pygame.Rect(x, y + h - thickness, w, thickness),
+            pygame.Rect(x, y, thickness, h), pygame.Rect(x + w - thickness, y, thickness, h)]
 
 def draw_screen_frame(screen, color_name=None):
     """
     Draws a rectangular border around the entire screen and a "Debug mode" label if enabled.
     If color_name is not provided, uses CURRENT_THEME's 'border_color'.
+    Returns the rects drawn.
     """
     if color_name is None:
         color_name = CURRENT_THEME["border_color"]
     max_w, max_h = screen.get_size()
     border_color = get_foreground(color_name)
     pygame.draw.rect(screen, border_color, pygame.Rect(0, 0, max_w, max_h), 1)
+    rects = frame_edge_rects((0, 0, max_w, max_h), 1)
     if debug.DEBUG_CONFIG.get("enabled", False):
         label = "Debug mode: On"
         font = pygame.font.Font(None, 24)
@@ -74,7 +92,8 @@ def draw_screen_frame(screen, color_name=None):
         label_width = text_surface.get_width()
         x = max_w - label_width - 6
         y = 0
-        screen.blit(text_surface, (x, y))
+        rects.append(screen.blit(text_surface, (x, y)))
+    return rects
 
 def draw_styled_text(screen, row, col, text, fg="white", bg=None, font_size=24, bold=False):
     """
@@ -85,6 +104,7 @@ def draw_styled_text(screen, row, col, text, fg="white", bg=None, font_size=24,
       - bg: Optional background color (if None, rendered transparently).
       - font_size: The size of the font.
       - bold: Whether to render the text in bold.
+    Returns the rect drawn.
     """
     fg_color = get_color(fg) if isinstance(fg, str) else fg
     bg_color = get_color(bg) if (bg and isinstance(bg, str)) else bg
@@ -93,14 +113,16 @@ def draw_styled_text(screen, row, col, text, fg="white", bg=None, font_size=24,
     text_surface = font.render(text, True, fg_color, bg_color)
     x = col * CELL_WIDTH
     y = row * CELL_HEIGHT
-    screen.blit(text_surface, (x, y))
+    return screen.blit(text_surface, (x, y))
 
 def draw_inside_frame_ch(screen, row, col, ch, attr):
     """
     Draws a single character at grid coordinates (row, col) if within frame boundaries.
+    Returns the rect drawn, or None if it was outside.
     """
     max_w, max_h = screen.get_size()
     grid_cols = max_w // CELL_WIDTH
     grid_rows = max_h // CELL_HEIGHT
     if 1 <= row < grid_rows - 1 and 1 <= col < grid_cols - 1:
-        draw_character(screen, row, col, ch, attr)
\ No newline at end of file
+        return draw_character(screen, row, col, ch, attr)
+    return None
\ No newline at end of file
@@ -1,5 +1,5 @@
 # File: pygame_effect_layers.py
-# version: 1.3
+# version: 1.4 (draw returns the rects of the particles drawn)
 #
 # Summary:
 #   Provides plugin layer classes for dynamic weather effects: Snow and Rain.
@@ -48,9 +48,13 @@ class SnowEffectLayer(SceneLayer):
                     flake["y"] = 1
                     flake["x"] = random.randint(1, width - 2)
         attr = get_foreground(self.color_name)
+        rects = []
         for flake in self.snowflakes:
             ch = random.choice(['*', '.'])
-            draw_inside_frame_ch(screen, flake["y"], flake["x"], ch, attr)
+            rect = draw_inside_frame_ch(screen, flake["y"], flake["x"], ch, attr)
+            if rect:
+                rects.append(rect)
+        return rects
 
 class RainEffectLayer(SceneLayer):
     def __init__(self, num_drops=50, color_name="blue_on_black", direction="down"):
@@ -100,6 +104,10 @@ class RainEffectLayer(SceneLayer):
                         drop["x"] = 1
                         drop["y"] = random.randint(1, height - 2)
         attr = get_foreground(self.color_name)
+        rects = []
         for drop in self.raindrops:
             ch = '|' if self.direction == "down" else '-'
-            draw_inside_frame_ch(screen, drop["y"], drop["x"], ch, attr)
\ No newline at end of file
+            rect = draw_inside_frame_ch(screen, drop["y"], drop["x"], ch, attr)
+            if rect:
+                rects.append(rect)
+        return rects
@@ -1,11 +1,50 @@
 # FileName: pygame_game_renderer.py
-# version: 4.2 (updated with get_surface() for dynamic use)
+# version: 5.7 (tile sprites on the per-cell path too)
 # Summary: A pygame-based renderer implementing IGameRenderer.
 #          Renders scene layers and provides access to the main display surface.
+#          render() draws the world from the backend-neutral shadow framebuffer
+#          (engine_cellbuffer.py): a camera scroll moves the map pixels, and only
+#          cells that differ from the last presented frame are drawn, copied
+#          from the glyph atlas (pygame_glyph_atlas.py) in one Surface.blits.
+#          Only the screen rects that changed are presented, with
+#          display.update(rects); past PRESENT_CONFIG limits, one flip.
+#          render_scene presents the rects its layers report drawing, this
+#          frame and the last (what was drawn then and not now is now black).
+#          With SMOOTH_SCROLL_CONFIG["enabled"], the map is instead built from
+#          pre-rendered chunk surfaces (pygame_chunk_cache.py) at a view
+#          position that eases toward the camera in pixels, so scrolling glides
+#          instead of jumping a tile at a time. Both paths use the tile sprites
+#          (pygame_sprite_atlas.py) once they have loaded, glyphs until then.
 # Tags: pygame, ui, renderer
 
+import math
+import time
+
 import pygame
 from engine.engine_interfaces import IGameRenderer
+from engine.engine_cellbuffer import (CellBuffer, TileCellCache, rect_difference, rect_tiles,
+                                      clip_rects)
+from . import pygame_utils
+from .pygame_glyph_atlas import get_glyph_atlas
+from .pygame_chunk_cache import ChunkSurfaceCache
+from .pygame_sprite_atlas import get_sprite_atlas, SpriteCellCache
+
+# How changed screen areas are presented: display.update(rects) while they
+# are small; a single flip once they cover 'flip_area_fraction' of the
+# screen. More than 'max_rects' rects are merged into their bounding rect.
+PRESENT_CONFIG = {
+    "flip_area_fraction": 0.5,
+    "max_rects": 64,
+}
+
+# Smooth scrolling: the view eases toward the camera at 'follow_rate' (1/s,
+# exponential), and jumps straight there when it is more than 'snap_tiles'
+# tiles away (a teleport or a new map).
+SMOOTH_SCROLL_CONFIG = {
+    "enabled": True,
+    "follow_rate": 14.0,
+    "snap_tiles": 12,
+}
 
 class PygameGameRenderer(IGameRenderer):
     def __init__(self, screen):
@@ -16,6 +55,29 @@ class PygameGameRenderer(IGameRenderer):
         self.map_top_offset = 3
         self.map_side_offset = 0
 
+        # Shadow of the map cells on screen: cell (0, 0) is the tile at the camera.
+        self.shadow = None
+        self.shadow_cell_size = None
+        self.cell_cache = TileCellCache()
+        self.sprite_cells = None    # SpriteCellCache once tile sprites have loaded
+        self.last_view = None
+        self.hud_rect = None
+
+        # Smooth scrolling: chunk surfaces, the eased view position (world
+        # pixels, float), where it was drawn (ints) and where it is heading.
+        self.chunk_cache = None
+        self.view_px = None
+        self.view_drawn = None
+        self.view_target = None
+        self.view_cell_size = None
+        self.view_time = 0.0
+        self.player_drawn_at = None
+
+        # Rects the layers drew in the last render_scene frame (None: present
+        # the whole screen next time) and the screen size then.
+        self.scene_rects = None
+        self.scene_size = None
+
         # Hide the mouse cursor for a cleaner UI.
         pygame.mouse.set_visible(False)
 
@@ -28,18 +90,22 @@ class PygameGameRenderer(IGameRenderer):
 
     def get_visible_size(self):
         """
-        Returns the visible size of the screen (in pixels) minus any offsets.
+        Returns the visible size of the map in grid cells (the engine's tiles),
+        minus any offsets.
         """
         width, height = self.screen.get_size()
-        visible_rows = height - self.map_top_offset
+        visible_rows = height // pygame_utils.CELL_HEIGHT - self.map_top_offset
         if visible_rows < 0:
             visible_rows = 0
-        visible_cols = width - self.map_side_offset
+        visible_cols = width // pygame_utils.CELL_WIDTH - self.map_side_offset
         return (visible_cols, visible_rows)
 
     def render_scene(self, scene, dt=0, context=None):
         """
         Renders a Scene object that provides .get_layers().
+        Each layer returns the rects it drew. Every frame starts from black,
+        so only those rects and the ones drawn last frame can have changed;
+        a layer that returns None makes the whole screen be presented.
         """
         # Clear the screen (fill with black).
         self.screen.fill((0, 0, 0))
@@ -51,8 +117,305 @@ class PygameGameRenderer(IGameRenderer):
         layers_sorted = sorted(layers, key=lambda layer: layer.z_index)
 
         # Draw each layer (lowest z_index drawn first).
+        rects = []
+        anywhere = False
         for layer in layers_sorted:
-            layer.draw(self, dt, context)
+            drawn = layer.draw(self, dt, context)
+            if drawn is None:
+                anywhere = True
+            else:
+                rects += drawn
 
         # Update the display.
-        pygame.display.flip()
\ No newline at end of file
+        size = self.screen.get_size()
+        last_rects = self.scene_rects
+        if anywhere or last_rects is None or size != self.scene_size:
+            self.scene_rects = None if anywhere else rects
+            self.scene_size = size
+            self._present([self.screen.get_rect()])
+            return
+        self.scene_rects = rects
+        # Static text is reported in the same place every frame: once is enough.
+        unique = {}
+        for rect in last_rects + rects:
+            if rect.width and rect.height:
+                unique[tuple(rect)] = rect
+        self._present(list(unique.values()))
+
+    def _present(self, rects):
+        """
+        Show the given changed rects: display.update(rects) while they are
+        small, one flip once they cover much of the screen.
+        """
+        if not rects:
+            return
+        if len(rects) > PRESENT_CONFIG["max_rects"]:
+            rects = [rects[0].unionall(rects[1:])]
+        screen_w, screen_h = self.screen.get_size()
+        area = sum(r.width * r.height for r in rects)
+        if area >= PRESENT_CONFIG["flip_area_fraction"] * screen_w * screen_h:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+    def render(self, model):
+        """
+        Called by the engine each frame: bring the world view up to date
+        (only changed cells are drawn), then the status line and perf HUD,
+        and present just the rects that changed.
+        """
+        # The world frame replaces whatever render_scene last presented.
+        self.scene_rects = None
+        full = model.full_redraw_needed
+        rects = []
+        if full:
+            rects.append(self._draw_status_line(model))
+
+        hud_lines = getattr(model, "perf_hud_lines", None)
+        if self.hud_rect is not None and not hud_lines:
+            # The HUD went away: repaint the map cells it covered.
+            if self.shadow is not None:
+                self.shadow.reset()
+                self.last_view = None
+            rects.append(self.hud_rect)
+            self.hud_rect = None
+
+        if SMOOTH_SCROLL_CONFIG["enabled"]:
+            rects += self._update_world_smooth(model, full)
+        else:
+            rects += self._update_world(model)
+        model.full_redraw_needed = False
+        model.ui_scroll_dx = 0
+        model.ui_scroll_dy = 0
+
+        if hud_lines:
+            self.hud_rect = self._draw_perf_hud(hud_lines)
+            rects.append(self.hud_rect)
+        self._present(rects)
+
+    def is_animating(self):
+        """
+        True while the smooth-scrolling view is still easing toward the camera.
+        """
+        return self.view_px is not None and self.view_px != self.view_target
+
+    def _ease_view(self, model, cell_w, cell_h):
+        """
+        Move the view position toward the camera (in world pixels) for the
+        time since the last frame. Returns (the integer position to draw at,
+        whether it differs from the last one drawn).
+        """
+        target = (model.camera_x * cell_w, model.camera_y * cell_h)
+        now = time.perf_counter()
+        view = self.view_px
+        snap = SMOOTH_SCROLL_CONFIG["snap_tiles"]
+        if (view is None or self.view_cell_size != (cell_w, cell_h)
+                or abs(target[0] - view[0]) > snap * cell_w
+                or abs(target[1] - view[1]) > snap * cell_h):
+            view = target
+        else:
+            dt = min(now - self.view_time, 0.1)
+            k = 1.0 - math.exp(-SMOOTH_SCROLL_CONFIG["follow_rate"] * dt)
+            view = (view[0] + (target[0] - view[0]) * k, view[1] + (target[1] - view[1]) * k)
+            if abs(target[0] - view[0]) < 0.5 and abs(target[1] - view[1]) < 0.5:
+                view = target
+        self.view_px, self.view_target = view, target
+        self.view_cell_size = (cell_w, cell_h)
+        self.view_time = now
+        drawn = (round(view[0]), round(view[1]))
+        moved = drawn != self.view_drawn
+        self.view_drawn = drawn
+        return drawn, moved
+
+    def _update_world_smooth(self, model, full):
+        """
+        Draw the map from chunk surfaces at the eased view position, then the
+        player on top. While the view moves (or if 'full') the whole map is
+        re-blitted, a few chunk blits; at rest, only the dirty tiles, the tiles
+        redrawn in their chunks and the player's old and new tiles are.
+        Returns the screen rects touched.
+        """
+        cols, rows = self.get_visible_size()
+        if cols <= 0 or rows <= 0:
+            return []
+        cell_w, cell_h = pygame_utils.CELL_WIDTH, pygame_utils.CELL_HEIGHT
+        map_rect = pygame.Rect(0, self.map_top_offset * cell_h, cols * cell_w, rows * cell_h)
+
+        atlas = get_glyph_atlas()
+        if self.chunk_cache is None or self.chunk_cache.model is not model:
+            self.chunk_cache = ChunkSurfaceCache(model)
+        chunks = self.chunk_cache
+        if chunks.sync(atlas, get_sprite_atlas()):
+            full = True    # new map, font or sprites: nothing on screen is current
+        changed = chunks.refresh_stale()
+
+        (vx, vy), moved = self._ease_view(model, cell_w, cell_h)
+        player = model.player
+        if full or moved:
+            chunks.blit_region(self.screen, map_rect, vx, vy)
+            rects = [map_rect]
+            redraw_player = True
+        else:
+            tiles = set(model.dirty_tiles)
+            tiles.update(changed)
+            tiles.add((player.x, player.y))
+            if self.player_drawn_at is not None:
+                tiles.add(self.player_drawn_at)
+            rects = []
+            for (x, y) in tiles:
+                rect = pygame.Rect(map_rect.x + x * cell_w - vx, map_rect.y + y * cell_h - vy,
+                                   cell_w, cell_h).clip(map_rect)
+                if rect.width and rect.height:
+                    chunks.blit_region(self.screen, rect, rect.x - map_rect.x + vx, rect.y - map_rect.y + vy)
+                    rects.append(rect)
+            redraw_player = bool(rects)
+
+        if redraw_player:
+            clip = self.screen.get_clip()
+            self.screen.set_clip(map_rect)
+            chunks.draw_player(self.screen, (map_rect.x + player.x * cell_w - vx,
+                                             map_rect.y + player.y * cell_h - vy), model)
+            self.screen.set_clip(clip)
+        self.player_drawn_at = (player.x, player.y)
+        return rects
+
+    def _draw_status_line(self, model):
+        """
+        Clear the rows above the map and show the inventory summary there.
+        """
+        cell_h = pygame_utils.CELL_HEIGHT
+        screen_w, _ = self.screen.get_size()
+        self.screen.fill((0, 0, 0), pygame.Rect(0, 0, screen_w, self.map_top_offset * cell_h))
+        player = model.player
+        text = f"Inventory: Gold={player.gold}, Wood={player.wood}, Stone={player.stone}"
+        pygame_utils.draw_text(self.screen, 1, 2, text, (255, 255, 255), clip=True)
+        return pygame.Rect(0, 0, screen_w, self.map_top_offset * cell_h)
+
+    def _update_world(self, model):
+        """
+        Draw the map cells that differ from the shadow buffer: dirty tiles in
+        view (the whole view for a full redraw, see GameEngine.render) and
+        anything a camera scroll exposed. Returns the screen rects touched:
+        the whole map after a scroll, else one rect per row run of changed cells.
+        """
+        cols, rows = self.get_visible_size()
+        if cols <= 0 or rows <= 0:
+            return []
+        cell_w, cell_h = pygame_utils.CELL_WIDTH, pygame_utils.CELL_HEIGHT
+        top = self.map_top_offset * cell_h
+        view = (model.camera_x, model.camera_y, model.camera_x + cols - 1, model.camera_y + rows - 1)
+
+        cells = self._sync_sprite_cells(cell_w, cell_h)
+        map_rect = pygame.Rect(0, top, cols * cell_w, rows * cell_h)
+        scrolled = False
+        shadow = self.shadow
+        if (shadow is None or (shadow.cols, shadow.rows) != (cols, rows)
+                or self.shadow_cell_size != (cell_w, cell_h)):
+            shadow = self.shadow = CellBuffer(cols, rows, view[0], view[1])
+            self.shadow_cell_size = (cell_w, cell_h)
+            self.last_view = None
+        elif (shadow.x0, shadow.y0) != (view[0], view[1]):
+            # Scroll the map pixels along with the camera; the shadow follows.
+            # The perf HUD covers part of the map: put the map cells under it
+            # back first, or the scroll would drag the HUD across the map.
+            if self.hud_rect is not None:
+                self._repaint_under(shadow, self.hud_rect.clip(map_rect), top)
+            dx, dy = view[0] - shadow.x0, view[1] - shadow.y0
+            self.screen.set_clip(map_rect)
+            self.screen.scroll(-dx * cell_w, -dy * cell_h)
+            self.screen.set_clip(None)
+            shadow.move_origin(view[0], view[1])
+            scrolled = True
+
+        x0, y0 = view[0], view[1]
+        rects = rect_difference(view, self.last_view) + clip_rects(model.dirty_tiles.rects(), view)
+        changed = shadow.diff(model, cells, rect_tiles(rects))
+        self.last_view = view
+
+        if changed:
+            self._draw_map_cells(
+                [(((wx - x0) * cell_w, top + (wy - y0) * cell_h), cell) for (wx, wy, cell) in changed])
+        if scrolled:
+            return [map_rect]
+
+        # Merge horizontally adjacent changed cells into one rect per run.
+        rects = []
+        run_y = run_x0 = run_x1 = None
+        for (wx, wy, _) in changed:
+            if wy == run_y and wx == run_x1 + 1:
+                run_x1 = wx
+                continue
+            if run_y is not None:
+                rects.append(pygame.Rect((run_x0 - x0) * cell_w, top + (run_y - y0) * cell_h,
+                                         (run_x1 - run_x0 + 1) * cell_w, cell_h))
+            run_y, run_x0, run_x1 = wy, wx, wx
+        if run_y is not None:
+            rects.append(pygame.Rect((run_x0 - x0) * cell_w, top + (run_y - y0) * cell_h,
+                                     (run_x1 - run_x0 + 1) * cell_w, cell_h))
+        return rects
+
+    def _repaint_under(self, shadow, rect, top):
+        """
+        Redraw the map cells the shadow holds for the screen 'rect' (inside
+        the map), e.g. where an overlay was drawn over them.
+        """
+        cell_w, cell_h = pygame_utils.CELL_WIDTH, pygame_utils.CELL_HEIGHT
+        cells, cols = shadow.cells, shadow.cols
+        placed = []
+        for r in range((rect.top - top) // cell_h, -(-(rect.bottom - top) // cell_h)):
+            for c in range(rect.left // cell_w, -(-rect.right // cell_w)):
+                cell = cells[r * cols + c]
+                if cell is not None:
+                    placed.append(((c * cell_w, top + r * cell_h), cell))
+        if placed:
+            self._draw_map_cells(placed)
+
+    def _sync_sprite_cells(self, cell_w, cell_h):
+        """
+        The cache the shadow is diffed with: a SpriteCellCache once tile
+        sprites have loaded for this cell size, else the glyph cell cache.
+        When that changes (sprites landed, font resized), the shadow is
+        reset so every visible cell is drawn again.
+        """
+        sprite_atlas = get_sprite_atlas()
+        packed = None
+        if sprite_atlas is not None and sprite_atlas.generation:
+            packed = sprite_atlas.packed(cell_w, cell_h)
+            if not packed[2]:
+                packed = None
+        current = self.sprite_cells.packed if self.sprite_cells is not None else None
+        if packed is not current:
+            self.sprite_cells = SpriteCellCache(self.cell_cache, packed) if packed else None
+            if self.shadow is not None:
+                self.shadow.reset()
+                self.last_view = None
+        return self.sprite_cells or self.cell_cache
+
+    def _draw_map_cells(self, placed):
+        """
+        Draw [(dest (x, y), cell), ...] shadow cells onto the screen.
+        """
+        if self.sprite_cells is not None:
+            self.sprite_cells.draw(get_glyph_atlas(), self.screen, placed)
+        else:
+            get_glyph_atlas().draw_cells(self.screen, placed)
+
+    def _draw_perf_hud(self, lines):
+        """
+        Draw the perf HUD in the top-right corner on a solid background,
+        and return the rect that was touched.
+        """
+        cell_w, cell_h = pygame_utils.CELL_WIDTH, pygame_utils.CELL_HEIGHT
+        screen_w, _ = self.screen.get_size()
+        cols = len(lines[0]) + 1
+        col = max(0, screen_w // cell_w - cols)
+        row = self.map_top_offset
+
+        rect = pygame.Rect(col * cell_w, row * cell_h, cols * cell_w, len(lines) * cell_h)
+        self.screen.fill((0, 0, 0), rect)
+        # Keep glyph overhangs inside the rect, so it is all the HUD touches.
+        self.screen.set_clip(rect)
+        for i, line in enumerate(lines):
+            pygame_utils.draw_text(self.screen, row + i, col, line, (255, 255, 0))
+        self.screen.set_clip(None)
+        return rect
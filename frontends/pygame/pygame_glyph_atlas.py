@@ -0,0 +1,82 @@
+# FileName: pygame_glyph_atlas.py
+# version: 1.0
+# Summary: Glyph atlas for the pygame world view. Each map cell (char, color_id)
+#          from engine_cellbuffer is rendered once (background fill plus glyph)
+#          into a slot of one atlas surface; drawing cells is then a single
+#          Surface.blits call with no font rendering. The atlas is rebuilt only
+#          when update_cell_sizes picks a new font size.
+# Tags: pygame, rendering, performance
+
+import pygame
+
+from . import pygame_utils
+from .pygame_color_init import cell_color_table
+
+# Slots per atlas row; the atlas grows by doubling its number of rows.
+ATLAS_COLUMNS = 32
+ATLAS_START_ROWS = 8
+
+
+class GlyphAtlas:
+    """
+    Pre-rendered cells for one font size. area(cell) returns the atlas rect
+    holding the cell, rendering it into the next free slot on first use.
+    """
+    def __init__(self, font, font_size, cell_w, cell_h):
+        self.font = font
+        self.font_size = font_size
+        self.cell_w, self.cell_h = cell_w, cell_h
+        self.areas = {}
+        self.surface = self._new_surface(ATLAS_START_ROWS)
+
+    def _new_surface(self, rows):
+        surface = pygame.Surface((ATLAS_COLUMNS * self.cell_w, rows * self.cell_h))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        return surface
+
+    def _grow(self):
+        rows = self.surface.get_height() // self.cell_h
+        surface = self._new_surface(rows * 2)
+        surface.blit(self.surface, (0, 0))
+        self.surface = surface
+
+    def area(self, cell):
+        rect = self.areas.get(cell)
+        if rect is None:
+            slot = len(self.areas)
+            row, col = divmod(slot, ATLAS_COLUMNS)
+            if (row + 1) * self.cell_h > self.surface.get_height():
+                self._grow()
+            rect = pygame.Rect(col * self.cell_w, row * self.cell_h, self.cell_w, self.cell_h)
+            ch, cid = cell
+            fg, bg = cell_color_table()[cid]
+            self.surface.fill(bg, rect)
+            self.surface.set_clip(rect)
+            self.surface.blit(self.font.render(ch, True, fg), rect.topleft)
+            self.surface.set_clip(None)
+            self.areas[cell] = rect
+        return rect
+
+    def draw_cells(self, target, placed):
+        """
+        Draw [(dest (x, y), cell), ...] onto 'target' in one blits call.
+        """
+        area = self.area
+        areas = [area(cell) for (_, cell) in placed]
+        surface = self.surface   # after any growth above
+        target.blits([(surface, dest, rect) for ((dest, _), rect) in zip(placed, areas)], doreturn=False)
+
+
+_ATLAS = None
+
+def get_glyph_atlas():
+    """
+    The atlas for the current pygame_utils font; replaced only when
+    update_cell_sizes has changed the font size.
+    """
+    global _ATLAS
+    if _ATLAS is None or _ATLAS.font_size != pygame_utils.FONT_SIZE:
+        _ATLAS = GlyphAtlas(pygame_utils.DEFAULT_FONT, pygame_utils.FONT_SIZE,
+                            pygame_utils.CELL_WIDTH, pygame_utils.CELL_HEIGHT)
+    return _ATLAS
@@ -1,8 +1,10 @@
 # FileName: pygame_input.py
-# version: 1.0
+# version: 1.4 (wait_for_input leaves queued events in order)
 # Summary: Pygame-based input class implementing IGameInput from engine_interfaces.
 # Tags: input, pygame
 
+import math
+
 import pygame
 from engine.engine_interfaces import IGameInput
 
@@ -39,6 +41,8 @@ class PygameGameInput(IGameInput):
                     actions.append("SAVE_QUICK")
                 elif event.key == pygame.K_v:
                     actions.append("DEBUG_TOGGLE")
+                elif event.key == pygame.K_f:
+                    actions.append("PERF_TOGGLE")
 
                 # Editor
                 elif event.key in (pygame.K_p, ):
@@ -57,3 +61,19 @@ class PygameGameInput(IGameInput):
                     actions.append("SHOW_INVENTORY")
 
         return actions
+
+    def wait_for_input(self, timeout):
+        """
+        Block on the pygame event queue for up to 'timeout' seconds.
+        Returns at once if events are already queued (waiting would pop
+        one, and re-posting it would put it behind the others). Otherwise
+        the event received is re-posted so get_actions() still sees it.
+        The wait is rounded up to whole milliseconds, at least 1: to
+        pygame.event.wait a timeout of 0 means no timeout at all.
+        """
+        if pygame.event.peek():
+            return True
+        event = pygame.event.wait(max(1, math.ceil(timeout * 1000)))
+        if event.type != pygame.NOEVENT:
+            pygame.event.post(event)
+        return True
@@ -1,5 +1,5 @@
 # File: pygame_layer_presets.py
-# version: 1.1
+# version: 1.2 (layers return the rects they drew)
 #
 # Summary:
 #   Provides preset layers for pygame: a base erase layer that clears the screen
@@ -19,6 +19,8 @@ class BaseEraseLayer(SceneLayer):
         # In pygame, clear the screen by filling it with a background color (e.g., black).
         screen = renderer.screen
         screen.fill((0, 0, 0))
+        # The black background is what every frame starts from; nothing to report.
+        return []
 
 class FrameArtLayer(SceneLayer):
     def __init__(self, art_key, z_index=100, start_row=3, start_col=2):
@@ -29,6 +31,7 @@ class FrameArtLayer(SceneLayer):
 
     def draw(self, renderer, dt, context):
         screen = renderer.screen
-        draw_screen_frame(screen)
+        rects = draw_screen_frame(screen)
         lines = CURRENT_THEME.get(self.art_key, [])
-        _draw_art(screen, lines, start_row=self.start_row, start_col=self.start_col)
\ No newline at end of file
+        rects += _draw_art(screen, lines, start_row=self.start_row, start_col=self.start_col)
+        return rects
\ No newline at end of file
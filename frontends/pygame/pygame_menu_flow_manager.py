@@ -1,5 +1,5 @@
 # File: pygame_menu_flow_manager.py
-# version: 4.9 (modernized)
+# version: 5.0 (render_scene presents the frame itself)
 #
 # Summary:
 #   High-level MenuFlowManager for main menu screens (HOME, SETTINGS, PLAY)
@@ -47,8 +47,7 @@ class MenuFlowManager:
         dt = 0
 
         while True:
-            renderer.render_scene(scene, dt=dt, context=None)
-            pygame.display.flip()
+            renderer.render_scene(scene, dt=dt, context=None)  # presents what changed
             dt += 1
 
             for event in pygame.event.get():
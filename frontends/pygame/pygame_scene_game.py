@@ -1,5 +1,5 @@
 # File: pygame_scene_game.py
-# version: 2.0
+# version: 2.1 (layers report that they drew nothing)
 #
 # Summary:
 #   Defines a GameScene that encapsulates the game loop.
@@ -26,7 +26,7 @@ class GameBackgroundLayer(SceneLayer):
         # Optionally add extra background effects here.
         # For now, we leave this empty because run_game_loop handles full
         # drawing of the game world.
-        pass
+        return []
 
 class GameOverlayLayer(SceneLayer):
     def __init__(self):
@@ -34,7 +34,7 @@ class GameOverlayLayer(SceneLayer):
     
     def draw(self, renderer, dt, context):
         # Here you could add HUD elements, inventory displays, or an editor overlay.
-        pass
+        return []
 
 class GameScene(Scene):
     def __init__(self, model, context):
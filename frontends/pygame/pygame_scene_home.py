@@ -1,5 +1,5 @@
 # File: pygame_scene_home.py
-# version: 1.5.0 (updated to remove legacy curses rendering)
+# version: 1.6.0 (layers return the rects they drew)
 #
 # Summary:
 #   Defines HomeScene using plugin layers: a base erase layer, a background art layer,
@@ -21,6 +21,7 @@
 import pygame
 from .pygame_scene_base import Scene
 from .pygame_scene_layer_base import SceneLayer
+from .pygame_common import frame_edge_rects
 from .where_pygame_themes_lives import CURRENT_THEME
 from .pygame_utils import (
     draw_text,         # Renamed from safe_addstr to reflect pygame-only drawing.
@@ -42,6 +43,8 @@ class PygameBaseEraseLayer(SceneLayer):
         screen.fill((0, 0, 0))
         # Legacy (curses-style) clear code commented out:
         # screen.fill((0, 0, 0))  # [LEGACY]
+        # The black background is what every frame starts from; nothing to report.
+        return []
 
 ###############################################################################
 # Frame Art Layer (Background Art)
@@ -54,12 +57,14 @@ class PygameFrameArtLayer(SceneLayer):
         self.border_thickness = 4  # Base thickness; will be scaled.
 
     def _draw_art(self, screen, art_lines, start_row=2, start_col=2):
-        """Draws a list of ASCII art lines onto the screen."""
+        """Draws a list of ASCII art lines onto the screen; returns the rects drawn."""
+        rects = []
         row = start_row
         for line in art_lines:
             # Use the pygame draw_text helper (replacing legacy safe_addstr)
-            draw_text(screen, row, start_col, line, (255, 255, 255))
+            rects.append(draw_text(screen, row, start_col, line, (255, 255, 255)))
             row += 1
+        return rects
 
     def draw(self, renderer, dt, context):
         screen = renderer.get_surface()
@@ -67,10 +72,12 @@ class PygameFrameArtLayer(SceneLayer):
         # Compute a scaled border thickness.
         thickness = max(1, get_scaled_value(self.border_thickness))
         pygame.draw.rect(screen, self.border_color, (0, 0, w, h), thickness)
+        rects = frame_edge_rects((0, 0, w, h), thickness)
         # Get art lines from the current theme.
         art_lines = CURRENT_THEME.get(self.art_key, [])
         if art_lines:
-            self._draw_art(screen, art_lines, start_row=2, start_col=2)
+            rects += self._draw_art(screen, art_lines, start_row=2, start_col=2)
+        return rects
 
 ###############################################################################
 # Home Title Layer
@@ -89,7 +96,7 @@ class PygameHomeTitleLayer(SceneLayer):
         text_surface = font.render(self.title_text, True, self.title_color)
         pos_x = get_scaled_value(50)
         pos_y = get_scaled_value(30)
-        screen.blit(text_surface, (pos_x, pos_y))
+        return [screen.blit(text_surface, (pos_x, pos_y))]
 
 ###############################################################################
 # Home Menu Layer
@@ -113,11 +120,13 @@ class PygameHomeMenuLayer(SceneLayer):
         start_y = h - (len(self.menu_lines) * line_height) - get_scaled_value(20)
         y = start_y
         pos_x = get_scaled_value(50)
+        rects = []
         for i, text in enumerate(self.menu_lines):
             color = (255, 255, 0) if i == self.current_select_slot else (200, 200, 200)
             surf = font.render(text, True, color)
-            screen.blit(surf, (pos_x, y))
+            rects.append(screen.blit(surf, (pos_x, y)))
             y += line_height
+        return rects
 
     def move_selection_up(self):
         self.current_select_slot = max(0, self.current_select_slot - 1)
@@ -1,9 +1,10 @@
 # File: pygame_scene_layer_base.py
-# version: 1.0
+# version: 1.1 (draw() returns the screen rects it drew)
 #
 # Summary:
 #   Provides the base class for scene layers (plugin objects that know how to draw)
 #   in pygame. Each layer has a name, a z_index, and a .draw(renderer, dt, context) method.
+#   draw() returns the screen rects it drew, so the renderer presents only those.
 #
 # Tags: scene, layer, base, pygame
 
@@ -12,7 +13,8 @@ class SceneLayer:
     Base class for 'layer plugins'. Each layer knows:
       - self.name: a string identifying the layer.
       - self.z_index: an integer controlling draw order.
-      - a .draw(renderer, dt, context) method to perform drawing.
+      - a .draw(renderer, dt, context) method to perform drawing, returning
+        the list of screen rects it drew on (None: anywhere on the screen).
     """
     def __init__(self, name, z_index=0):
         self.name = name
@@ -24,5 +26,7 @@ class SceneLayer:
         :param renderer: instance of your renderer (e.g., PygameGameRenderer)
         :param dt: a time delta or frame count for animations
         :param context: a game model or dictionary of data
+        :return: the screen rects drawn on; None if the layer can't tell,
+                 which makes the renderer present the whole screen
         """
-        pass
+        return []
@@ -1,5 +1,5 @@
 # File: pygame_scene_load.py
-# version: 2.5
+# version: 2.6 (layers return the rects they drew)
 #
 # Summary:
 #   Defines LoadScene – a plugin‐based scene for loading or generating a map.
@@ -30,11 +30,12 @@ class LoadHeaderLayer(SceneLayer):
 
     def draw(self, renderer, dt, context):
         screen = renderer.screen
-        draw_title(screen, "Load Map", row=1)
+        rects = [draw_title(screen, "Load Map", row=1)]
         instructions = [
             "↑/↓ = select, ENTER = load, 'd' = del, 'q' = back, 'v' = dbg"
         ]
-        draw_instructions(screen, instructions, from_bottom=3)
+        rects += draw_instructions(screen, instructions, from_bottom=3)
+        return rects
 
 class LoadMenuLayer(SceneLayer):
     def __init__(self):
@@ -44,23 +45,31 @@ class LoadMenuLayer(SceneLayer):
         self.options.extend(maps)
         self.current_index = 0
         self.frame_count = 0
+        # Set when a prompt was drawn straight to the screen, outside any layer.
+        self.prompt_shown = False
 
     def draw(self, renderer, dt, context):
         screen = renderer.screen
         max_w, max_h = screen.get_size()  # (width, height)
         row = 10  # Start drawing options at grid row 10.
+        rects = []
         for i, option in enumerate(self.options):
             display_text = option if i == 0 else f"{i}) {option}"
             is_selected = (i == self.current_index)
-            draw_global_selector_line(
+            rects.append(draw_global_selector_line(
                 screen,
                 row,
                 f"> {display_text}" if is_selected else f"  {display_text}",
                 is_selected=is_selected,
                 frame=self.frame_count
-            )
+            ))
             row += 1
         self.frame_count += 1
+        if self.prompt_shown:
+            # The prompt's pixels are not in any layer's rects: present everything.
+            self.prompt_shown = False
+            return None
+        return rects
 
     def handle_key(self, key):
         if key in (pygame.K_UP, pygame.K_w):
@@ -80,6 +89,7 @@ class LoadMenuLayer(SceneLayer):
             if self.current_index > 0:
                 to_delete = self.options[self.current_index]
                 confirm = prompt_delete_confirmation(to_delete)
+                self.prompt_shown = True
                 if confirm:
                     success = delete_map_file(to_delete)
                     if success:
@@ -1,5 +1,5 @@
 # File: pygame_scene_save.py
-# version: 2.1
+# version: 2.2 (layers return the rects they drew)
 #
 # Summary:
 #   Contains all save‐scene UI flows for picking/creating filenames,
@@ -29,9 +29,10 @@ class SaveHeaderLayer(SceneLayer):
 
     def draw(self, renderer, dt, context):
         screen = renderer.screen
-        draw_title(screen, "Save Map", row=1)
+        rects = [draw_title(screen, "Save Map", row=1)]
         instructions = ["Select a map to overwrite, 'n' for new, ENTER to cancel, 'v' toggles debug"]
-        draw_instructions(screen, instructions, from_bottom=3)
+        rects += draw_instructions(screen, instructions, from_bottom=3)
+        return rects
 
 class SaveMenuLayer(SceneLayer):
     def __init__(self, files):
@@ -46,16 +47,18 @@ class SaveMenuLayer(SceneLayer):
         from .pygame_color_init import get_foreground
         attr_prompt = get_foreground(CURRENT_THEME["prompt_color"])
         attr_menu_item = get_foreground(CURRENT_THEME["menu_item_color"])
+        rects = []
         if self.files:
-            draw_text(screen, row, 2, "Maps (pick number to overwrite) or 'n' for new, or ENTER to cancel:", attr_prompt, clip=True)
+            rects.append(draw_text(screen, row, 2, "Maps (pick number to overwrite) or 'n' for new, or ENTER to cancel:", attr_prompt, clip=True))
             row += 1
             for i, filename in enumerate(self.files, start=1):
                 indicator = ">" if (i - 1) == self.current_index else " "
-                draw_text(screen, row, 2, f"{indicator} {i}. {filename}", attr_menu_item, clip=True)
+                rects.append(draw_text(screen, row, 2, f"{indicator} {i}. {filename}", attr_menu_item, clip=True))
                 row += 1
-            draw_text(screen, row, 2, "Enter choice or press ENTER to cancel:", attr_prompt, clip=True)
+            rects.append(draw_text(screen, row, 2, "Enter choice or press ENTER to cancel:", attr_prompt, clip=True))
         else:
-            draw_text(screen, row, 2, "No existing maps. Press 'n' for new, 'v' toggles debug, or ENTER to cancel:", attr_prompt, clip=True)
+            rects.append(draw_text(screen, row, 2, "No existing maps. Press 'n' for new, 'v' toggles debug, or ENTER to cancel:", attr_prompt, clip=True))
+        return rects
 
     def handle_key(self, key):
         if key in (pygame.K_UP, pygame.K_w):
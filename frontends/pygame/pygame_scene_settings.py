@@ -1,5 +1,5 @@
 # File: pygame_scene_settings.py
-# version: 2.4 (updated to use shared layers and standardized text colors)
+# version: 2.5 (layers return the rects they drew)
 #
 # Summary:
 #   Defines the SettingsScene using plugin layers.
@@ -24,7 +24,7 @@ class SettingsTitleLayer(SceneLayer):
 
     def draw(self, renderer, dt, context):
         screen = renderer.screen
-        draw_title(screen, "Settings (Placeholder)", row=1)
+        return [draw_title(screen, "Settings (Placeholder)", row=1)]
 
 class SettingsMenuLayer(SceneLayer):
     def __init__(self):
@@ -40,14 +40,16 @@ class SettingsMenuLayer(SceneLayer):
         max_w, max_h = screen.get_size()
         start_row = 4
         row = start_row
+        rects = []
         for i, line in enumerate(self.menu_lines):
             is_selected = (i == self.current_select_slot)
-            draw_global_selector_line(
+            rects.append(draw_global_selector_line(
                 screen, row, line,
                 is_selected=is_selected,
                 frame=dt  # Use dt as the frame count for animation effects.
-            )
+            ))
             row += 1
+        return rects
 
     def handle_key(self, key):
         if key == pygame.K_v:
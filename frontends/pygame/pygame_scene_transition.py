@@ -1,5 +1,5 @@
 # File: pygame_scene_transition.py
-# version: 1.2
+# version: 1.3 (layers return the rects they drew)
 #
 # Summary:
 #   Provides a CrossFadeTransitionScene that smoothly blends from one scene to another
@@ -42,12 +42,16 @@ class CrossFadeBackgroundLayer(SceneLayer):
 
     def draw(self, renderer, dt, context):
         # In Phase 1, draw the current scene; after that, draw the next scene.
-        if dt < self.phase1_duration:
-            for layer in self.current_scene.layers:
-                layer.draw(renderer, dt, context)
-        else:
-            for layer in self.next_scene.layers:
-                layer.draw(renderer, dt, context)
+        scene = self.current_scene if dt < self.phase1_duration else self.next_scene
+        rects = []
+        anywhere = False
+        for layer in scene.layers:
+            drawn = layer.draw(renderer, dt, context)
+            if drawn is None:
+                anywhere = True
+            else:
+                rects += drawn
+        return None if anywhere else rects
 
 
 class CrossFadeRainLayer(SceneLayer):
@@ -84,14 +88,18 @@ class CrossFadeRainLayer(SceneLayer):
         num_drops = int(self.max_drops * density_factor)
         drops = self._generate_raindrops(screen, num_drops)
         attr = get_foreground(self.color_name)
+        rects = []
         for drop in drops:
             # Draw a rain drop (here represented by a vertical bar).
             try:
                 ch = '|'
-                draw_inside_frame_ch(screen, drop["y"], drop["x"], ch, attr)
+                rect = draw_inside_frame_ch(screen, drop["y"], drop["x"], ch, attr)
+                if rect:
+                    rects.append(rect)
             except Exception:
                 # In pygame, drawing errors are less common.
                 pass
+        return rects
 
 
 class CrossFadeTransitionScene(Scene):
@@ -1,5 +1,5 @@
 # File: pygame_selector_highlight.py
-# version: 1.5
+# version: 1.6 (draw_global_selector_line returns the rect drawn)
 #
 # Summary: Provides a globally configurable highlight/selector system for pygame.
 #          This system modifies text colors for selected text using pygame's native rendering.
@@ -60,10 +60,11 @@ def get_selector_effect_color(effect="REVERSE_BLINK", base_color=(255, 255, 255)
         return invert_color(base_color) if toggle_state == 0 else base_color
     return base_color
 
-def draw_global_selector_line(screen, row: int, text: str, is_selected: bool=False, frame: int=0) -> None:
+def draw_global_selector_line(screen, row: int, text: str, is_selected: bool=False, frame: int=0) -> pygame.Rect:
     """
     Draws a text line at a given grid row using the global selector configuration.
     When selected, the text color is modified by the specified effect.
+    Returns the rect drawn.
     """
     config = get_global_selector_config()
     selected_color_name   = config["selected_color_name"]
@@ -79,4 +80,4 @@ def draw_global_selector_line(screen, row: int, text: str, is_selected: bool=Fal
         modified_color = get_foreground(unselected_color_name)
 
     # Draw the text at grid row 'row' and column 2.
-    draw_text(screen, row, 2, text, modified_color)
\ No newline at end of file
+    return draw_text(screen, row, 2, text, modified_color)
\ No newline at end of file
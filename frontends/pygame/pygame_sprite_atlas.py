@@ -0,0 +1,192 @@
+# FileName: pygame_sprite_atlas.py
+# version: 1.1 (tile_sprite_keys shared by both map paths; SpriteCellCache)
+# Summary: Tile sprites for the pygame frontend, from each scenery definition's
+#          "tile_image". Images are decoded once, lazily, on a background thread
+#          (the first get_sprite_atlas() call starts it), so startup never waits
+#          on image files. For each cell size the loaded images are scaled once
+#          and packed into one atlas surface. Definitions whose file is missing
+#          or unreadable have no sprite; the renderer draws those tiles from the
+#          ASCII glyph atlas instead.
+#          tile_sprite_keys() picks a tile's sprites from its compiled stack;
+#          SpriteCellCache lets the per-cell shadow path (smooth scrolling
+#          off) diff and draw sprite tiles the way the chunk path does.
+# Tags: pygame, rendering, sprites, assets
+
+import os
+import threading
+
+import pygame
+
+from engine.engine_cellbuffer import BLANK_CELL
+from scenery.scenery_manager import ALL_SCENERY_DEFS
+
+SPRITE_CONFIG = {
+    "enabled": True,
+    # "tile_image" paths are relative to the project root.
+    "asset_root": os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    # The local player has no scenery definition; this is its image.
+    "player_image": "assets/tiles/player.png",
+}
+
+# Sprite key of the local player (definition ids are the other keys).
+PLAYER_SPRITE = "@player"
+
+# Slots per row of a packed atlas.
+ATLAS_COLUMNS = 16
+
+
+def sprite_sources():
+    """
+    {sprite key: image path} for every definition with a "tile_image",
+    plus the player.
+    """
+    sources = {def_id: info["tile_image"] for def_id, info in ALL_SCENERY_DEFS.items()
+               if info.get("tile_image")}
+    if SPRITE_CONFIG["player_image"]:
+        sources[PLAYER_SPRITE] = SPRITE_CONFIG["player_image"]
+    return sources
+
+
+def tile_sprite_keys(areas, stack):
+    """
+    Sprite keys to draw for a compiled tile stack, bottom first, or None if
+    it has no complete sprite (no floor sprite under an object sprite, say).
+    'areas' is the {key: rect} of a packed atlas.
+    """
+    floor_id, top_id = stack[2], stack[3]
+    if top_id is None or top_id not in areas:
+        return None
+    if top_id == floor_id:
+        return (top_id,)
+    if floor_id is None or floor_id not in areas:
+        return None
+    return (floor_id, top_id)
+
+
+class SpriteCellCache:
+    """
+    Wraps a TileCellCache for CellBuffer.diff when sprites are loaded. A
+    tile with sprites gives (base cell, sprite keys): the base glyph cell is
+    drawn, then the sprites over it. Any other tile gives its glyph cell.
+    The player's tile is resolved like ChunkSurfaceCache.draw_player does.
+    """
+    def __init__(self, cells, packed):
+        self.cells = cells
+        self.packed = packed
+        self.areas = packed[2]
+
+    def get(self, model, wx, wy):
+        stack = model.tile_stacks.get(wx, wy)
+        keys = tile_sprite_keys(self.areas, stack)
+        player = model.player
+        if player is not None and player.x == wx and player.y == wy:
+            if stack[1] is None and PLAYER_SPRITE in self.areas:
+                if keys:
+                    return (BLANK_CELL, keys + (PLAYER_SPRITE,))
+                return (stack[0] or BLANK_CELL, (PLAYER_SPRITE,))
+            if stack[1] is None or not keys:
+                return self.cells.get(model, wx, wy)
+        if keys:
+            return (BLANK_CELL, keys)
+        return self.cells.get(model, wx, wy)
+
+    def draw(self, glyph_atlas, target, placed):
+        """
+        Draw [(dest (x, y), cell), ...] of get() results onto 'target':
+        the glyph cells in one blits call, then the sprites.
+        """
+        glyphs = []
+        sprite_blits = []
+        sheet, areas = self.packed[1], self.areas
+        for (pos, cell) in placed:
+            if isinstance(cell[0], str):
+                glyphs.append((pos, cell))
+            else:
+                glyphs.append((pos, cell[0]))
+                sprite_blits.extend((sheet, pos, areas[key]) for key in cell[1])
+        glyph_atlas.draw_cells(target, glyphs)
+        if sprite_blits:
+            target.blits(sprite_blits, doreturn=False)
+
+
+class SpriteAtlas:
+    """
+    Decoded tile images ('images', filled in by the loader thread) and, per
+    cell size, the packed atlas of them scaled to one cell. 'generation'
+    goes up when loaded images land, so users can tell when to redraw.
+    """
+    def __init__(self, sources):
+        self.sources = sources
+        self.images = {}
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._packed = {}    # (cell_w, cell_h) => (generation, surface, {key: rect})
+        self._thread = threading.Thread(target=self._load_all, name="sprite-loader", daemon=True)
+        self._thread.start()
+
+    def _load_all(self):
+        """
+        Decode every source image, then publish them together (one new
+        generation, so users redraw once rather than per image).
+        """
+        root = SPRITE_CONFIG["asset_root"]
+        images = {}
+        for key, path in self.sources.items():
+            full_path = os.path.join(root, path)
+            if not os.path.isfile(full_path):
+                continue
+            try:
+                images[key] = pygame.image.load(full_path)
+            except (pygame.error, OSError):
+                continue
+        if images:
+            with self._lock:
+                self.images.update(images)
+                self.generation += 1
+
+    def _pack(self, cell_w, cell_h):
+        with self._lock:
+            images = dict(self.images)
+            generation = self.generation
+        keys = sorted(images)
+        rows = max(1, -(-len(keys) // ATLAS_COLUMNS))
+        surface = pygame.Surface((ATLAS_COLUMNS * cell_w, rows * cell_h), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        surface.fill((0, 0, 0, 0))
+        areas = {}
+        for slot, key in enumerate(keys):
+            row, col = divmod(slot, ATLAS_COLUMNS)
+            rect = pygame.Rect(col * cell_w, row * cell_h, cell_w, cell_h)
+            image = images[key]
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha()
+            surface.blit(pygame.transform.smoothscale(image, (cell_w, cell_h)), rect.topleft)
+            areas[key] = rect
+        packed = self._packed[(cell_w, cell_h)] = (generation, surface, areas)
+        return packed
+
+    def packed(self, cell_w, cell_h):
+        """
+        (generation, atlas surface, {sprite key: rect}) for the cell size,
+        repacked when more images have loaded since.
+        """
+        packed = self._packed.get((cell_w, cell_h))
+        if packed is None or packed[0] != self.generation:
+            packed = self._pack(cell_w, cell_h)
+        return packed
+
+
+_SPRITES = None
+
+def get_sprite_atlas():
+    """
+    The shared SpriteAtlas, starting the background load on first call.
+    None if sprites are turned off.
+    """
+    global _SPRITES
+    if not SPRITE_CONFIG["enabled"]:
+        return None
+    if _SPRITES is None:
+        _SPRITES = SpriteAtlas(sprite_sources())
+    return _SPRITES
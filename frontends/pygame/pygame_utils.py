@@ -1,5 +1,5 @@
 # File: pygame_utils.py
-# version: 1.6.0
+# version: 1.8.0 (draw_text/draw_character return the rect drawn)
 #
 # Summary: Provides pygame UI helpers for display setup, dynamic scaling, font rendering,
 #          and grid-based drawing. All UI properties (resolution, font, scaling) are configured here.
@@ -25,7 +25,8 @@ UI_CONFIG = {
 }
 
 # Initialize the default font and compute cell dimensions.
-DEFAULT_FONT = pygame.font.Font(UI_CONFIG['default_font'], UI_CONFIG['base_font_size'])
+FONT_SIZE = UI_CONFIG['base_font_size']
+DEFAULT_FONT = pygame.font.Font(UI_CONFIG['default_font'], FONT_SIZE)
 CELL_WIDTH, CELL_HEIGHT = DEFAULT_FONT.size("W")  # Use "W" as a representative character.
 
 # ---------------------------
@@ -42,12 +43,15 @@ def update_cell_sizes(screen):
     Updates the global DEFAULT_FONT and cell dimensions based on the current screen resolution.
     Should be called when the display is created or resized.
     """
-    global DEFAULT_FONT, CELL_WIDTH, CELL_HEIGHT, UI_CONFIG
+    global DEFAULT_FONT, FONT_SIZE, CELL_WIDTH, CELL_HEIGHT, UI_CONFIG
     width, height = screen.get_size()
     base_width, base_height = UI_CONFIG['base_resolution']
     scale = min(width / base_width, height / base_height)
     UI_CONFIG['scale_factor'] = scale
     new_font_size = max(12, int(UI_CONFIG['base_font_size'] * scale))
+    if new_font_size == FONT_SIZE:
+        return  # same font: keep it (and the glyph atlas built from it)
+    FONT_SIZE = new_font_size
     DEFAULT_FONT = pygame.font.Font(UI_CONFIG['default_font'], new_font_size)
     CELL_WIDTH, CELL_HEIGHT = DEFAULT_FONT.size("W")
 
@@ -69,10 +73,11 @@ def get_scaled_font(base_size: int, bold: bool = False) -> pygame.font.Font:
 # ---------------------------
 # Drawing Helpers (Grid-based)
 # ---------------------------
-def draw_text(screen, row: int, col: int, text: str, color: Tuple[int, int, int], clip: bool = False) -> None:
+def draw_text(screen, row: int, col: int, text: str, color: Tuple[int, int, int], clip: bool = False) -> pygame.Rect:
     """
     Draws text on the given screen at grid coordinates (row, col) using DEFAULT_FONT.
     If clip is True, the text is truncated to fit within the grid width.
+    Returns the screen rect drawn.
     """
     screen_width, _ = screen.get_size()
     grid_cols = screen_width // CELL_WIDTH
@@ -80,13 +85,14 @@ def draw_text(screen, row: int, col: int, text: str, color: Tuple[int, int, int]
         available_chars = grid_cols - col
         text = text[:available_chars]
     text_surface = DEFAULT_FONT.render(text, True, color)
-    screen.blit(text_surface, (col * CELL_WIDTH, row * CELL_HEIGHT))
+    return screen.blit(text_surface, (col * CELL_WIDTH, row * CELL_HEIGHT))
 
-def draw_character(screen, row: int, col: int, ch: str, color: Tuple[int, int, int]) -> None:
+def draw_character(screen, row: int, col: int, ch: str, color: Tuple[int, int, int]) -> pygame.Rect:
     """
     Draws a single character on the given screen at grid coordinates (row, col) using DEFAULT_FONT.
+    Returns the screen rect drawn.
     """
-    draw_text(screen, row, col, str(ch), color, clip=True)
+    return draw_text(screen, row, col, str(ch), color, clip=True)
 
 # ---------------------------
 # Terminal Size Helper (Optional)
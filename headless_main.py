@@ -0,0 +1,63 @@
+# FileName: headless_main.py
+# version: 1.2 (--replay plays back a recorded session, --npcs)
+# Summary: Entry point for headless benchmark runs. Generates a seeded map,
+#          drives the engine with a scripted action sequence (walk, chop,
+#          editor, idle) without a terminal, and prints ticks/sec and allocations.
+#          With --replay, plays back a recorded session and prints a timing report.
+# Tags: main, entry, headless, benchmark
+
+import argparse
+import json
+
+def run_replay_file(args):
+    from engine.engine_replay import load_replay, run_replay, format_replay_report
+
+    report = run_replay(load_replay(args.replay), realtime=args.realtime)
+    for line in format_replay_report(report):
+        print(line)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+def main():
+    from engine.engine_headless import SCRIPTS, run_headless_benchmark, format_report
+
+    parser = argparse.ArgumentParser(description="Run the RetroRPG engine headless and report throughput.")
+    parser.add_argument("--script", choices=sorted(SCRIPTS), default="walk",
+                        help="scripted action sequence to run (default: walk)")
+    parser.add_argument("--frames", type=int, default=2000, help="frames to run (default: 2000)")
+    parser.add_argument("--width", type=int, default=200, help="generated map width")
+    parser.add_argument("--height", type=int, default=200, help="generated map height")
+    parser.add_argument("--seed", type=int, default=0, help="map generation seed")
+    parser.add_argument("--generator", choices=("classic", "noise"), default=None,
+                        help="map generator mode (default: generator.GENERATOR_MODE)")
+    parser.add_argument("--npcs", type=int, default=0, help="villager NPCs to scatter over the map")
+    parser.add_argument("--no-alloc", action="store_true",
+                        help="skip the tracemalloc allocation pass")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="play back a recorded session instead of a script")
+    parser.add_argument("--realtime", action="store_true",
+                        help="with --replay: keep the recorded frame timing")
+    parser.add_argument("--report", metavar="FILE",
+                        help="with --replay: also write the timing report as JSON")
+    args = parser.parse_args()
+
+    if args.replay:
+        run_replay_file(args)
+        return
+
+    results = run_headless_benchmark(
+        script_name=args.script,
+        frames=args.frames,
+        width=args.width,
+        height=args.height,
+        seed=args.seed,
+        generator_mode=args.generator,
+        track_allocations=not args.no_alloc,
+        npc_count=args.npcs,
+    )
+    for line in format_report(results):
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 # FileName: map_model_builder.py
-# version: 1.0
+# version: 1.1 (records model.map_source)
 #
 # Summary: Shared logic for reading map data (dict or JSON file),
 #          constructing a GameModel, and returning (model, context).
@@ -90,6 +90,9 @@ def build_model_common(filename_or_data, is_generated, mode_name):
     model.world_width = world_width
     model.world_height = world_height
     model.loaded_map_filename = model_filename  # Could be None if brand-new
+    model.map_source = None
+    if model_filename:
+        model.map_source = {"type": "file", "filename": model_filename, "is_generated": is_generated}
 
     context = GameContext(mode_name=mode_name)
 
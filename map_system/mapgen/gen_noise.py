@@ -0,0 +1,196 @@
+# FileName: gen_noise.py
+# version: 1.0
+# Summary: Alternative generator mode that classifies floor tiles from seeded,
+#          octave value noise computed with NumPy one chunk at a time.
+# Tags: map, generation, noise, chunks
+
+import numpy as np
+
+# -------------------------------------------------------------------------
+# Tile IDs produced by the noise classifier. A chunk is returned as a 2D
+# array of indexes into this tuple (uint8), so the heavy lifting never
+# touches Python strings.
+# -------------------------------------------------------------------------
+NOISE_TILE_IDS = ("EmptyFloor", "SemicolonFloor", "Grass", "Path", "River")
+
+EMPTY_IDX     = 0
+SEMICOLON_IDX = 1
+GRASS_IDX     = 2
+PATH_IDX      = 3
+RIVER_IDX     = 4
+
+NOISE_CONFIG = {
+    "chunk_size": 32,
+
+    # fBm shape shared by every noise field
+    "octaves":     4,
+    "persistence": 0.5,
+    "lacunarity":  2.0,
+
+    # Feature scales (in tiles) of the first octave
+    "moisture_scale": 48.0,
+    "river_scale":    96.0,
+    "path_scale":     64.0,
+
+    # Classification thresholds
+    "river_band":      0.012,  # |river_noise - 0.5| below this => River
+    "path_band":       0.006,  # |path_noise  - 0.5| below this => Path
+    "grass_threshold": 0.58,   # moisture above this => Grass
+    "semicolon_threshold": 0.50,  # moisture above this (but below grass) => SemicolonFloor
+}
+
+# Each noise field gets its own seed offset so they are uncorrelated.
+_MOISTURE_SALT = 0x1F123BB5
+_RIVER_SALT    = 0x05491333
+_PATH_SALT     = 0x68E31DA4
+
+
+def _hash_lattice(ix, iy, seed):
+    """
+    Hash integer lattice coordinates (int64 arrays) into floats in [0, 1).
+    Works for negative coordinates, so chunks anywhere on an infinite map agree
+    with their neighbours along the seams.
+    """
+    hx = (ix & 0xFFFFFFFF).astype(np.uint32) * np.uint32(0x8DA6B343)
+    hy = (iy & 0xFFFFFFFF).astype(np.uint32) * np.uint32(0xD8163841)
+    h = hx ^ hy ^ np.uint32(seed & 0xFFFFFFFF)
+    h ^= h >> np.uint32(13)
+    h *= np.uint32(0x5BD1E995)
+    h ^= h >> np.uint32(15)
+    return h.astype(np.float64) * (1.0 / 4294967296.0)
+
+
+def value_noise(xs, ys, scale, seed):
+    """
+    Smoothly interpolated value noise sampled at world coords (xs, ys).
+    xs, ys are broadcastable float arrays. Returns values in [0, 1).
+    """
+    fx = xs / scale
+    fy = ys / scale
+    x0 = np.floor(fx)
+    y0 = np.floor(fy)
+    tx = fx - x0
+    ty = fy - y0
+    # Smoothstep fade so the lattice is not visible
+    tx = tx * tx * (3.0 - 2.0 * tx)
+    ty = ty * ty * (3.0 - 2.0 * ty)
+
+    ix = x0.astype(np.int64)
+    iy = y0.astype(np.int64)
+    v00 = _hash_lattice(ix, iy, seed)
+    v10 = _hash_lattice(ix + 1, iy, seed)
+    v01 = _hash_lattice(ix, iy + 1, seed)
+    v11 = _hash_lattice(ix + 1, iy + 1, seed)
+
+    top = v00 + (v10 - v00) * tx
+    bottom = v01 + (v11 - v01) * tx
+    return top + (bottom - top) * ty
+
+
+def fractal_noise(xs, ys, scale, seed, octaves=4, persistence=0.5, lacunarity=2.0):
+    """
+    Sum 'octaves' layers of value noise (fBm), normalized back into [0, 1).
+    """
+    total = np.zeros(np.broadcast(xs, ys).shape, dtype=np.float64)
+    amplitude = 1.0
+    amp_sum = 0.0
+    freq_scale = scale
+    for octave in range(octaves):
+        total += value_noise(xs, ys, freq_scale, seed + octave * 0x9E3779B1) * amplitude
+        amp_sum += amplitude
+        amplitude *= persistence
+        freq_scale /= lacunarity
+    return total / amp_sum
+
+
+def classify_noise_region(origin_x, origin_y, width, height, seed, config=NOISE_CONFIG):
+    """
+    Evaluate every noise field for the rectangle starting at world (origin_x, origin_y)
+    and return a (height, width) uint8 array of NOISE_TILE_IDS indexes.
+    """
+    xs = np.arange(origin_x, origin_x + width, dtype=np.float64)[np.newaxis, :]
+    ys = np.arange(origin_y, origin_y + height, dtype=np.float64)[:, np.newaxis]
+
+    octaves = config["octaves"]
+    persistence = config["persistence"]
+    lacunarity = config["lacunarity"]
+
+    moisture = fractal_noise(xs, ys, config["moisture_scale"], seed ^ _MOISTURE_SALT,
+                             octaves, persistence, lacunarity)
+    river = fractal_noise(xs, ys, config["river_scale"], seed ^ _RIVER_SALT,
+                          octaves, persistence, lacunarity)
+    path = fractal_noise(xs, ys, config["path_scale"], seed ^ _PATH_SALT,
+                         octaves, persistence, lacunarity)
+
+    tiles = np.full((height, width), EMPTY_IDX, dtype=np.uint8)
+    tiles[moisture > config["semicolon_threshold"]] = SEMICOLON_IDX
+    tiles[moisture > config["grass_threshold"]] = GRASS_IDX
+    # Paths and rivers follow the 0.5 contour of their noise field, which gives
+    # long connected bands instead of blobs. Rivers win over paths.
+    tiles[np.abs(path - 0.5) < config["path_band"]] = PATH_IDX
+    tiles[np.abs(river - 0.5) < config["river_band"]] = RIVER_IDX
+    return tiles
+
+
+def generate_noise_chunk(chunk_x, chunk_y, seed, chunk_size=None):
+    """
+    Return the (chunk_size, chunk_size) tile-index array for chunk (chunk_x, chunk_y).
+    The result depends only on the seed and chunk coordinates, so a chunk-streamed
+    world can generate chunks on demand, in any order, and get identical seams.
+    """
+    if chunk_size is None:
+        chunk_size = NOISE_CONFIG["chunk_size"]
+    return classify_noise_region(chunk_x * chunk_size, chunk_y * chunk_size,
+                                 chunk_size, chunk_size, seed)
+
+
+def noise_chunk_to_scenery(chunk_x, chunk_y, tiles, chunk_size=None):
+    """
+    Convert a chunk's tile-index array into the usual list of
+    {"x", "y", "definition_id"} scenery dicts.
+    """
+    if chunk_size is None:
+        chunk_size = NOISE_CONFIG["chunk_size"]
+    base_x = chunk_x * chunk_size
+    base_y = chunk_y * chunk_size
+    ids = NOISE_TILE_IDS
+    return [
+        {"x": base_x + x, "y": base_y + y, "definition_id": ids[idx]}
+        for y, row in enumerate(tiles.tolist())
+        for x, idx in enumerate(row)
+    ]
+
+
+def generate_noise_map(width=100, height=100, seed=0, debug_empty_id=None):
+    """
+    Generate a full width x height map by evaluating it chunk by chunk.
+    Returns the same structure as generator.generate_procedural_map().
+
+    If debug_empty_id is given (e.g. "DebugDot"), EmptyFloor tiles use it instead.
+    """
+    chunk_size = NOISE_CONFIG["chunk_size"]
+    grid = np.empty((height, width), dtype=np.uint8)
+
+    for cy in range((height + chunk_size - 1) // chunk_size):
+        for cx in range((width + chunk_size - 1) // chunk_size):
+            tiles = generate_noise_chunk(cx, cy, seed, chunk_size)
+            y0, x0 = cy * chunk_size, cx * chunk_size
+            h = min(chunk_size, height - y0)
+            w = min(chunk_size, width - x0)
+            grid[y0:y0 + h, x0:x0 + w] = tiles[:h, :w]
+
+    ids = list(NOISE_TILE_IDS)
+    if debug_empty_id:
+        ids[EMPTY_IDX] = debug_empty_id
+
+    scenery_list = [
+        {"x": x, "y": y, "definition_id": ids[idx]}
+        for y, row in enumerate(grid.tolist())
+        for x, idx in enumerate(row)
+    ]
+
+    return {
+        "world_width": width,
+        "world_height": height,
+        "scenery": scenery_list
+    }
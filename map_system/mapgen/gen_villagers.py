@@ -0,0 +1,33 @@
+# FileName: gen_villagers.py
+# version: 1.0
+# Summary: Scatters Villager NPC entities over walkable floor tiles of a
+#          freshly generated map (any generator mode).
+# Tags: map, generation, npc
+
+import random
+
+from scenery.scenery_manager import ALL_SCENERY_DEFS
+
+VILLAGER_ID = "Villager"
+
+def spawn_villagers(map_data, count, seed=0, keep_clear=None):
+    """
+    Add 'count' Villager entries to map_data["scenery"] on distinct tiles whose
+    floor is not blocking. 'keep_clear' is an (x, y) left free (the player start).
+    Uses its own RNG seeded from 'seed', so the same map gets the same villagers.
+    """
+    if count <= 0:
+        return map_data
+
+    rng = random.Random(seed ^ 0x5EED_1A6E)
+    walkable = [
+        (s["x"], s["y"])
+        for s in map_data["scenery"]
+        if not ALL_SCENERY_DEFS.get(s["definition_id"], {}).get("blocking", False)
+    ]
+    walkable = sorted(set(walkable) - {keep_clear})
+    count = min(count, len(walkable))
+
+    for (x, y) in rng.sample(walkable, count):
+        map_data["scenery"].append({"x": x, "y": y, "definition_id": VILLAGER_ID})
+    return map_data
@@ -1,9 +1,10 @@
 # FileName: generator.py
-# version: 2.5 (updated for multi-layer definitions, no local constants)
+# version: 2.6 (added seeded "noise" generator mode for very large worlds)
 # Summary: Coordinates the procedural generation workflow, calling sub-generators 
-#          (rivers, grass, trees, rocks, etc.) in order.
+#          (rivers, grass, trees, rocks, etc.) in order, or the chunked noise generator.
 # Tags: map, generation, pipeline
 
+import random
 import tools.debug as debug
 
 # -------------------------------------------------------------------------
@@ -14,6 +15,10 @@ ENABLE_GRASS  = True
 ENABLE_TREES  = False
 ENABLE_ROCKS  = False
 
+# "classic" => step-by-step rivers + trigonometric grass patches (gen_rivers, gen_grass)
+# "noise"   => vectorized octave noise evaluated per chunk (gen_noise, needs NumPy)
+GENERATOR_MODE = "classic"
+
 # -------------------------------------------------------------------------
 # 3) UTILITY IMPORTS
 # -------------------------------------------------------------------------
@@ -27,14 +32,31 @@ from scenery.scenery_manager import ALL_SCENERY_DEFS
 # -------------------------------------------------------------------------
 # 5) MAIN GENERATION FUNCTION
 # -------------------------------------------------------------------------
-def generate_procedural_map(width=100, height=100):
+def generate_procedural_map(width=100, height=100, mode=None, seed=None):
     """
     Orchestrates procedural map generation, storing definition IDs directly in grid[y][x].
     At the end, we build a list of scenery dicts.
 
+    mode: "classic" or "noise" (defaults to GENERATOR_MODE).
+    seed: optional int for reproducible maps. The noise mode always needs one,
+          so a random seed is picked if none is given.
+
     Feature toggles:
         ENABLE_RIVERS, ENABLE_GRASS, ENABLE_TREES, ENABLE_ROCKS
     """
+    if mode is None:
+        mode = GENERATOR_MODE
+
+    if mode == "noise":
+        from .gen_noise import generate_noise_map
+        if seed is None:
+            seed = random.getrandbits(32)
+        debug_empty_id = "DebugDot" if debug.DEBUG_CONFIG["enabled"] else None
+        return generate_noise_map(width, height, seed=seed, debug_empty_id=debug_empty_id)
+
+    if seed is not None:
+        random.seed(seed)
+
     # Avoid circular imports by importing sub-generators here:
     from .gen_rivers import spawn_rivers
     from .gen_grass import spawn_large_semicircle_grass
@@ -1,5 +1,5 @@
 # FileName: map_generator_pipeline.py
-# version: 1.0
+# version: 1.3 (optional villager NPCs)
 #
 # Summary: Single pipeline that generates a brand-new procedural map and
 #          builds a fully layered model ready for play.
@@ -10,18 +10,49 @@
 #   build_model_common. This ensures there's one consistent place
 #   to handle map generation + layering.
 
-from map_system.mapgen.generator import generate_procedural_map
+import random
+
+from map_system.mapgen.generator import generate_procedural_map, GENERATOR_MODE
+from map_system.mapgen.gen_villagers import spawn_villagers
 from map_system.map_model_builder import build_model_common
 
-def create_procedural_model(width=100, height=100, mode_name="play"):
+# Villager NPCs placed on generated maps by default.
+DEFAULT_NPC_COUNT = 0
+
+def create_procedural_model(width=100, height=100, mode_name="play",
+                            generator_mode=None, seed=None, npc_count=None):
     """
     Generate a brand-new procedural map (flat data) and immediately build
     a fully-layered GameModel. Returns (model, context).
+
+    generator_mode: "classic" or "noise" (None => generator.GENERATOR_MODE).
+    seed: optional int for a reproducible map. If omitted, one is picked at
+          random, so every generated map can be rebuilt from model.map_source.
+    npc_count: Villager NPCs to scatter over the map (None => DEFAULT_NPC_COUNT).
     """
+    if generator_mode is None:
+        generator_mode = GENERATOR_MODE
+    if seed is None:
+        seed = random.getrandbits(32)
+    if npc_count is None:
+        npc_count = DEFAULT_NPC_COUNT
+
     # 1) Generate flat map data
-    raw_data = generate_procedural_map(width, height)
+    raw_data = generate_procedural_map(width, height, mode=generator_mode, seed=seed)
+    spawn_villagers(raw_data, npc_count, seed=seed, keep_clear=(width // 2, height // 2))
 
     # 2) Convert it to a layered model and context
     model, context = build_model_common(raw_data, is_generated=True, mode_name=mode_name)
 
+    # 3) Remember how to rebuild this exact map (used by engine_replay.py)
+    if model is not None:
+        model.map_source = {
+            "type": "generated",
+            "width": width,
+            "height": height,
+            "generator_mode": generator_mode,
+            "seed": seed,
+            "npc_count": npc_count,
+        }
+
     return model, context
@@ -0,0 +1,173 @@
+# FileName: net_main.py
+# version: 1.2 (sessions-bench reports a missing maps dir instead of failing)
+# Summary: Entry point for multiplayer. 'serve' runs an authoritative server on a
+#          generated map, 'play' joins one in the curses frontend, and 'bench'
+#          runs a server plus N scripted clients on localhost and reports
+#          per-client bandwidth against NET_CONFIG["budget_bytes_sec"].
+#          'sessions' hosts many independent single-player sessions (maps from
+#          saved_maps) and 'sessions-bench' measures that host under load.
+# Tags: main, entry, network, multiplayer, benchmark
+
+import argparse
+import asyncio
+import random
+
+def build_server(args):
+    from map_system.mapgen.map_generator_pipeline import create_procedural_model
+    from engine.engine_network import GameServer
+
+    model, context = create_procedural_model(args.width, args.height, seed=args.seed,
+                                             npc_count=args.npcs)
+    return GameServer(model, context, host=args.host, port=args.port)
+
+async def serve(args):
+    server = build_server(args)
+    port = await server.start()
+    print(f"serving on {server.host}:{port} (tick rate {server.tick_rate})")
+    try:
+        await server.run()
+    finally:
+        await server.close()
+
+def play(args):
+    import curses
+    from engine.engine_network import connect_to_server
+
+    model, context = connect_to_server(args.host, args.port, name=args.name)
+
+    def run_game(stdscr):
+        from frontends.curses.curses_color_init import init_colors
+        from frontends.curses.curses_game_renderer import CursesGameRenderer
+        from frontends.curses.where_curses_input_is_handled import CursesGameInput
+        from engine.engine_main import run_game_loop
+
+        init_colors()
+        run_game_loop(model, context, CursesGameInput(stdscr), CursesGameRenderer(stdscr))
+
+    curses.wrapper(run_game)
+
+async def _bot(client, seconds, rng):
+    """
+    A scripted client: walks and interacts at random each tick for 'seconds'.
+    """
+    moves = ("MOVE_UP", "MOVE_DOWN", "MOVE_LEFT", "MOVE_RIGHT")
+    loop = asyncio.get_event_loop()
+    end = loop.time() + seconds
+    direction = rng.choice(moves)
+    while loop.time() < end and client.connected:
+        if rng.random() < 0.1:
+            direction = rng.choice(moves)
+        await client.send_actions(["INTERACT" if rng.random() < 0.05 else direction])
+        await asyncio.sleep(0.05)
+
+async def bench(args):
+    from engine.engine_network import NetworkClient, NET_CONFIG, REMOTE_PLAYER_ID, _static_stack
+
+    server = build_server(args)
+    port = await server.start()
+    run_task = asyncio.ensure_future(server.run())
+
+    clients = [NetworkClient(name=f"bot{i}") for i in range(args.clients)]
+    for client in clients:
+        await client.connect(server.host, port)
+    readers = [asyncio.ensure_future(c.read_loop()) for c in clients]
+    rng = random.Random(args.seed)
+    await asyncio.gather(*(_bot(c, args.seconds, random.Random(rng.random())) for c in clients))
+    ticks_played = server.tick
+    sent_while_playing = server.stats["bytes_sent"]
+    received = [c.bytes_received for c in clients]
+
+    # Let deferred tiles drain, then check every bot's mirror against the
+    # server's tiles in that bot's view.
+    await asyncio.sleep(args.settle)
+    server.stop()
+    await run_task
+    await asyncio.sleep(0.2)
+    mismatches = missing = 0
+    for client in clients:
+        session = server.sessions[client.welcome["id"]]
+        model, _ = client.build_model()
+        client.apply_updates(model, lambda x, y: None)
+        x0, y0, x1, y1 = session.view
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                if (x, y) not in model.placed_scenery:
+                    missing += 1
+                    continue
+                mirrored = [d for d in _static_stack(model.placed_scenery, x, y) if d != REMOTE_PLAYER_ID]
+                if mirrored != _static_stack(server.model.placed_scenery, x, y):
+                    mismatches += 1
+    for client in clients:
+        client.close()
+    await asyncio.gather(*readers, return_exceptions=True)
+
+    ticks = sorted(server.tick_times) or [0.0]
+    per_client = [b / float(args.seconds) for b in received]
+    print(f"clients: {args.clients}  seconds: {args.seconds}  server ticks: {ticks_played}")
+    print(f"tick ms: mean {sum(ticks) / len(ticks) * 1000:.2f}  "
+          f"p99 {ticks[int(len(ticks) * 0.99)] * 1000:.2f}  max {ticks[-1] * 1000:.2f}")
+    print(f"bytes/sec per client: mean {sum(per_client) / len(per_client):.0f}  "
+          f"max {max(per_client):.0f}  budget {NET_CONFIG['budget_bytes_sec']}")
+    print(f"server bytes sent: {sent_while_playing}  "
+          f"tile-ticks deferred by budget: {server.stats['tiles_deferred']}")
+    print(f"after {args.settle}s settle: tiles missing {missing}  mismatched {mismatches}")
+    await server.close()
+
+async def serve_sessions(args):
+    from engine.engine_sessions import SessionHost
+
+    host = SessionHost()
+    port = await host.start(args.host, args.port)
+    print(f"hosting sessions on {args.host}:{port} (tick rate {host.tick_rate})")
+    try:
+        await host.run()
+    finally:
+        await host.close()
+
+def bench_sessions(args):
+    from engine.engine_sessions import run_sessions_benchmark, format_sessions_report
+
+    try:
+        report = run_sessions_benchmark(sessions=args.sessions, seconds=args.seconds,
+                                        workers=args.workers, seed=args.seed, evict_dir=args.evict_dir)
+    except ValueError as e:
+        print(e)
+        return
+    for line in format_sessions_report(report):
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="RetroRPG multiplayer server/client.")
+    parser.add_argument("command", choices=("serve", "play", "bench", "sessions", "sessions-bench"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="default: NET_CONFIG['port'] (bench: any free port)")
+    parser.add_argument("--name", default="player", help="play: player name")
+    parser.add_argument("--width", type=int, default=200, help="serve/bench: generated map width")
+    parser.add_argument("--height", type=int, default=200, help="serve/bench: generated map height")
+    parser.add_argument("--seed", type=int, default=0, help="serve/bench: map generation seed")
+    parser.add_argument("--npcs", type=int, default=0, help="serve/bench: villager NPCs")
+    parser.add_argument("--clients", type=int, default=8, help="bench: scripted clients")
+    parser.add_argument("--seconds", type=float, default=5.0, help="bench: how long the bots play")
+    parser.add_argument("--sessions", type=int, default=200, help="sessions-bench: sessions to host")
+    parser.add_argument("--evict-dir", default=None,
+                        help="sessions-bench: snapshot directory (default: SESSION_CONFIG['evict_dir'])")
+    parser.add_argument("--workers", type=int, default=1, help="sessions-bench: processes to shard sessions over")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="bench: seconds to let deferred tiles drain before checking mirrors")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        asyncio.run(serve(args))
+    elif args.command == "play":
+        play(args)
+    elif args.command == "sessions":
+        asyncio.run(serve_sessions(args))
+    elif args.command == "sessions-bench":
+        bench_sessions(args)
+    else:
+        if args.port is None:
+            args.port = 0
+        asyncio.run(bench(args))
+
+if __name__ == "__main__":
+    main()
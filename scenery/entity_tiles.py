@@ -1,6 +1,6 @@
 # FileName: entity_tiles.py
 
-# version 1.0
+# version 1.2 (RemotePlayer for network clients)
 
 # Summary: manage entity tiles here
 
@@ -9,7 +9,26 @@
 # scenery_data/entity_tiles.py
 
 ENTITY_TILES = {
-    # For now, empty or add NPC/player definitions here, e.g.:
+    # "npc": True => driven by engine_npc.NpcStore when the map is played.
+    "Villager": {
+        "ascii_char": "&",
+        "color_name": "magenta_on_black",
+        "blocking": True,
+        "placeable": True,
+        "tile_image": "assets/tiles/villager.png",
+        "layer": "entities",
+        "npc": True
+    },
+    # Other players, as drawn by a network client (engine_network.py).
+    "RemotePlayer": {
+        "ascii_char": "@",
+        "color_name": "cyan_on_black",
+        "blocking": True,
+        "placeable": False,
+        "tile_image": "assets/tiles/player.png",
+        "layer": "entities"
+    },
+    # Add more NPC/player definitions here, e.g.:
     # "SomeMonster": {
     #     "ascii_char": "M",
     #     "color_name": "red_on_black",
@@ -1,5 +1,5 @@
 # FileName: layer_manager.py
-# version: 1.2
+# version: 1.3 (draw order is sorted once, not per call)
 # Summary: A simple manager for layer info (name, z-order, visibility).
 # Tags: layers, manager
 
@@ -30,8 +30,18 @@ def get_layer_zindex(layer_name: str) -> int:
         return 999  # fallback if unknown
     return layer_info["z_index"]
 
-def get_layers_in_draw_order() -> list:
+# Sorted layer names, built on first use. Call refresh_layer_order() after
+# changing LAYER_CONFIG at runtime.
+_DRAW_ORDER = None
+
+def refresh_layer_order():
+    global _DRAW_ORDER
+    _DRAW_ORDER = tuple(sorted(LAYER_CONFIG.keys(), key=lambda ln: LAYER_CONFIG[ln]["z_index"]))
+
+def get_layers_in_draw_order() -> tuple:
     """
     Return all layer names sorted by their z_index ascending.
     """
-    return sorted(LAYER_CONFIG.keys(), key=lambda ln: LAYER_CONFIG[ln]["z_index"])
\ No newline at end of file
+    if _DRAW_ORDER is None:
+        refresh_layer_order()
+    return _DRAW_ORDER
@@ -1,5 +1,5 @@
 # FileName: scenery_core.py
-# version: 4.3.1 (modified to prevent alternating floor tiles)
+# version: 4.4 (change listeners for append/remove)
 #
 # Summary: Core scenery logic: a base SceneryObject class, plus layering & collision functions.
 # Tags: scenery, core
@@ -9,6 +9,23 @@ from scenery.scenery_manager import ALL_SCENERY_DEFS, layer_for_def_id
 # Uncommented / re-enabled so that fallback floors can be placed correctly.
 EMPTY_FLOOR_ID = "EmptyFloor"  # used as a fallback if a tile has no floor
 
+# Callbacks fn(placed_scenery, obj) run after append_scenery/remove_scenery
+# changes a tile (e.g. the pathfinding cache in engine_pathfinding.py).
+# Kept as a tuple and replaced on change, so callbacks may unregister themselves.
+_SCENERY_LISTENERS = ()
+
+def add_scenery_listener(fn):
+    global _SCENERY_LISTENERS
+    _SCENERY_LISTENERS = _SCENERY_LISTENERS + (fn,)
+
+def remove_scenery_listener(fn):
+    global _SCENERY_LISTENERS
+    _SCENERY_LISTENERS = tuple(f for f in _SCENERY_LISTENERS if f != fn)
+
+def _notify_scenery_change(placed_scenery, obj):
+    for fn in _SCENERY_LISTENERS:
+        fn(placed_scenery, obj)
+
 class SceneryObject:
     def __init__(self, x, y, definition_id):
         """
@@ -125,6 +142,9 @@ def append_scenery(placed_scenery, obj):
             tile_dict[layer_name] = []
         tile_dict[layer_name].append(obj)
 
+    if _SCENERY_LISTENERS:
+        _notify_scenery_change(placed_scenery, obj)
+
 
 def remove_scenery(placed_scenery, obj):
     """
@@ -163,6 +183,9 @@ def remove_scenery(placed_scenery, obj):
         tile_dict["floor"] = SceneryObject(x, y, EMPTY_FLOOR_ID)
         tile_dict["_prev_floor"] = None
 
+    if _SCENERY_LISTENERS:
+        _notify_scenery_change(placed_scenery, obj)
+
 
 def get_objects_at(placed_scenery, x, y):
     """
@@ -1,5 +1,5 @@
 # FileName: debug.py
-# version: 1.0
+# version: 1.2 (perf HUD flags, replay recording path)
 # Summary: Holds global debugging flags and configuration toggles (speed multipliers, log verbosity, etc.).
 # Tags: debug, config, developer
 
@@ -7,6 +7,15 @@ DEBUG_CONFIG = {
     "enabled":              False,
     "ignore_collisions":    False,
     "walk_speed_multiplier": 1,
+
+    # Performance HUD (toggled in-game with 'f'). When perf_csv_path is set,
+    # per-frame timings recorded while the HUD is on are written there on exit.
+    "perf_hud":             False,
+    "perf_csv_path":        None,
+
+    # When set, each game session is recorded to this replay file
+    # (".gz" => gzipped). Play it back with: python headless_main.py --replay FILE
+    "replay_record_path":   None,
     # You can add more debug features here in the future.
 }
 
@@ -25,4 +34,11 @@ def toggle_debug():
     else:
         # Disable debug features
         DEBUG_CONFIG["ignore_collisions"] = False
-        DEBUG_CONFIG["walk_speed_multiplier"] = 1
\ No newline at end of file
+        DEBUG_CONFIG["walk_speed_multiplier"] = 1
+
+
+def toggle_perf_hud():
+    """
+    Toggle the in-game performance HUD on/off.
+    """
+    DEBUG_CONFIG["perf_hud"] = not DEBUG_CONFIG["perf_hud"]